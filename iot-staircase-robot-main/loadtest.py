@@ -0,0 +1,509 @@
+"""
+Fleet Load Generator
+Runs many simulated robots (built on robot_client.SimulatedRobot) and
+simulated dashboards against the Django WebSocket server, in one asyncio
+process or sharded across several processes, and reports:
+- achieved message throughput per type
+- end-to-end latency percentiles (robot → dashboard, dashboard → robot)
+- drop rates against what the server should have delivered
+- CPU and memory use of the server process (Linux, --server-pid)
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import defaultdict
+
+import websockets
+
+from robot_client import HAS_NUMPY, HAS_PIL, SimulatedRobot, SyntheticVideoSource, VideoPipeline
+
+
+# Latency samples kept per metric (reservoir sampling beyond this)
+MAX_SAMPLES = 20000
+
+# Time allowed for in-flight messages to arrive after senders stop
+DRAIN_SECONDS = 2.0
+
+
+class LatencySamples:
+    """Bounded reservoir of latency samples in milliseconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.samples = []
+
+    def add(self, value):
+        self.count += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def merge(self, count, samples):
+        self.count += count
+        for value in samples:
+            if len(self.samples) < MAX_SAMPLES:
+                self.samples.append(value)
+            else:
+                self.samples[random.randrange(MAX_SAMPLES)] = value
+
+    def percentiles(self):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+
+        def pick(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+        return {
+            "count": self.count,
+            "p50": pick(0.50),
+            "p90": pick(0.90),
+            "p99": pick(0.99),
+            "max": round(ordered[-1], 2),
+        }
+
+
+class LoadStats:
+    """Counters and latencies collected by one shard"""
+
+    def __init__(self, start_at, end_at):
+        self.start_at = start_at
+        self.end_at = end_at
+        self.sent = defaultdict(int)
+        self.received = defaultdict(int)
+        self.latency = defaultdict(LatencySamples)
+        self.errors = 0
+
+    def in_window(self, client_ts):
+        """Only count messages that were sent during the measurement window"""
+        return client_ts is not None and self.start_at * 1000 <= client_ts <= self.end_at * 1000
+
+    def record_sent(self, msg_type):
+        if self.start_at <= time.time() <= self.end_at:
+            self.sent[msg_type] += 1
+
+    def record_received(self, msg_type, client_ts):
+        if not self.in_window(client_ts):
+            return
+        self.received[msg_type] += 1
+        self.latency[msg_type].add(time.time() * 1000 - client_ts)
+
+    def to_dict(self):
+        return {
+            "sent": dict(self.sent),
+            "received": dict(self.received),
+            "latency": {k: [v.count, v.samples] for k, v in self.latency.items()},
+            "errors": self.errors,
+        }
+
+
+class LoadRobot(SimulatedRobot):
+    """SimulatedRobot that counts what it sends and receives instead of printing"""
+
+    def __init__(self, server_url, device_id, stats, config, video_source=None):
+        super().__init__(
+            server_url,
+            device_id,
+            use_camera=False,
+            telemetry_interval=1.0 / config.telemetry_hz if config.telemetry_hz > 0 else 0,
+            video_fps=config.video_fps,
+            frame_size=config.frame_size,
+            buffer_offline=False,
+            sensor_hz=0,
+            control_hz=0,
+            video_source=video_source,
+            webrtc=False,
+        )
+        self.stats = stats
+
+    async def handle_message(self, data):
+        msg_type = data.get("type")
+        if msg_type in ("robot_move", "camera_move"):
+            self.stats.record_received(msg_type, data.get("client_ts"))
+        elif msg_type == "ping":
+            await self.websocket.send(json.dumps({"type": "pong", "seq": data.get("seq")}))
+
+    async def send_telemetry_loop(self):
+        # One single-sample telemetry message per interval, so --telemetry-hz is messages/s
+        while self.running and self.telemetry_interval > 0:
+            await self.send_telemetry()
+            await asyncio.sleep(self.telemetry_interval)
+
+    async def send_telemetry(self):
+        await self.websocket.send(json.dumps(self.build_telemetry()))
+        self.stats.record_sent("telemetry")
+
+    async def send_video_frame_loop(self):
+        if self.video_source and self.video_source.precoded:
+            # Cached JPEGs need no capture or encode stage, just pacing
+            interval = 1.0 / self.video_fps
+            frame_number = 0
+            while self.running:
+                started = time.monotonic()
+                frame = self.capture_frame()
+                await self.send_encoded_frame(frame.data, frame_number, time.time())
+                frame_number += 1
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+            return
+        # Same pipeline, without the periodic per-robot timing printout
+        self.video_pipeline = VideoPipeline(self, report_interval=None)
+        await self.video_pipeline.run()
+
+    async def send_encoded_frame(self, frame_data, frame_number, captured_at):
+        await self.websocket.send(json.dumps({
+            "type": "video_frame",
+            "device_id": self.device_id,
+            "frame_data": frame_data,
+            "frame_number": frame_number,
+            "client_ts": int(time.time() * 1000),
+        }))
+        self.stats.record_sent("video_frame")
+
+    async def run_until(self, end_at):
+        if not await self.connect():
+            self.stats.errors += 1
+            return
+        if self.video_fps > 0 and (self.video_source or HAS_PIL):
+            asyncio.create_task(self.send_video_frame_loop())
+        await asyncio.sleep(max(0.0, end_at - time.time()))
+        self.running = False
+        await asyncio.sleep(DRAIN_SECONDS)
+        await self.websocket.close()
+
+
+class LoadDashboard:
+    """Minimal dashboard client: receives broadcasts and sends joystick commands"""
+
+    def __init__(self, server_url, stats, command_hz, watch=None, telemetry_interval=0.0):
+        self.server_url = server_url
+        self.stats = stats
+        self.command_hz = command_hz
+        self.watch = watch          # robots whose video to subscribe to (None = all)
+        self.telemetry_interval = telemetry_interval
+        self.running = True
+
+    async def run_until(self, end_at):
+        try:
+            async with websockets.connect(self.server_url, max_size=None) as websocket:
+                if self.watch is not None:
+                    await self.subscribe(websocket)
+                if self.telemetry_interval > 0:
+                    await websocket.send(json.dumps({"type": "telemetry_rate",
+                                                     "interval": self.telemetry_interval}))
+                receiver = asyncio.create_task(self.receive_loop(websocket))
+                if self.command_hz > 0:
+                    await self.command_loop(websocket, end_at)
+                else:
+                    await asyncio.sleep(max(0.0, end_at - time.time()))
+                await asyncio.sleep(DRAIN_SECONDS)
+                receiver.cancel()
+        except Exception as e:
+            print(f"❌ Dashboard error: {e}")
+            self.stats.errors += 1
+
+    async def subscribe(self, websocket):
+        """Telemetry from every robot, video only from the watched ones"""
+        await websocket.send(json.dumps({"type": "subscribe", "device_id": "*",
+                                         "streams": ["telemetry", "status"]}))
+        for device_id in self.watch:
+            await websocket.send(json.dumps({"type": "subscribe", "device_id": device_id,
+                                             "streams": ["video"]}))
+
+    async def receive_loop(self, websocket):
+        async for message in websocket:
+            data = json.loads(message)
+            msg_type = data.get("type")
+            if msg_type in ("telemetry_update", "video_frame"):
+                self.stats.record_received(msg_type, data.get("client_ts"))
+            elif msg_type == "telemetry_batch":
+                for fields in data["robots"].values():
+                    self.stats.record_received("telemetry_batch", fields.get("client_ts"))
+            elif msg_type == "ping":
+                await websocket.send(json.dumps({"type": "pong", "seq": data.get("seq")}))
+
+    async def command_loop(self, websocket, end_at):
+        interval = 1.0 / self.command_hz
+        while time.time() < end_at:
+            await websocket.send(json.dumps({
+                "type": "robot_move",
+                "x": round(random.uniform(-1, 1), 2),
+                "y": round(random.uniform(-1, 1), 2),
+                "client_ts": int(time.time() * 1000),
+            }))
+            self.stats.record_sent("robot_move")
+            await asyncio.sleep(interval)
+
+
+def robot_id(index):
+    return f"load_robot_{index:04d}"
+
+
+def watched_robots(config, dashboard):
+    """The robots one dashboard watches with --watch, spread evenly over the fleet"""
+    if config.watch <= 0:
+        return None
+    count = min(config.watch, config.robots)
+    return [robot_id((dashboard * count + k) % config.robots) for k in range(count)]
+
+
+def make_video_source(config):
+    """One synthetic video source shared by every robot in a shard (None = drawn PIL frames)"""
+    if config.video_fps <= 0 or config.video_source == "pil" or not HAS_NUMPY:
+        return None
+    return SyntheticVideoSource(
+        size=config.frame_size,
+        patterns=config.video_patterns,
+        entropy=config.video_entropy,
+        precoded=config.video_source == "cached",
+    )
+
+
+async def run_shard_async(config, shard, start_at):
+    end_at = start_at + config.duration
+    stats = LoadStats(start_at, end_at)
+    video_source = make_video_source(config)
+
+    robots = [
+        LoadRobot(config.server_url, robot_id(i), stats, config, video_source)
+        for i in range(shard, config.robots, config.processes)
+    ]
+    dashboards = [
+        LoadDashboard(config.server_url, stats, config.command_hz, watched_robots(config, i),
+                      config.telemetry_interval)
+        for i in range(shard, config.dashboards, config.processes)
+    ]
+
+    # Clients connect during the ramp, measurement starts at start_at
+    await asyncio.gather(
+        *(r.run_until(end_at) for r in robots),
+        *(d.run_until(end_at) for d in dashboards),
+    )
+    return stats.to_dict()
+
+
+def run_shard(args):
+    config, shard, start_at = args
+    return asyncio.run(run_shard_async(config, shard, start_at))
+
+
+class ServerSampler:
+    """Samples CPU and RSS of the server process from /proc (Linux only)"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.samples = []
+
+    def read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        rss_kb = 0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+        return time.time(), cpu_seconds, rss_kb
+
+    async def run_until(self, start_at, end_at):
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        while time.time() < end_at:
+            try:
+                self.samples.append(self.read())
+            except OSError as e:
+                print(f"⚠️  Cannot sample server process {self.pid}: {e}")
+                return
+            await asyncio.sleep(1.0)
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return None
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            "cpu_percent": round(100.0 * (cpu1 - cpu0) / (t1 - t0), 1),
+            "rss_mb_peak": round(max(s[2] for s in self.samples) / 1024, 1),
+        }
+
+
+def merge_results(results):
+    sent = defaultdict(int)
+    received = defaultdict(int)
+    latency = defaultdict(LatencySamples)
+    errors = 0
+    for result in results:
+        for k, v in result["sent"].items():
+            sent[k] += v
+        for k, v in result["received"].items():
+            received[k] += v
+        for k, (count, samples) in result["latency"].items():
+            latency[k].merge(count, samples)
+        errors += result["errors"]
+    return sent, received, latency, errors
+
+
+def build_report(config, results, server):
+    sent, received, latency, errors = merge_results(results)
+
+    # Every dashboard should see every robot's telemetry and the video of
+    # the robots it watches, every robot should see every dashboard command
+    watched = min(config.watch, config.robots) / config.robots if config.watch > 0 and config.robots else 1.0
+    # (batched telemetry is coalesced, so it has no expected count)
+    expected = {
+        "telemetry_update": sent["telemetry"] * config.dashboards if config.telemetry_interval <= 0 else 0,
+        "video_frame": sent["video_frame"] * config.dashboards * watched,
+        "robot_move": sent["robot_move"] * config.robots,
+    }
+
+    report = {
+        "config": {
+            "robots": config.robots,
+            "dashboards": config.dashboards,
+            "processes": config.processes,
+            "duration": config.duration,
+            "telemetry_hz": config.telemetry_hz,
+            "video_fps": config.video_fps,
+            "frame_size": list(config.frame_size),
+            "video_source": config.video_source,
+            "video_entropy": config.video_entropy,
+            "command_hz": config.command_hz,
+            "watch": config.watch,
+            "telemetry_interval": config.telemetry_interval,
+        },
+        "sent_per_second": {k: round(v / config.duration, 1) for k, v in sent.items()},
+        "delivered_per_second": {k: round(v / config.duration, 1) for k, v in received.items()},
+        "drop_rate": {
+            k: round(1.0 - received[k] / n, 4) if n else None
+            for k, n in expected.items()
+        },
+        "latency_ms": {k: v.percentiles() for k, v in latency.items()},
+        "client_errors": errors,
+        "server": server.summary() if server else None,
+    }
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print("📊 LOAD TEST REPORT")
+    print("=" * 70)
+    cfg = report["config"]
+    print(f"   Robots: {cfg['robots']}  Dashboards: {cfg['dashboards']}  "
+          f"Processes: {cfg['processes']}  Duration: {cfg['duration']}s")
+    print(f"   Telemetry: {cfg['telemetry_hz']} Hz  Video: {cfg['video_fps']} fps "
+          f"@ {cfg['frame_size'][0]}x{cfg['frame_size'][1]}  Commands: {cfg['command_hz']} Hz")
+    print("\n   Throughput (msg/s)     sent      delivered")
+    telemetry = "telemetry_batch" if cfg.get("telemetry_interval") else "telemetry_update"
+    for sent_type, recv_type in (("telemetry", telemetry),
+                                 ("video_frame", "video_frame"),
+                                 ("robot_move", "robot_move")):
+        print(f"   {recv_type:<20} {report['sent_per_second'].get(sent_type, 0):>8} "
+              f"{report['delivered_per_second'].get(recv_type, 0):>12}")
+    print("\n   Latency (ms)           p50      p90      p99      max     drop")
+    for msg_type, stats in report["latency_ms"].items():
+        if stats is None:
+            continue
+        drop = report["drop_rate"].get(msg_type)
+        drop_text = f"{drop * 100:.2f}%" if drop is not None else "-"
+        print(f"   {msg_type:<20} {stats['p50']:>7} {stats['p90']:>8} "
+              f"{stats['p99']:>8} {stats['max']:>8} {drop_text:>8}")
+    if report["server"]:
+        print(f"\n   Server CPU: {report['server']['cpu_percent']}%  "
+              f"Peak RSS: {report['server']['rss_mb_peak']} MB")
+    if report["client_errors"]:
+        print(f"\n   ⚠️  Client errors: {report['client_errors']}")
+    print("=" * 70)
+
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the robot WebSocket server")
+    parser.add_argument("--server-url", default="ws://localhost:8000/ws/telemetry/")
+    parser.add_argument("--robots", type=int, default=10, help="Number of simulated robots")
+    parser.add_argument("--dashboards", type=int, default=2, help="Number of simulated dashboards")
+    parser.add_argument("--processes", type=int, default=1, help="Shard clients across this many processes")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measurement window in seconds")
+    parser.add_argument("--ramp", type=float, default=3.0, help="Seconds allowed for clients to connect")
+    parser.add_argument("--telemetry-hz", type=float, default=1.0, help="Telemetry messages per robot per second")
+    parser.add_argument("--video-fps", type=float, default=10.0, help="Video frames per robot per second (0 = off)")
+    parser.add_argument("--frame-size", type=parse_size, default=(640, 480), help="Video frame size, e.g. 320x240")
+    parser.add_argument("--video-source", choices=["cached", "stamp", "pil"], default="cached",
+                        help="cached: cycle pre-encoded test patterns (cheapest); stamp: encode test patterns "
+                             "with a per-frame counter region; pil: draw and encode every frame")
+    parser.add_argument("--video-entropy", type=float, default=0.2,
+                        help="Noise level of the test patterns (0-1), sets the JPEG size")
+    parser.add_argument("--video-patterns", type=int, default=8, help="Distinct test patterns to cycle through")
+    parser.add_argument("--command-hz", type=float, default=10.0, help="Joystick commands per dashboard per second")
+    parser.add_argument("--watch", type=int, default=0,
+                        help="Robots whose video each dashboard subscribes to (0 = all, unsubscribed)")
+    parser.add_argument("--telemetry-interval", type=float, default=0.0,
+                        help="Dashboards ask for batched telemetry every this many seconds (0 = every sample)")
+    parser.add_argument("--server-pid", type=int, default=None, help="Server process to sample for CPU/RSS")
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    config = parser.parse_args()
+    if config.video_source == "stamp" and (config.frame_size[0] < SyntheticVideoSource.STAMP_BITS
+                                           or config.frame_size[1] < 2):
+        parser.error(f"--video-source stamp needs a --frame-size of at least {SyntheticVideoSource.STAMP_BITS}x2")
+    return config
+
+
+async def sample_server(config, start_at):
+    sampler = ServerSampler(config.server_pid)
+    await sampler.run_until(start_at, start_at + config.duration)
+    return sampler
+
+
+def main():
+    config = parse_args()
+    config.processes = max(1, min(config.processes, max(config.robots, config.dashboards, 1)))
+    start_at = time.time() + config.ramp
+    shards = [(config, shard, start_at) for shard in range(config.processes)]
+
+    print(f"🚀 Starting load test: {config.robots} robots, {config.dashboards} dashboards, "
+          f"{config.processes} process(es), {config.duration}s")
+    if config.video_fps > 0 and config.video_source != "pil" and not HAS_NUMPY:
+        print("⚠️  NumPy not installed, falling back to drawn PIL frames")
+        config.video_source = "pil"
+    if config.video_fps > 0 and config.video_source == "pil" and not HAS_PIL:
+        print("⚠️  Pillow not installed, simulated robots will not send video")
+    elif config.video_fps > 0 and config.video_source == "cached":
+        payload = make_video_source(config).payload_bytes()
+        print(f"🎞️  Synthetic video: {config.video_patterns} cached frames, ~{payload} bytes each")
+
+    server = None
+    if config.processes == 1:
+        async def single():
+            sampler_task = asyncio.create_task(sample_server(config, start_at)) if config.server_pid else None
+            result = await run_shard_async(config, 0, start_at)
+            return result, (await sampler_task if sampler_task else None)
+
+        result, server = asyncio.run(single())
+        results = [result]
+    else:
+        with multiprocessing.Pool(config.processes) as pool:
+            pending = pool.map_async(run_shard, shards)
+            if config.server_pid:
+                server = asyncio.run(sample_server(config, start_at))
+            results = pending.get()
+
+    report = build_report(config, results, server)
+    print_report(report)
+    if config.json:
+        with open(config.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {config.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Battery time-to-empty estimation
+Keeps an exponentially weighted linear regression of battery level over time
+for every connected robot. Each telemetry sample updates a handful of running
+sums in O(1), so the estimate never needs the stored TelemetryData history.
+"""
+
+import math
+import time
+
+
+# Samples older than this many seconds count for half as much as a fresh one
+DEFAULT_HALF_LIFE = 300.0
+
+# Two-sided 95% normal quantile used for the confidence bounds
+CONFIDENCE_Z = 1.96
+
+
+class BatteryEstimator:
+    """
+    Online weighted least-squares fit of battery (%) against time (s).
+
+    Older samples are decayed by 0.5 ** (dt / half_life) whenever a new
+    sample arrives, which weights the fit toward the current load. A sample
+    arriving out of order gets the weight it would have decayed to by now.
+    """
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE):
+        self.half_life = half_life
+        self.origin = None        # time of the first sample, keeps t small
+        self.last_time = None
+        self.last_battery = None
+        self.samples = 0
+        # Weighted running sums
+        self.sw = 0.0             # sum of weights
+        self.sw2 = 0.0            # sum of squared weights (effective sample size)
+        self.st = 0.0
+        self.sy = 0.0
+        self.stt = 0.0
+        self.sty = 0.0
+        self.syy = 0.0
+
+    def update(self, battery, now=None):
+        """Add one battery sample taken at `now` (epoch seconds)"""
+        if battery is None:
+            return
+        battery = float(battery)
+        now = time.time() if now is None else float(now)
+
+        weight = 1.0
+        if self.origin is None:
+            self.origin = self.last_time = now
+        elif now < self.last_time:
+            weight = 0.5 ** ((self.last_time - now) / self.half_life)
+        elif now > self.last_time:
+            decay = 0.5 ** ((now - self.last_time) / self.half_life)
+            self.sw *= decay
+            self.sw2 *= decay * decay
+            self.st *= decay
+            self.sy *= decay
+            self.stt *= decay
+            self.sty *= decay
+            self.syy *= decay
+
+        t = now - self.origin
+        self.sw += weight
+        self.sw2 += weight * weight
+        self.st += weight * t
+        self.sy += weight * battery
+        self.stt += weight * t * t
+        self.sty += weight * t * battery
+        self.syy += weight * battery * battery
+
+        if now >= self.last_time:
+            self.last_time = now
+            self.last_battery = battery
+        self.samples += 1
+
+    def estimate(self, now=None):
+        """
+        Return the current discharge estimate as a dict, or None until
+        there are enough samples to fit a slope.
+
+        time_to_empty/lower/upper are in seconds; None means "not draining"
+        (or an unbounded upper limit).
+        """
+        if self.samples < 3 or self.sw <= 0:
+            return None
+
+        mean_t = self.st / self.sw
+        mean_y = self.sy / self.sw
+        var_t = self.stt - self.st * mean_t
+        if var_t <= 1e-9:
+            return None
+
+        slope = (self.sty - self.st * mean_y) / var_t   # % per second
+        intercept = mean_y - slope * mean_t
+
+        # Residual variance with the effective number of samples
+        sse = max(self.syy - self.sy * mean_y - slope * (self.sty - self.st * mean_y), 0.0)
+        n_eff = (self.sw * self.sw) / self.sw2 if self.sw2 else 0.0
+        if n_eff > 2:
+            sigma2 = sse / self.sw * n_eff / (n_eff - 2)
+            slope_se = math.sqrt(sigma2 / (var_t / self.sw * n_eff)) if sigma2 > 0 else 0.0
+        else:
+            slope_se = float('inf')
+
+        now = self.last_time if now is None else float(now)
+        level = max(intercept + slope * (now - self.origin), 0.0)
+
+        def time_left(rate):
+            if rate >= 0:
+                return None
+            return level / -rate
+
+        spread = CONFIDENCE_Z * slope_se
+        return {
+            "battery": round(level, 2),
+            "discharge_rate": round(-slope * 60.0, 4),    # % per minute
+            "time_to_empty": _round(time_left(slope)),
+            # Faster drain gives the lower bound, slower drain the upper
+            "time_to_empty_lower": _round(time_left(slope - spread)),
+            "time_to_empty_upper": _round(time_left(slope + spread)),
+            "samples": self.samples,
+            "updated_at": self.last_time,
+        }
+
+
+def _round(value):
+    if value is None or math.isinf(value):
+        return None
+    return round(value, 1)
+
+
+# Global dictionary of estimators, one per robot device_id
+battery_estimators = {}
+
+
+def record_battery(device_id, battery, now=None):
+    """Feed one telemetry sample into the robot's estimator and return its estimate"""
+    estimator = battery_estimators.get(device_id)
+    if estimator is None:
+        estimator = battery_estimators[device_id] = BatteryEstimator()
+    estimator.update(battery, now)
+    return estimator.estimate()
+
+
+def forget_battery(device_id):
+    """Drop a disconnected robot's estimator so it is no longer reported"""
+    battery_estimators.pop(device_id, None)
+
+
+def all_estimates():
+    """Current estimate for every robot that has reported battery data"""
+    return {
+        device_id: estimator.estimate()
+        for device_id, estimator in battery_estimators.items()
+    }
@@ -0,0 +1,274 @@
+"""
+Consumer Hot-Path Benchmarks
+In-process scenarios that drive TelemetryConsumer through WebsocketCommunicator
+with the in-memory channel layer, plus JSON baseline storage and regression
+checks. Run through robot/test_benchmarks.py:
+
+    ROBOT_BENCHMARKS=1 python manage.py test robot.test_benchmarks
+    ROBOT_BENCHMARKS=update python manage.py test robot.test_benchmarks
+
+Baselines are machine specific; regenerate them on the machine that runs
+the comparison before relying on the regression check.
+"""
+
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from channels.testing import WebsocketCommunicator
+
+from .consumers import TelemetryConsumer
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'benchmark_baselines.json'
+
+# Allowed relative change before a result counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Sub-millisecond p99s are dominated by scheduler noise; ignore changes below this
+P99_NOISE_FLOOR_MS = 0.5
+
+# Each scenario runs this many times: best throughput, median percentiles
+DEFAULT_ROUNDS = 5
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+}
+
+
+def summarize(latencies, elapsed):
+    """Throughput (ops/s) and latency percentiles (ms) for one scenario"""
+    ordered = sorted(latencies)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000.0
+
+    return {
+        "ops": len(ordered),
+        "throughput": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(pick(0.50), 3),
+        "p99_ms": round(pick(0.99), 3),
+    }
+
+
+async def connect_robot(device_id="bench_robot"):
+    communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), f"/ws/telemetry/?device_id={device_id}")
+    await communicator.connect()
+    await communicator.receive_json_from()
+    return communicator
+
+
+async def connect_website():
+    communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+    await communicator.connect()
+    await communicator.receive_json_from()
+    return communicator
+
+
+async def receive_type(communicator, msg_type):
+    while True:
+        message = await communicator.receive_json_from(timeout=5)
+        if message.get("type") == msg_type:
+            return message
+
+
+async def timed(iterations, warmup, operation):
+    """Run operation() warmup + iterations times, return per-op latencies and elapsed time"""
+    for i in range(warmup):
+        await operation(i)
+    latencies = []
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+    return latencies, elapsed
+
+
+def combine_rounds(rounds):
+    """Best throughput and median percentiles over repeated runs of a scenario"""
+    return {
+        "ops": rounds[0]["ops"],
+        "throughput": max(r["throughput"] for r in rounds),
+        "p50_ms": round(statistics.median(r["p50_ms"] for r in rounds), 3),
+        "p99_ms": round(statistics.median(r["p99_ms"] for r in rounds), 3),
+    }
+
+
+async def bench_parse_dispatch(iterations=500, warmup=50):
+    """Dashboard command parsed, dispatched and acknowledged (no robots attached)"""
+    website = await connect_website()
+
+    async def operation(i):
+        await website.send_to(text_data=json.dumps({"type": "set_speed", "value": i % 100}))
+        await receive_type(website, "ack")
+
+    result = await timed(iterations, warmup, operation)
+    await website.disconnect()
+    return summarize(*result)
+
+
+async def bench_telemetry_ingest(iterations=200, warmup=20):
+    """Robot telemetry saved to the database and acknowledged"""
+    robot = await connect_robot()
+
+    async def operation(i):
+        await robot.send_to(text_data=json.dumps({
+            "type": "telemetry",
+            "battery": 90 - i * 0.01,
+            "cpu": 40.0,
+            "temperature": 35.0,
+            "signal": 80.0,
+        }))
+        await receive_type(robot, "ack")
+
+    result = await timed(iterations, warmup, operation)
+    await robot.disconnect()
+    return summarize(*result)
+
+
+async def bench_video_relay(viewers, iterations=100, warmup=10, frame_bytes=40000):
+    """One video frame relayed from a robot to every connected viewer"""
+    robot = await connect_robot()
+    websites = [await connect_website() for _ in range(viewers)]
+    frame_data = "A" * frame_bytes
+
+    async def operation(i):
+        await robot.send_to(text_data=json.dumps({
+            "type": "video_frame",
+            "frame_data": frame_data,
+            "frame_number": i,
+        }))
+        await asyncio.gather(*(receive_type(w, "video_frame") for w in websites))
+
+    result = await timed(iterations, warmup, operation)
+    for w in websites:
+        await w.disconnect()
+    await robot.disconnect()
+    return summarize(*result)
+
+
+async def bench_command_forwarding(iterations=300, warmup=30):
+    """Joystick command from a dashboard delivered to the robot"""
+    robot = await connect_robot()
+    website = await connect_website()
+
+    async def operation(i):
+        await website.send_to(text_data=json.dumps({"type": "robot_move", "x": 0.5, "y": -0.5}))
+        await receive_type(robot, "robot_move")
+
+    result = await timed(iterations, warmup, operation)
+    await website.disconnect()
+    await robot.disconnect()
+    return summarize(*result)
+
+
+async def bench_command_forwarding_video(iterations=300, warmup=30, viewers=10, fps=30, frame_bytes=40000):
+    """
+    Joystick command delivered to a robot that is streaming video to viewers
+    at full rate; compare with command_forwarding (same path, no video)
+    """
+    robot = await connect_robot()
+    website = await connect_website()
+    viewers = [await connect_website() for _ in range(viewers)]
+    frame_data = "A" * frame_bytes
+
+    async def stream():
+        frame_number = 0
+        while True:
+            await robot.send_to(text_data=json.dumps({
+                "type": "video_frame",
+                "frame_data": frame_data,
+                "frame_number": frame_number,
+            }))
+            frame_number += 1
+            await asyncio.sleep(1.0 / fps)
+
+    async def discard(communicator):
+        while True:
+            await communicator.output_queue.get()
+
+    background = [asyncio.create_task(stream())] + [asyncio.create_task(discard(v)) for v in viewers]
+
+    async def operation(i):
+        await website.send_to(text_data=json.dumps({"type": "robot_move", "x": 0.5, "y": -0.5}))
+        await receive_type(robot, "robot_move")
+
+    try:
+        result = await timed(iterations, warmup, operation)
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+    for communicator in viewers + [website, robot]:
+        await communicator.disconnect()
+    return summarize(*result)
+
+
+SCENARIOS = {
+    "parse_dispatch": bench_parse_dispatch,
+    "telemetry_ingest": bench_telemetry_ingest,
+    "video_relay_1": lambda: bench_video_relay(1),
+    "video_relay_10": lambda: bench_video_relay(10),
+    "video_relay_100": lambda: bench_video_relay(100, iterations=30, warmup=3),
+    "command_forwarding": bench_command_forwarding,
+    "command_forwarding_video": bench_command_forwarding_video,
+}
+
+
+async def run_all(names=None, rounds=DEFAULT_ROUNDS):
+    """
+    Run the selected scenarios and return {name: summary}
+    Console output from the consumer goes to /dev/null so terminal speed
+    does not skew the numbers (the formatting cost is still measured).
+    """
+    results = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for name, scenario in SCENARIOS.items():
+            if names and name not in names:
+                continue
+            results[name] = combine_rounds([await scenario() for _ in range(rounds)])
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results, baselines, tolerance=DEFAULT_TOLERANCE):
+    """List human-readable regressions of throughput or p99 beyond tolerance"""
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput']} ops/s < baseline {baseline['throughput']}"
+            )
+        if result["p99_ms"] > max(baseline["p99_ms"] * (1 + tolerance),
+                                  baseline["p99_ms"] + P99_NOISE_FLOOR_MS):
+            regressions.append(
+                f"{name}: p99 {result['p99_ms']} ms > baseline {baseline['p99_ms']}"
+            )
+    return regressions
@@ -0,0 +1,88 @@
+"""
+Clock Synchronization
+NTP-style estimate of how far a robot's clock is from the server's, taken
+from the heartbeat ping/pong. The ping carries t1 (server send time); the
+robot's pong echoes it with t2 (robot receive) and t3 (robot send); t4 is
+when the server reads the pong. All times are epoch seconds.
+
+    offset = ((t2 - t1) + (t3 - t4)) / 2    robot clock minus server clock
+    delay  = (t4 - t1) - (t3 - t2)          network round trip
+
+As in NTP's clock filter, the offset comes from the lowest-delay samples
+(the least queuing error): those within DELAY_TOLERANCE of the fastest
+exchange. Drift is the least-squares slope of their offsets over time, so
+conversions stay accurate between heartbeats.
+"""
+
+import time
+from collections import deque
+
+
+class ClockSync:
+    """Offset and drift of one remote clock relative to this server"""
+
+    # Samples count as quiet up to this factor of the fastest round trip (+1 ms)
+    DELAY_TOLERANCE = 1.5
+    # Drift needs samples spread over at least this long (seconds)
+    MIN_DRIFT_SPAN = 10.0
+
+    def __init__(self, window=16):
+        self.samples = deque(maxlen=window)     # (t4, offset, delay)
+        self.offset = None
+        self.drift = 0.0
+        self.delay = None
+        self.reference = None
+
+    @property
+    def synced(self):
+        return self.offset is not None
+
+    def add(self, t1, t2, t3, t4=None):
+        """Add one ping/pong exchange; returns (offset, delay) or None if it is unusable"""
+        t4 = time.time() if t4 is None else t4
+        try:
+            t1, t2, t3, t4 = float(t1), float(t2), float(t3), float(t4)
+        except (TypeError, ValueError):
+            return None
+        delay = (t4 - t1) - (t3 - t2)
+        if delay < 0 or t3 < t2:
+            return None
+        offset = ((t2 - t1) + (t3 - t4)) / 2.0
+        self.samples.append((t4, offset, delay))
+        self.update()
+        return offset, delay
+
+    def update(self):
+        fastest = min(self.samples, key=lambda sample: sample[2])
+        self.reference, self.offset, self.delay = fastest
+        limit = fastest[2] * self.DELAY_TOLERANCE + 0.001
+        best = [sample for sample in self.samples if sample[2] <= limit]
+
+        self.drift = 0.0
+        times = [sample[0] for sample in best]
+        if len(best) >= 3 and max(times) - min(times) >= self.MIN_DRIFT_SPAN:
+            mean_t = sum(times) / len(times)
+            mean_o = sum(sample[1] for sample in best) / len(best)
+            var = sum((t - mean_t) ** 2 for t in times)
+            cov = sum((t - mean_t) * (sample[1] - mean_o) for t, sample in zip(times, best))
+            self.drift = cov / var
+            # Re-anchor the line at the mean so the offset is not one noisy sample
+            self.reference, self.offset = mean_t, mean_o
+
+    def offset_at(self, server_time):
+        return self.offset + self.drift * (server_time - self.reference)
+
+    def to_server_time(self, remote_time):
+        """A remote (robot) epoch time on the server clock, unchanged until synced"""
+        if not self.synced:
+            return remote_time
+        # The offset hardly changes over one offset's worth of time, one step is enough
+        return remote_time - self.offset_at(remote_time - self.offset)
+
+    def as_dict(self):
+        return {
+            "offset_ms": round(self.offset * 1000.0, 3) if self.synced else None,
+            "drift_ppm": round(self.drift * 1e6, 2),
+            "delay_ms": round(self.delay * 1000.0, 3) if self.synced else None,
+            "samples": len(self.samples),
+        }
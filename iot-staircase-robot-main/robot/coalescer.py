@@ -0,0 +1,88 @@
+"""
+Telemetry Coalescing
+Dashboards that do not need every sample ask for a delivery interval:
+
+    {"type": "telemetry_rate", "interval": 1.0}     seconds, 0 = every sample
+
+Their telemetry_update messages are then held per robot, and once per
+interval a single message carries what changed since the last one:
+
+    {"type": "telemetry_batch", "robots": {"robot_01": {"battery": 81.5}, ...}}
+
+Only fields whose value differs from what that dashboard was last sent are
+included, and robots with no changes are left out.
+"""
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .outbound import LANE_TELEMETRY
+
+
+logger = logging.getLogger(__name__)
+
+# Identify the message, not part of a robot's state
+SKIP_FIELDS = {"type", "device_id"}
+
+
+def interval_limits():
+    """Shortest and longest delivery interval a dashboard may ask for (seconds)"""
+    return (float(getattr(settings, 'ROBOT_TELEMETRY_MIN_INTERVAL', 0.1)),
+            float(getattr(settings, 'ROBOT_TELEMETRY_MAX_INTERVAL', 60.0)))
+
+
+class TelemetryCoalescer:
+    """Batched, changed-fields-only telemetry for one dashboard"""
+
+    def __init__(self, outbox, interval):
+        self.outbox = outbox
+        self.interval = interval
+        self.pending = {}       # {device_id: latest fields since the last batch}
+        self.delivered = {}     # {device_id: fields as this dashboard last saw them}
+        self.task = asyncio.create_task(self.run())
+
+    def add(self, message):
+        fields = {key: value for key, value in message.items() if key not in SKIP_FIELDS}
+        self.pending.setdefault(message.get("device_id"), {}).update(fields)
+
+    def forget(self, device_id):
+        """A robot went away, its next batch starts from scratch"""
+        self.pending.pop(device_id, None)
+        self.delivered.pop(device_id, None)
+
+    def changes(self):
+        """Fields that differ from what was delivered, clearing the pending samples"""
+        robots = {}
+        for device_id, fields in self.pending.items():
+            delivered = self.delivered.setdefault(device_id, {})
+            changed = {key: value for key, value in fields.items()
+                       if key not in delivered or delivered[key] != value}
+            if changed:
+                delivered.update(changed)
+                robots[device_id] = changed
+        self.pending = {}
+        return robots
+
+    async def flush(self):
+        robots = self.changes()
+        if robots:
+            await self.outbox.put(LANE_TELEMETRY, json.dumps({
+                "type": "telemetry_batch",
+                "robots": robots,
+                "timestamp": timezone.now().isoformat()
+            }))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to send telemetry batch: {e}")
+
+    def close(self):
+        self.task.cancel()
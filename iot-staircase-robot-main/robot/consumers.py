@@ -1,20 +1,107 @@
+import asyncio
+import base64
 import json
 import logging
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.layers import get_channel_layer
+from django.conf import settings
 from django.utils import timezone
 from asgiref.sync import sync_to_async
 
+from .battery import forget_battery, record_battery
+from .clocksync import ClockSync
+from .coalescer import TelemetryCoalescer, interval_limits
+from .device_tokens import revocation_list
+from .estop import estops
+from .fleet import fleet
+from .outbound import LANE_CONTROL, LANE_TELEMETRY, LANE_VIDEO, PriorityOutbox, lane_for
+from .presence import presence
+from .recorder import EVENT_DISCONNECT, EVENT_RECEIVE, EVENT_SEND, get_recorder
+from .sensorstream import InvalidSensorFrame, get_sensor_store, unpack_sensor_batch
+from .subscriptions import (
+    STREAM_FLEET, STREAM_SENSORS, STREAM_STATUS, STREAM_TELEMETRY, STREAM_VIDEO, WILDCARD,
+    InvalidSubscription, subscriptions,
+)
+from .videoframe import pack_video_frame
+from .webrtc import RELAY_PEER, WEBRTC_SIGNALS, relay_enabled, webrtc_relay
+
 
 logger = logging.getLogger(__name__)
 
 # Global dictionary to track connected robots and websites
 connected_devices = {
     'robots': {},      # {device_id: consumer_instance}
-    'websites': {}     # {device_id: consumer_instance}
+    'websites': {}     # {connection_id: consumer_instance}
 }
 
 
+def decode_offline_batch(data):
+    """
+    Decode the messages of an offline_batch (zlib-compressed JSON list,
+    base64 encoded). Refuses batches that inflate past ROBOT_OFFLINE_BATCH_MAX_BYTES.
+    """
+    if data.get("encoding") != "zlib+base64":
+        raise ValueError(f"Unsupported offline batch encoding: {data.get('encoding')}")
+    
+    max_bytes = getattr(settings, 'ROBOT_OFFLINE_BATCH_MAX_BYTES', 8 * 1024 * 1024)
+    inflater = zlib.decompressobj()
+    raw = inflater.decompress(base64.b64decode(data.get("data", "")), max_bytes)
+    if inflater.unconsumed_tail:
+        raise ValueError(f"Offline batch larger than {max_bytes} bytes")
+    
+    messages = json.loads(raw)
+    if not isinstance(messages, list):
+        raise ValueError("Offline batch must be a list of messages")
+    return messages
+
+
+def sample_time(message):
+    """When a message was taken, from its client_ts (epoch ms), else the receive time"""
+    client_ts = message.get("client_ts")
+    if client_ts is None:
+        return timezone.now()
+    return datetime.fromtimestamp(client_ts / 1000.0, tz=dt_timezone.utc)
+
+
+TELEMETRY_FIELDS = ("battery", "cpu", "temperature", "signal")
+
+
+def expand_telemetry(message):
+    """
+    Samples in a telemetry or columnar telemetry_batch message, as
+    [(values dict, sampled_at, client_ts)]. Incomplete samples are skipped.
+    Without a client_ts per sample they are stamped with the receive time.
+    Raises ValueError when the value columns differ in length.
+    """
+    if message.get("type") == "telemetry":
+        columns = {field: [message.get(field)] for field in TELEMETRY_FIELDS + ("client_ts",)}
+    else:
+        columns = {field: message.get(field) or [] for field in TELEMETRY_FIELDS + ("client_ts",)}
+    
+    lengths = {len(columns[field]) for field in TELEMETRY_FIELDS}
+    if len(lengths) > 1:
+        raise ValueError(f"Telemetry batch columns differ in length: {sorted(lengths)}")
+    count = lengths.pop()
+    if len(columns["client_ts"]) != count:
+        if columns["client_ts"]:
+            logger.warning(f"Telemetry batch has {len(columns['client_ts'])} client_ts for {count} samples, "
+                           f"using the receive time")
+        columns["client_ts"] = [None] * count
+    
+    samples = []
+    for row in zip(*(columns[field] for field in TELEMETRY_FIELDS), columns["client_ts"]):
+        if None in row[:-1]:
+            continue
+        values = dict(zip(TELEMETRY_FIELDS, row[:-1]))
+        samples.append((values, sample_time({"client_ts": row[-1]}), row[-1]))
+    return samples
+
+
 class TelemetryConsumer(AsyncWebsocketConsumer):
     """
     Handles WebSocket connections from both:
@@ -27,32 +114,74 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
         # Determine if this is a robot or website connection
-        # Robot connections include ?device_id in URL
+        # Robot connections carry a signed ?token= (verified by
+        # DeviceTokenAuthMiddleware) or, in development, a bare ?device_id=
         # Website connections are regular controller access
         
         self.device_type = None  # 'robot' or 'website'
         self.device_id = None
+        # Id of the signed token a robot connected with (None for unsigned connections)
+        self.token_id = None
+        self.connection_id = uuid.uuid4().hex
+        # Robots this dashboard has a direct WebRTC session with, and pending relay offers
+        self.webrtc_peers = set()
+        self.webrtc_tasks = set()
+        # Batches telemetry for dashboards that asked for a delivery interval
+        self.telemetry_coalescer = None
+        # Dashboards that asked for video as binary frames (videoframe.py)
+        self.video_binary = False
+        # Broadcasts to this connection go through priority lanes (control > telemetry > video)
+        self.outbox = PriorityOutbox(
+            self.send, max_telemetry=getattr(settings, 'ROBOT_OUTBOX_TELEMETRY_LIMIT', 1000)
+        )
+        # Robot clock offset/drift from heartbeat pongs, to put its timestamps on server time
+        self.clock = ClockSync()
+        self.received_at = None
+        # Session log (ROBOT_RECORD_SESSIONS), None when recording is off
+        self.recorder = get_recorder()
+        
+        params = parse_qs(self.scope.get('query_string', b'').decode())
         
-        # Check if this is a robot connection
-        query_string = self.scope.get('query_string', b'').decode()
-        if 'device_id' in query_string:
-            # This is a robot hardware connection
+        if self.scope.get('device_auth_error'):
+            print(f"⛔ Robot token rejected: {self.scope['device_auth_error']}")
+            logger.warning(f"Robot token rejected: {self.scope['device_auth_error']}")
+            await self.close(code=4401)
+            return
+        
+        if self.scope.get('device_id'):
+            # Authenticated robot hardware connection
+            self.device_type = 'robot'
+            self.device_id = self.scope['device_id']
+            self.token_id = self.scope.get('device_token_id')
+        elif 'device_id' in params:
+            if getattr(settings, 'ROBOT_REQUIRE_DEVICE_TOKEN', False):
+                print(f"⛔ Unsigned robot connection refused: {params['device_id'][0]}")
+                logger.warning(f"Unsigned robot connection refused: {params['device_id'][0]}")
+                await self.close(code=4401)
+                return
+            # Legacy unsigned robot connection (e.g., ?device_id=robot_01)
             self.device_type = 'robot'
-            # Parse device_id from query string (e.g., ?device_id=robot_01)
-            for param in query_string.split('&'):
-                if param.startswith('device_id='):
-                    self.device_id = param.split('=')[1]
-                    break
+            self.device_id = params['device_id'][0]
         else:
             # This is a website/dashboard connection
+            # Each dashboard gets its own viewer id
             self.device_type = 'website'
-            self.device_id = 'dashboard'
+            self.device_id = f"dashboard-{self.connection_id[:8]}"
         
         await self.accept()
+        if self.recorder:
+            self.recorder.connect(self)
+        
+        # Register this connection for heartbeats and TTL reaping
+        presence.register(self)
         
         # Register this connection
         if self.device_type == 'robot':
             connected_devices['robots'][self.device_id] = self
+            fleet.online(self.device_id)
+            if self.token_id:
+                # Revoking the token later disconnects this robot
+                revocation_list.watch(self.token_id, self)
             print(f"✅ Robot connected: {self.device_id}")
             logger.info(f"Robot connected: {self.device_id}")
             
@@ -63,74 +192,159 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "message": f"Robot {self.device_id} connected to server"
             }))
             
-            # Notify all websites that this robot connected
-            await self.broadcast_to_websites({
-                "status": "connected",
-                "device_type": "robot",
-                "device_id": self.device_id,
-                "message": f"Robot {self.device_id} has connected"
-            })
+            # Notify all websites that this robot came online
+            await self.broadcast_presence_delta("online")
         else:
-            connected_devices['websites'][self.device_id] = self
-            print(f"✅ Website/Dashboard connected")
-            logger.info("Website/Dashboard connected")
+            connected_devices['websites'][self.connection_id] = self
+            # Receives every robot's streams until it subscribes to specific ones
+            subscriptions.add_viewer(self)
+            print(f"✅ Website/Dashboard connected: {self.device_id}")
+            logger.info(f"Website/Dashboard connected: {self.device_id}")
             
+            # Connection ack doubles as a single snapshot of the robot roster,
+            # later changes arrive as presence_delta messages
             await self.send(json.dumps({
+                "type": "presence_snapshot",
                 "status": "connected",
                 "device_type": "website",
-                "message": "Dashboard connected to server"
+                "viewer_id": self.device_id,
+                "message": "Dashboard connected to server",
+                "robots": presence.roster('robot'),
+                "timestamp": timezone.now().isoformat()
             }))
-            
-            # Send current robot connection status to newly connected dashboard
-            for robot_id in connected_devices['robots'].keys():
-                await self.send(json.dumps({
-                    "status": "connected",
-                    "device_type": "robot",
-                    "device_id": robot_id,
-                    "message": f"Robot {robot_id} is currently connected"
-                }))
 
     async def disconnect(self, close_code):
         """Handle disconnection"""
-        if self.device_type == 'robot' and self.device_id in connected_devices['robots']:
+        await self.release_connection("disconnect")
+
+    async def reap(self):
+        """Close a connection whose heartbeat TTL expired and free its resources"""
+        await self.release_connection("timeout")
+        try:
+            await self.close(code=4000)
+        except Exception as e:
+            logger.error(f"Failed to close stale connection {self.device_id}: {e}")
+
+    async def revoke(self):
+        """Close a robot whose device token was revoked while it was connected"""
+        await self.release_connection("revoked")
+        try:
+            await self.close(code=4401)
+        except Exception as e:
+            logger.error(f"Failed to close revoked connection {self.device_id}: {e}")
+
+    async def release_connection(self, reason):
+        """
+        Deregister this connection (safe to call more than once)
+        A reaped socket may still deliver its disconnect much later
+        """
+        if presence.remove(self) is None:
+            return
+        if self.token_id:
+            revocation_list.unwatch(self.token_id, self)
+        await self.close_webrtc()
+        if self.telemetry_coalescer:
+            self.telemetry_coalescer.close()
+        self.outbox.close()
+        if self.recorder:
+            self.recorder.record(EVENT_DISCONNECT, self.connection_id, reason)
+            # A finished connection is on disk, whenever the process stops
+            await sync_to_async(self.recorder.flush, thread_sensitive=False)()
+        
+        if self.device_type == 'robot' and connected_devices['robots'].get(self.device_id) is self:
             del connected_devices['robots'][self.device_id]
-            print(f"🔌 Robot disconnected: {self.device_id}")
-            logger.info(f"Robot disconnected: {self.device_id}")
+            fleet.offline(self.device_id)
+            forget_battery(self.device_id)
+            print(f"🔌 Robot disconnected: {self.device_id} ({reason})")
+            logger.info(f"Robot disconnected: {self.device_id} ({reason})")
+            for website in list(connected_devices['websites'].values()):
+                if website.telemetry_coalescer:
+                    website.telemetry_coalescer.forget(self.device_id)
             
-            # Notify all websites that this robot disconnected
-            await self.broadcast_to_websites({
-                "status": "disconnected",
-                "device_type": "robot",
-                "device_id": self.device_id,
-                "message": f"Robot {self.device_id} has disconnected"
-            })
+            # Notify all websites that this robot went offline
+            await self.broadcast_presence_delta("offline", reason)
             
-        elif self.device_type == 'website' and self.device_id in connected_devices['websites']:
-            del connected_devices['websites'][self.device_id]
-            print(f"🔌 Website disconnected")
-            logger.info("Website disconnected")
+        elif self.device_type == 'website' and self.connection_id in connected_devices['websites']:
+            del connected_devices['websites'][self.connection_id]
+            subscriptions.remove(self)
+            print(f"🔌 Website disconnected: {self.device_id} ({reason})")
+            logger.info(f"Website disconnected: {self.device_id} ({reason})")
+
+    async def broadcast_presence_delta(self, state, reason=None):
+        """Send an incremental presence change for this robot to all websites"""
+        entry = presence.entries.get(self.connection_id)
+        await self.broadcast_to_websites({
+            "type": "presence_delta",
+            "device_id": self.device_id,
+            "device_type": self.device_type,
+            "state": state,
+            "reason": reason,
+            "rtt_ms": entry.rtt_ms if entry else None,
+            "timestamp": timezone.now().isoformat()
+        })
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Handle incoming WebSocket messages
         Route based on message type and sender
         """
+        # Arrival time, before any work (t4 of clock sync samples, frame server_ts)
+        self.received_at = time.time()
+        if self.recorder:
+            self.recorder.record(EVENT_RECEIVE, self.connection_id,
+                                 bytes_data if bytes_data is not None else text_data)
         try:
+            # Any traffic proves the connection is alive
+            presence.touch(self)
+            
+            # Binary frames are sensor stream batches
+            if bytes_data is not None:
+                await self.handle_sensor_frame(bytes_data)
+                return
+            
+            data = json.loads(text_data)
+            msg_type = data.get("type")
+            
+            # ========== EMERGENCY STOP FAST PATH (before any other work) ==========
+            if msg_type in ("estop", "estop_ack"):
+                await self.handle_estop(data, msg_type)
+                return
+            
+            # ========== CLOCK SYNC, TIMING-SENSITIVE SO ALSO BEFORE LOGGING ==========
+            if msg_type == "pong":
+                # Heartbeat reply from either side, robots add clock sync times
+                presence.record_pong(self, data.get("seq"))
+                if data.get("t2") is not None:
+                    self.clock.add(data.get("t1"), data.get("t2"), data.get("t3"), self.received_at)
+                return
+            
+            if msg_type == "clock_sync":
+                # Dashboards estimate their own offset to the server clock
+                await self.send(json.dumps({
+                    "type": "clock_sync",
+                    "t1": data.get("t1"),
+                    "t2": self.received_at * 1000.0,
+                    "t3": time.time() * 1000.0
+                }))
+                return
+            
             print(f"\n🔹🔹🔹 ===== WEBSOCKET MESSAGE RECEIVED =====")
             print(f"   Device Type: {self.device_type}")
             print(f"   Device ID: {self.device_id}")
             print(f"   Raw Data: {text_data}")
             print(f"   Data Length: {len(text_data)} bytes")
             
-            data = json.loads(text_data)
-            msg_type = data.get("type")
-            
             print(f"   Parsed JSON: {data}")
             print(f"   Message Type: {msg_type}")
             print(f"   Data Keys: {list(data.keys())}")
             
             logger.info(f"[{self.device_type}] Received message: type={msg_type}, data={data}")
             
+            # ========== WEBRTC SIGNALING, EITHER DIRECTION ==========
+            if msg_type in WEBRTC_SIGNALS:
+                await self.handle_webrtc(data, msg_type)
+                return
+            
             # ========== WEBSITE SENDS CONTROL COMMANDS ==========
             if self.device_type == 'website':
                 print(f"   ➡️  Routing to: handle_website_command()")
@@ -152,6 +366,143 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
             logger.exception("Error processing message")
             await self.send(json.dumps({"error": str(e)}))
 
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        """Send to this client, recording what robots are told"""
+        if self.recorder and self.device_type == 'robot' and not close:
+            self.recorder.record(EVENT_SEND, self.connection_id,
+                                 bytes_data if bytes_data is not None else text_data)
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+    async def handle_webrtc(self, data, msg_type):
+        """
+        Route WebRTC signaling between a dashboard and a robot, or to the
+        server relay (see webrtc.py). Offers and answers are not inspected.
+        """
+        if self.device_type == 'website':
+            device_id = data.get("device_id")
+            robot = connected_devices['robots'].get(device_id)
+            print(f"📡 WebRTC {msg_type} from dashboard → {device_id}")
+            
+            if msg_type == "webrtc_request" and robot is None:
+                await self.send(json.dumps({"type": "webrtc_hangup", "device_id": device_id,
+                                            "reason": "no_robot"}))
+                return
+            
+            if relay_enabled():
+                if msg_type == "webrtc_request":
+                    # Waits for the robot's track, so off the receive path
+                    task = asyncio.create_task(webrtc_relay.subscribe(self, robot))
+                    self.webrtc_tasks.add(task)
+                    task.add_done_callback(self.webrtc_tasks.discard)
+                elif msg_type == "webrtc_answer":
+                    await webrtc_relay.viewer_answer(self, device_id, data.get("sdp"))
+                elif msg_type == "webrtc_ice":
+                    await webrtc_relay.add_ice(self, device_id, data.get("candidate"))
+                elif msg_type == "webrtc_hangup":
+                    await webrtc_relay.drop_viewer(self.connection_id, device_id)
+                return
+            
+            if robot is None:
+                return
+            if msg_type == "webrtc_request":
+                self.webrtc_peers.add(device_id)
+            elif msg_type == "webrtc_hangup":
+                self.webrtc_peers.discard(device_id)
+            message = {key: value for key, value in data.items() if key != "device_id"}
+            message["peer_id"] = self.connection_id
+            await robot.outbox.put(LANE_CONTROL, json.dumps(message))
+        
+        elif self.device_type == 'robot':
+            peer_id = data.get("peer_id")
+            print(f"📡 WebRTC {msg_type} from {self.device_id} → {peer_id}")
+            
+            if peer_id == RELAY_PEER:
+                if msg_type == "webrtc_offer" and relay_enabled():
+                    await webrtc_relay.robot_offer(self, data.get("sdp"))
+                elif msg_type == "webrtc_hangup":
+                    await webrtc_relay.drop_robot(self.device_id)
+                return
+            
+            viewer = connected_devices['websites'].get(peer_id)
+            if viewer is None:
+                return
+            if msg_type == "webrtc_hangup":
+                viewer.webrtc_peers.discard(self.device_id)
+            message = {key: value for key, value in data.items() if key != "peer_id"}
+            message["device_id"] = self.device_id
+            await viewer.outbox.put(LANE_CONTROL, json.dumps(message))
+
+    async def close_webrtc(self):
+        """End this connection's WebRTC sessions"""
+        for task in list(self.webrtc_tasks):
+            task.cancel()
+        if self.device_type == 'robot':
+            await webrtc_relay.drop_robot(self.device_id)
+            return
+        await webrtc_relay.drop_viewer(self.connection_id)
+        for device_id in self.webrtc_peers:
+            robot = connected_devices['robots'].get(device_id)
+            if robot:
+                await robot.outbox.put(LANE_CONTROL, json.dumps({
+                    "type": "webrtc_hangup", "peer_id": self.connection_id, "reason": "viewer_left"
+                }))
+        self.webrtc_peers.clear()
+
+    def robot_time_to_server(self, robot_ms):
+        """A robot epoch-ms timestamp on the server clock (None until the clock is synced)"""
+        if robot_ms is None or not self.clock.synced:
+            return None
+        return round(self.clock.to_server_time(robot_ms / 1000.0) * 1000.0, 1)
+
+    async def handle_estop(self, data, msg_type):
+        """
+        Emergency stop from a website (sent to the target robot, or every
+        robot, with retransmission) or a robot's estop_ack
+        """
+        if msg_type == "estop_ack":
+            if self.device_type == 'robot':
+                estops.acknowledge(data.get("seq"), self.device_id)
+            return
+        
+        if self.device_type != 'website':
+            return
+        
+        target = data.get("device_id")
+        if target and target not in connected_devices['robots']:
+            # Nothing to retransmit to; the dashboard must know right away
+            print(f"🛑 E-STOP from dashboard → {target} is not connected")
+            logger.warning(f"E-stop for {target}, which is not connected")
+            await self.send(json.dumps({
+                "type": "estop_status",
+                "device_id": target,
+                "devices": [],
+                "seqs": [],
+                "status": "no_robot",
+                "client_ts": data.get("client_ts"),
+                "timestamp": timezone.now().isoformat()
+            }))
+            return
+        
+        device_ids = [target] if target else list(connected_devices['robots'])
+        deliveries = [
+            await estops.dispatch(device_id, data.get("client_ts"),
+                                  connected_devices['robots'].get, self.broadcast_to_websites)
+            for device_id in device_ids
+        ]
+        
+        print(f"🛑🛑🛑 E-STOP from dashboard → {', '.join(device_ids) or 'no robots connected'}")
+        logger.warning(f"E-stop sent to {device_ids}")
+        
+        await self.broadcast_to_websites({
+            "type": "estop_status",
+            "device_id": target,
+            "devices": device_ids,
+            "seqs": [delivery.seq for delivery in deliveries],
+            "status": "sent" if deliveries else "no_robot",
+            "client_ts": data.get("client_ts"),
+            "timestamp": timezone.now().isoformat()
+        })
+
     async def handle_website_command(self, data, msg_type):
         """
         Handle commands from website/dashboard
@@ -187,6 +538,7 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "type": "robot_move",
                 "x": x,
                 "y": y,
+                "client_ts": data.get("client_ts"),
                 "timestamp": timezone.now().isoformat()
             })
             print(f"   ✅ Robot move command forwarded")
@@ -211,6 +563,7 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "type": "camera_move",
                 "x": x,
                 "y": y,
+                "client_ts": data.get("client_ts"),
                 "timestamp": timezone.now().isoformat()
             })
             print(f"   ✅ Camera move command forwarded")
@@ -270,6 +623,104 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
             print(f"   Broadcasting to robots: {cmd_msg}")
             await self.broadcast_to_robots(cmd_msg)
             print(f"   ✅ Brightness command forwarded to robots")
+        
+        # ===== RELEASE A LATCHED EMERGENCY STOP =====
+        elif msg_type == "estop_release":
+            target = data.get("device_id")
+            print(f"\n🟢 ESTOP_RELEASE FROM WEBSITE → {target or 'all robots'}")
+            logger.info(f"E-stop release for {target or 'all robots'}")
+            
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": "estop_release",
+                "status": "received",
+                "message": f"E-stop release sent to {target or 'all robots'}"
+            }))
+            
+            release_msg = {
+                "type": "estop_release",
+                "timestamp": timezone.now().isoformat()
+            }
+            if target:
+                robot = connected_devices['robots'].get(target)
+                if robot:
+                    await robot.outbox.put(LANE_CONTROL, json.dumps(release_msg))
+            else:
+                await self.broadcast_to_robots(release_msg)
+        
+        # ===== STREAM SUBSCRIPTIONS (which robots this dashboard watches) =====
+        elif msg_type in ("subscribe", "unsubscribe", "sensor_subscribe", "sensor_unsubscribe"):
+            device_id = data.get("device_id") or WILDCARD
+            # sensor_(un)subscribe is the older spelling for the sensors stream
+            streams = [STREAM_SENSORS] if msg_type.startswith("sensor_") else data.get("streams")
+            try:
+                if msg_type.endswith("unsubscribe"):
+                    subscriptions.unsubscribe(self, device_id, streams)
+                else:
+                    subscriptions.subscribe(self, device_id, streams)
+            except InvalidSubscription as e:
+                await self.send(json.dumps({"error": str(e)}))
+                return
+            
+            current = subscriptions.of(self)
+            print(f"👀 Subscriptions of {self.device_id}: {current}")
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": msg_type,
+                "status": "received",
+                "device_id": device_id,
+                "subscriptions": current,
+                "message": "Watching " + (", ".join(f"{robot}: {'/'.join(names)}" for robot, names in current.items()) or "nothing")
+            }))
+            
+            # New fleet subscribers start from the current summary, not the next tick
+            if msg_type == "subscribe" and STREAM_FLEET in (streams or ()):
+                fleet.summary()
+                await self.outbox.put(LANE_TELEMETRY, fleet.cached_json)
+        
+        # ===== VIDEO AS BINARY FRAMES OR BASE64 JSON =====
+        elif msg_type == "video_format":
+            video_format = data.get("format", "json")
+            if video_format not in ("json", "binary"):
+                await self.send(json.dumps({"error": f"Unknown video format: {video_format}"}))
+                return
+            self.video_binary = video_format == "binary"
+            print(f"🎥 Video for {self.device_id}: {video_format}")
+            
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": "video_format",
+                "status": "received",
+                "format": video_format,
+                "message": f"Video frames sent as {video_format}"
+            }))
+        
+        # ===== TELEMETRY DELIVERY RATE (0 = every sample) =====
+        elif msg_type == "telemetry_rate":
+            try:
+                interval = float(data.get("interval", 0))
+            except (TypeError, ValueError):
+                await self.send(json.dumps({"error": "telemetry_rate interval must be a number of seconds"}))
+                return
+            
+            if self.telemetry_coalescer:
+                # Whatever is pending still goes out before the change
+                self.telemetry_coalescer.close()
+                await self.telemetry_coalescer.flush()
+                self.telemetry_coalescer = None
+            if interval > 0:
+                shortest, longest = interval_limits()
+                interval = min(max(interval, shortest), longest)
+                self.telemetry_coalescer = TelemetryCoalescer(self.outbox, interval)
+            print(f"⏱️  Telemetry for {self.device_id}: {f'every {interval:g}s' if interval > 0 else 'every sample'}")
+            
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": "telemetry_rate",
+                "status": "received",
+                "interval": max(interval, 0.0),
+                "message": f"Telemetry batched every {interval:g}s" if interval > 0 else "Telemetry sent as it arrives"
+            }))
 
     async def handle_robot_telemetry(self, data, msg_type):
         """
@@ -298,6 +749,11 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 timestamp=timezone.now()
             )
             
+            # Update the in-memory discharge model and fleet summary for this robot
+            # (on the sample's own clock, like batched and replayed telemetry)
+            battery_estimate = record_battery(self.device_id, battery, sample_time(data).timestamp())
+            fleet.update(self.device_id, battery=battery, cpu=cpu, temperature=temperature, signal=signal)
+            
             # Send acknowledgment to robot
             await self.send(json.dumps({
                 "type": "ack",
@@ -306,7 +762,7 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "message": "Telemetry data received and saved"
             }))
             
-            # Broadcast telemetry to all connected websites
+            # Broadcast telemetry to the websites watching this robot
             await self.broadcast_to_websites({
                 "type": "telemetry_update",
                 "device_id": self.device_id,
@@ -315,8 +771,42 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "cpu": cpu,
                 "temperature": temperature,
                 "signal": signal,
+                "battery_estimate": battery_estimate,
+                "client_ts": data.get("client_ts"),
                 "timestamp": timezone.now().isoformat()
-            })
+            }, stream=STREAM_TELEMETRY)
+        
+        # ===== COLUMNAR BATCH OF TELEMETRY SAMPLES =====
+        elif msg_type == "telemetry_batch":
+            try:
+                samples = expand_telemetry(data)
+            except ValueError as e:
+                await self.send(json.dumps({"error": f"Invalid telemetry batch: {e}"}))
+                return
+            battery_estimate = await self.store_telemetry(samples)
+            print(f"📡 TELEMETRY BATCH from {self.device_id}: {len(samples)} sample(s)")
+            
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": "telemetry_batch",
+                "status": "received",
+                "message": f"Stored {len(samples)} telemetry sample(s)"
+            }))
+            
+            # Dashboards show the newest sample of the batch
+            if samples:
+                latest, _, client_ts = samples[-1]
+                fleet.update(self.device_id, **latest)
+                await self.broadcast_to_websites({
+                    "type": "telemetry_update",
+                    "device_id": self.device_id,
+                    "device_name": data.get("device_name", self.device_id),
+                    **latest,
+                    "battery_estimate": battery_estimate,
+                    "samples": len(samples),
+                    "client_ts": client_ts,
+                    "timestamp": timezone.now().isoformat()
+                }, stream=STREAM_TELEMETRY)
         
         # ===== VIDEO FRAME FROM ROBOT =====
         elif msg_type == "video_frame":
@@ -326,7 +816,6 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
             
             if frame_data:
                 print(f"   Frame size: {len(frame_data)} bytes")
-                print(f"   Broadcasting to {len(connected_devices['websites'])} website(s)...")
                 
                 # Send acknowledgment to robot
                 await self.send(json.dumps({
@@ -336,17 +825,27 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                     "message": "Video frame received"
                 }))
                 
-                # Broadcast video frame to all connected websites
-                await self.broadcast_to_websites({
+                # Broadcast video frame to the websites watching this robot, with
+                # the robot's capture/send times also on the server clock (epoch ms)
+                await self.broadcast_video_frame({
                     "type": "video_frame",
                     "device_id": self.device_id,
                     "frame_data": frame_data,
+                    "frame_number": data.get("frame_number"),
+                    "client_ts": data.get("client_ts"),
+                    "capture_ts": self.robot_time_to_server(data.get("client_ts")),
+                    "sent_ts": self.robot_time_to_server(data.get("sent_ts")),
+                    "server_ts": round(self.received_at * 1000.0, 1),
                     "timestamp": timestamp
                 })
                 print(f"   ✅ Video frame broadcasted to websites")
             else:
                 print(f"   ❌ No frame data in message")
         
+        # ===== TELEMETRY/EVENTS BUFFERED WHILE THE ROBOT WAS OFFLINE =====
+        elif msg_type == "offline_batch":
+            await self.ingest_offline_batch(data)
+        
         # ===== ROBOT STATUS UPDATES =====
         elif msg_type == "status":
             status = data.get("status")
@@ -362,7 +861,135 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
                 "status": status,
                 "message": message,
                 "timestamp": timezone.now().isoformat()
-            })
+            }, stream=STREAM_STATUS)
+
+    async def ingest_offline_batch(self, data):
+        """
+        Store a replayed offline batch: all telemetry samples in one bulk
+        insert with their original timestamps, status events logged and
+        forwarded to websites marked as replayed
+        """
+        try:
+            messages = decode_offline_batch(data)
+        except (ValueError, zlib.error) as e:
+            # Without a batch_id in the reply the robot would resend it forever
+            logger.warning(f"Rejected offline batch {data.get('batch_id')} from {self.device_id}: {e}")
+            await self.send(json.dumps({
+                "type": "ack",
+                "original_type": "offline_batch",
+                "batch_id": data.get("batch_id"),
+                "status": "rejected",
+                "message": str(e)
+            }))
+            return
+        print(f"📦 OFFLINE BATCH from {self.device_id}: {len(messages)} message(s)")
+        
+        samples = []
+        events = []
+        for message in messages:
+            kind = message.get("type")
+            if kind in ("telemetry", "telemetry_batch"):
+                try:
+                    samples.extend(expand_telemetry(message))
+                except ValueError as e:
+                    # Rejecting the whole batch would keep it on the robot's disk forever
+                    logger.warning(f"Skipping buffered {kind} from {self.device_id}: {e}")
+            elif kind == "status":
+                events.append(message)
+        
+        await self.store_telemetry(samples)
+        logger.info(f"📦 Offline batch from {self.device_id}: {len(samples)} telemetry rows, {len(events)} events")
+        
+        # The robot only drops the batch from its disk queue once this arrives
+        await self.send(json.dumps({
+            "type": "ack",
+            "original_type": "offline_batch",
+            "batch_id": data.get("batch_id"),
+            "status": "received",
+            "message": f"Stored {len(samples)} buffered telemetry sample(s)"
+        }))
+        
+        for event in events:
+            await self.broadcast_to_websites({
+                "type": "robot_status",
+                "device_id": self.device_id,
+                "status": event.get("status"),
+                "message": event.get("message", ""),
+                "replayed": True,
+                "timestamp": sample_time(event).isoformat()
+            }, stream=STREAM_STATUS)
+
+    async def handle_sensor_frame(self, payload):
+        """
+        Binary sensor batch from a robot: store it and relay the frame as-is
+        to subscribed dashboards. No ack, these arrive many times a second.
+        """
+        if self.device_type != 'robot':
+            await self.send(json.dumps({"error": "Only robots can send sensor streams"}))
+            return
+        
+        try:
+            batch = unpack_sensor_batch(payload)
+        except InvalidSensorFrame as e:
+            logger.warning(f"Bad sensor frame from {self.device_id}: {e}")
+            await self.send(json.dumps({"error": f"Invalid sensor frame: {e}"}))
+            return
+        
+        if batch.source != self.device_id:
+            await self.send(json.dumps({"error": f"Sensor frame source {batch.source} does not match {self.device_id}"}))
+            return
+        
+        logger.debug(f"Sensor frame from {self.device_id}: {batch.n} x {len(batch.channels)} @ {batch.rate:g} Hz")
+        
+        store = get_sensor_store()
+        if store:
+            await sync_to_async(store.append, thread_sensitive=False)(self.device_id, batch)
+        
+        for consumer in subscriptions.viewers(self.device_id, STREAM_SENSORS):
+            try:
+                await consumer.outbox.put(LANE_TELEMETRY, bytes_data=payload)
+            except Exception as e:
+                logger.error(f"Failed to relay sensor frame: {e}")
+
+    async def store_telemetry(self, samples):
+        """
+        Save [(values, sampled_at, client_ts)] with a single bulk insert and feed the
+        battery model; returns the latest battery estimate
+        """
+        from .models import TelemetryData
+        rows = [TelemetryData(timestamp=sampled_at, **values) for values, sampled_at, _ in samples]
+        if rows:
+            await sync_to_async(TelemetryData.objects.bulk_create)(rows)
+        
+        battery_estimate = None
+        for values, sampled_at, _ in samples:
+            battery_estimate = record_battery(self.device_id, values["battery"], sampled_at.timestamp())
+        return battery_estimate
+
+    async def broadcast_video_frame(self, message):
+        """
+        Send a video frame to the websites watching this robot: as JSON, or
+        decoded and packed once as a binary frame for those that asked
+        """
+        viewers = subscriptions.viewers(self.device_id, STREAM_VIDEO)
+        print(f"📤 Broadcasting video to {len(viewers)} website(s)")
+        
+        text_data = payload = None
+        for consumer in viewers:
+            try:
+                if consumer.video_binary:
+                    if payload is None:
+                        payload = pack_video_frame(
+                            self.device_id, base64.b64decode(message["frame_data"]), message.get("frame_number"),
+                            message.get("capture_ts"), message.get("sent_ts"), message.get("server_ts"))
+                    await consumer.outbox.put(LANE_VIDEO, bytes_data=payload, key=self.device_id)
+                else:
+                    if text_data is None:
+                        text_data = json.dumps(message)
+                    await consumer.outbox.put(LANE_VIDEO, text_data, key=self.device_id)
+            except Exception as e:
+                print(f"❌ Failed to send video frame to website: {e}")
+                logger.error(f"Failed to send video frame to website: {e}")
 
     async def broadcast_to_robots(self, message):
         """
@@ -379,23 +1006,48 @@ class TelemetryConsumer(AsyncWebsocketConsumer):
             print(f"   ⚠️  WARNING: No robots connected!")
             return
         
-        for device_id, consumer in connected_devices['robots'].items():
+        # Serialize once for every robot; commands use the control lane
+        text_data = json.dumps(message)
+        for device_id, consumer in list(connected_devices['robots'].items()):
             try:
-                await consumer.send(json.dumps(message))
+                await consumer.outbox.put(LANE_CONTROL, text_data)
                 print(f"   ✅ Sent to {device_id}")
             except Exception as e:
                 print(f"   ❌ Failed to send to robot {device_id}: {e}")
                 logger.error(f"Failed to send to robot {device_id}: {e}")
 
-    async def broadcast_to_websites(self, message):
+    async def broadcast_to_websites(self, message, stream=None):
         """
-        Broadcast message to all connected websites
+        Broadcast message to all connected websites, or with a stream only
+        to those subscribed to that stream of message's robot
         """
-        print(f"📤 Broadcasting to {len(connected_devices['websites'])} website(s): {message.get('type')}")
+        if stream is None:
+            consumers = list(connected_devices['websites'].values())
+        else:
+            consumers = subscriptions.viewers(message.get('device_id'), stream)
+        print(f"📤 Broadcasting to {len(consumers)} website(s): {message.get('type')}")
+        if not consumers:
+            return
+        
+        # Serialize once; each website's outbox orders it by lane and
+        # replaces a still-queued frame from the same robot
+        if message.get('type') == 'telemetry_update':
+            # Dashboards with a delivery interval get it in their next batch
+            immediate = []
+            for consumer in consumers:
+                if consumer.telemetry_coalescer:
+                    consumer.telemetry_coalescer.add(message)
+                else:
+                    immediate.append(consumer)
+            consumers = immediate
+            if not consumers:
+                return
         
-        for device_id, consumer in connected_devices['websites'].items():
+        text_data = json.dumps(message)
+        lane = lane_for(message.get('type'))
+        for consumer in consumers:
             try:
-                await consumer.send(json.dumps(message))
+                await consumer.outbox.put(lane, text_data, key=message.get('device_id'))
             except Exception as e:
                 print(f"❌ Failed to send to website: {e}")
                 logger.error(f"Failed to send to website: {e}")
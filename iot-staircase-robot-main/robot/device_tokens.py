@@ -0,0 +1,167 @@
+"""
+Signed device tokens for robot connections
+Tokens are HMAC-signed with SECRET_KEY (django.core.signing) and carry the
+device_id, a token id and an expiry, so verifying one is pure CPU work.
+Revoked token ids live in the RevokedDeviceToken table and are cached in
+memory; the cache is refreshed in the background at most once per
+ROBOT_TOKEN_REVOCATION_REFRESH seconds, so connects never wait on the DB
+once it has been loaded. While robots are connected with a token, the
+cache is also reloaded on that interval and robots whose token has been
+revoked since (in any process, e.g. by `manage.py device_token revoke`)
+are disconnected.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core import signing
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'robot.device-token'
+
+
+class InvalidDeviceToken(Exception):
+    """Raised when a device token is malformed, tampered with, expired or revoked"""
+
+
+def issue_device_token(device_id, ttl=None):
+    """
+    Create a signed token for a robot
+    Returns (token, token_id, expires_at) with expires_at as epoch seconds
+    """
+    if ttl is None:
+        ttl = getattr(settings, 'ROBOT_DEVICE_TOKEN_TTL', 30 * 24 * 3600)
+    token_id = uuid.uuid4().hex
+    expires_at = int(time.time() + ttl)
+    token = signing.dumps({"d": device_id, "j": token_id, "e": expires_at}, salt=TOKEN_SALT)
+    return token, token_id, expires_at
+
+
+def decode_device_token(token):
+    """Check signature and expiry, return the token payload"""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidDeviceToken("bad signature")
+    if not isinstance(payload, dict) or not payload.get("d") or not payload.get("j"):
+        raise InvalidDeviceToken("malformed token")
+    if payload.get("e", 0) < time.time():
+        raise InvalidDeviceToken("token expired")
+    return payload
+
+
+class RevocationList:
+    """In-memory cache of revoked token ids"""
+
+    def __init__(self):
+        self.revoked = set()
+        self.loaded_at = None
+        self._refresh_task = None
+        self.watched = {}       # {token_id: {connected consumer}}
+        self._watch_task = None
+
+    def refresh_interval(self):
+        return float(getattr(settings, 'ROBOT_TOKEN_REVOCATION_REFRESH', 30.0))
+
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval()
+
+    def load(self):
+        """Reload the revoked ids from the database (sync)"""
+        from .models import RevokedDeviceToken
+        now = datetime.now(dt_timezone.utc)
+        self.revoked = set(
+            RevokedDeviceToken.objects.filter(expires_at__gt=now).values_list('token_id', flat=True)
+        )
+        self.loaded_at = time.monotonic()
+
+    async def ensure_loaded(self):
+        """
+        Make the cache usable without blocking connects on the DB
+        Only the very first load is awaited, and concurrent callers share that
+        one query. Later refreshes run in the background while the current
+        set stays in use.
+        """
+        if not self.is_stale():
+            return
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._refresh_task = loop.create_task(database_sync_to_async(self.load)())
+            if self.loaded_at is not None:
+                task.add_done_callback(self._log_refresh_error)
+        if self.loaded_at is None:
+            await task
+
+    @staticmethod
+    def _log_refresh_error(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to refresh device token revocation list: {task.exception()}")
+
+    def add(self, token_id):
+        self.revoked.add(token_id)
+
+    def watch(self, token_id, consumer):
+        """Disconnect consumer (via consumer.revoke()) once token_id is revoked"""
+        self.watched.setdefault(token_id, set()).add(consumer)
+        loop = asyncio.get_running_loop()
+        task = self._watch_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._watch_task = loop.create_task(self._watch_loop())
+
+    def unwatch(self, token_id, consumer):
+        consumers = self.watched.get(token_id)
+        if consumers is not None:
+            consumers.discard(consumer)
+            if not consumers:
+                del self.watched[token_id]
+
+    async def _watch_loop(self):
+        while self.watched and self._watch_task is asyncio.current_task():
+            await asyncio.sleep(self.refresh_interval())
+            try:
+                await database_sync_to_async(self.load)()
+            except Exception as e:
+                logger.error(f"Failed to refresh device token revocation list: {e}")
+                continue
+            await self.close_revoked()
+
+    async def close_revoked(self):
+        """Disconnect the watched connections whose token is now revoked"""
+        for token_id in list(self.watched.keys() & self.revoked):
+            for consumer in self.watched.pop(token_id, ()):
+                logger.warning(f"Device token {token_id} revoked, disconnecting {consumer.device_id}")
+                await consumer.revoke()
+
+
+# Global revocation cache for this server process
+revocation_list = RevocationList()
+
+
+def check_device_token(token):
+    """
+    Verify a token against the cached revocation list, return its payload
+    Does not touch the database.
+    """
+    payload = decode_device_token(token)
+    if payload["j"] in revocation_list.revoked:
+        raise InvalidDeviceToken("token revoked")
+    return payload
+
+
+def verify_device_token(token):
+    """Verify a token, return its device_id"""
+    return check_device_token(token)["d"]
+
+
+async def averify_device_token(token):
+    """Async check that loads the revocation cache first if needed, returns the payload"""
+    await revocation_list.ensure_loaded()
+    return check_device_token(token)
@@ -0,0 +1,135 @@
+"""
+Emergency stop delivery
+An estop skips the normal command path. Each target robot gets the stop
+with a sequence number, retransmitted every ROBOT_ESTOP_RETRY_INTERVAL
+seconds until the robot sends estop_ack or ROBOT_ESTOP_TIMEOUT passes. The
+time from receiving the estop to the robot's ack is measured against
+ROBOT_ESTOP_LATENCY_BUDGET_MS and reported back to the dashboards.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def retry_interval():
+    return float(getattr(settings, 'ROBOT_ESTOP_RETRY_INTERVAL', 0.1))
+
+
+def delivery_timeout():
+    return float(getattr(settings, 'ROBOT_ESTOP_TIMEOUT', 3.0))
+
+
+def latency_budget_ms():
+    return float(getattr(settings, 'ROBOT_ESTOP_LATENCY_BUDGET_MS', 100.0))
+
+
+class EStopDelivery:
+    """One estop on its way to one robot"""
+
+    def __init__(self, seq, device_id, client_ts):
+        self.seq = seq
+        self.device_id = device_id
+        self.client_ts = client_ts
+        self.started_at = time.monotonic()
+        self.attempts = 0
+        self.latency_ms = None
+        self.acked = asyncio.Event()
+        self.task = None
+
+    def status(self, state):
+        budget = latency_budget_ms()
+        return {
+            "type": "estop_status",
+            "device_id": self.device_id,
+            "seq": self.seq,
+            "status": state,
+            "attempts": self.attempts,
+            "latency_ms": self.latency_ms,
+            "budget_ms": budget,
+            "within_budget": self.latency_ms is not None and self.latency_ms <= budget,
+            "client_ts": self.client_ts,
+            "timestamp": timezone.now().isoformat()
+        }
+
+
+class EStopTracker:
+    """Sequenced, retransmitted estop deliveries awaiting their acks"""
+
+    def __init__(self):
+        self.pending = {}
+        self._seq = itertools.count(1)
+
+    async def dispatch(self, device_id, client_ts, lookup, report):
+        """
+        Send an estop to device_id now and keep retransmitting in the background.
+        lookup(device_id) returns the robot's current consumer (it may
+        reconnect meanwhile); report(message) publishes estop_status updates.
+        """
+        delivery = EStopDelivery(next(self._seq), device_id, client_ts)
+        self.pending[delivery.seq] = delivery
+        await self._send(delivery, lookup)
+        delivery.task = asyncio.create_task(self._retransmit(delivery, lookup, report))
+        return delivery
+
+    async def _send(self, delivery, lookup):
+        robot = lookup(delivery.device_id)
+        if robot is None:
+            return
+        delivery.attempts += 1
+        try:
+            # Straight to the socket, ahead of anything in the robot's outbox
+            await robot.send(json.dumps({
+                "type": "estop",
+                "seq": delivery.seq,
+                "attempt": delivery.attempts,
+                "issued_at": time.time()
+            }))
+        except Exception as e:
+            logger.error(f"E-stop {delivery.seq} to {delivery.device_id} failed to send: {e}")
+
+    async def _retransmit(self, delivery, lookup, report):
+        try:
+            deadline = delivery.started_at + delivery_timeout()
+            while not delivery.acked.is_set():
+                wait = min(retry_interval(), deadline - time.monotonic())
+                if wait <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(delivery.acked.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    if time.monotonic() < deadline:
+                        await self._send(delivery, lookup)
+
+            if delivery.acked.is_set():
+                if delivery.latency_ms > latency_budget_ms():
+                    logger.warning(
+                        f"E-stop {delivery.seq} to {delivery.device_id} took {delivery.latency_ms} ms "
+                        f"(budget {latency_budget_ms()} ms, {delivery.attempts} attempts)"
+                    )
+                await report(delivery.status("acknowledged"))
+            else:
+                logger.error(f"E-stop {delivery.seq} to {delivery.device_id} not acknowledged after {delivery.attempts} attempts")
+                await report(delivery.status("failed"))
+        finally:
+            self.pending.pop(delivery.seq, None)
+
+    def acknowledge(self, seq, device_id):
+        """Record a robot's estop_ack; duplicates and strangers' acks are ignored"""
+        delivery = self.pending.get(seq)
+        if delivery is None or delivery.device_id != device_id or delivery.acked.is_set():
+            return None
+        delivery.latency_ms = round((time.monotonic() - delivery.started_at) * 1000.0, 2)
+        delivery.acked.set()
+        return delivery
+
+
+estops = EStopTracker()
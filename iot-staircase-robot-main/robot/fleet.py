@@ -0,0 +1,192 @@
+"""
+Fleet Summary
+Running fleet-wide figures kept next to the telemetry stream, so no browser
+has to rebuild them from individual robot messages:
+
+    robots online, min battery, max temperature, means, alert counts,
+    and battery/temperature histograms
+
+Every sample moves one robot between fixed histogram buckets and adjusts a
+few counters and sums, O(1) whatever the fleet size. Exact minima/maxima are
+read from the lowest/highest non-empty bucket once per tick. The summary is
+built and serialized once per tick, then the same text goes to every
+dashboard subscribed to the "fleet" stream and is served by
+/api/fleet-summary/.
+"""
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .outbound import LANE_TELEMETRY
+from .subscriptions import STREAM_FLEET, WILDCARD, subscriptions
+
+
+logger = logging.getLogger(__name__)
+
+# Alert name → (field, predicate), counted per robot while the condition holds
+ALERT_RULES = {
+    "battery_low": ("battery", lambda value: value < 20.0),
+    "temperature_high": ("temperature", lambda value: value > 70.0),
+    "cpu_high": ("cpu", lambda value: value > 90.0),
+    "signal_low": ("signal", lambda value: value < 30.0),
+}
+
+
+def summary_interval():
+    return float(getattr(settings, 'ROBOT_FLEET_SUMMARY_INTERVAL', 1.0))
+
+
+class Distribution:
+    """Robots by value in fixed-width buckets, with running sum for the mean"""
+
+    def __init__(self, lower, width, count):
+        self.lower = lower
+        self.width = width
+        self.buckets = [{} for _ in range(count)]     # [{device_id: value}]
+        self.total = 0.0
+        self.n = 0
+
+    def bucket(self, value):
+        index = int((value - self.lower) // self.width)
+        return min(max(index, 0), len(self.buckets) - 1)
+
+    def add(self, device_id, value):
+        self.buckets[self.bucket(value)][device_id] = value
+        self.total += value
+        self.n += 1
+
+    def remove(self, device_id, value):
+        self.buckets[self.bucket(value)].pop(device_id, None)
+        self.total -= value
+        self.n -= 1
+
+    def extreme(self, highest=False):
+        """(device_id, value) of the lowest or highest value, None when empty"""
+        order = reversed(self.buckets) if highest else self.buckets
+        for bucket in order:
+            if bucket:
+                pick = max if highest else min
+                return pick(bucket.items(), key=lambda item: item[1])
+        return None
+
+    def as_dict(self, highest=False):
+        extreme = self.extreme(highest)
+        key = "max" if highest else "min"
+        return {
+            key: round(extreme[1], 2) if extreme else None,
+            f"{key}_device": extreme[0] if extreme else None,
+            "mean": round(self.total / self.n, 2) if self.n else None,
+            "lower": self.lower,
+            "bucket_width": self.width,
+            "histogram": [len(bucket) for bucket in self.buckets],
+        }
+
+
+class FleetAggregator:
+    """Fleet-wide summary over the online robots' latest telemetry"""
+
+    def __init__(self):
+        self.robots = {}        # {device_id: latest {field: value}}
+        self.battery = Distribution(0.0, 10.0, 10)
+        self.temperature = Distribution(20.0, 10.0, 7)
+        self.alerts = dict.fromkeys(ALERT_RULES, 0)
+        self.robots_alerting = 0
+        self.dirty = True
+        self.seq = 0
+        self.cached = None
+        self.cached_json = None
+        self._task = None
+
+    def online(self, device_id):
+        if device_id not in self.robots:
+            self.robots[device_id] = {}
+            self.changed()
+
+    def offline(self, device_id):
+        fields = self.robots.pop(device_id, None)
+        if fields is not None:
+            self._retract(device_id, fields)
+            self.changed()
+
+    def update(self, device_id, **fields):
+        """Latest telemetry of one robot, None values are ignored"""
+        previous = self.robots.setdefault(device_id, {})
+        current = {**previous, **{key: float(value) for key, value in fields.items() if value is not None}}
+        self._retract(device_id, previous)
+        self._apply(device_id, current)
+        self.robots[device_id] = current
+        self.changed()
+
+    def _apply(self, device_id, fields, sign=1):
+        for field, distribution in (("battery", self.battery), ("temperature", self.temperature)):
+            if field in fields:
+                if sign > 0:
+                    distribution.add(device_id, fields[field])
+                else:
+                    distribution.remove(device_id, fields[field])
+        any_alert = False
+        for name, (field, alerting) in ALERT_RULES.items():
+            if field in fields and alerting(fields[field]):
+                self.alerts[name] += sign
+                any_alert = True
+        if any_alert:
+            self.robots_alerting += sign
+
+    def _retract(self, device_id, fields):
+        self._apply(device_id, fields, sign=-1)
+
+    def changed(self):
+        self.dirty = True
+        self._ensure_task()
+
+    def summary(self):
+        """Rebuild the summary and its JSON, once per tick at most"""
+        if self.dirty or self.cached is None:
+            self.seq += 1
+            self.cached = {
+                "type": "fleet_summary",
+                "seq": self.seq,
+                "robots_online": len(self.robots),
+                "reporting": self.battery.n,
+                "battery": self.battery.as_dict(),
+                "temperature": self.temperature.as_dict(highest=True),
+                "alerts": dict(self.alerts),
+                "robots_alerting": self.robots_alerting,
+                "timestamp": timezone.now().isoformat(),
+            }
+            self.cached_json = json.dumps(self.cached)
+            self.dirty = False
+        return self.cached
+
+    def _ensure_task(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._tick_loop())
+
+    async def _tick_loop(self):
+        # Ticks while robots are online, the last tick sends the empty fleet
+        while self._task is asyncio.current_task():
+            await asyncio.sleep(summary_interval())
+            if self.dirty:
+                await self.publish()
+            elif not self.robots:
+                self._task = None
+
+    async def publish(self):
+        self.summary()
+        for consumer in subscriptions.viewers(WILDCARD, STREAM_FLEET):
+            try:
+                await consumer.outbox.put(LANE_TELEMETRY, self.cached_json)
+            except Exception as e:
+                logger.error(f"Failed to send fleet summary: {e}")
+
+
+# Global fleet aggregator for this server process
+fleet = FleetAggregator()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from robot.device_tokens import InvalidDeviceToken, decode_device_token, issue_device_token
+from robot.models import RevokedDeviceToken
+
+
+class Command(BaseCommand):
+    help = 'Issue or revoke signed robot device tokens'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        issue = subparsers.add_parser('issue', help='Issue a token for a robot')
+        issue.add_argument('device_id', type=str, help='Robot device id, e.g. robot_01')
+        issue.add_argument('--ttl', type=int, default=None, help='Lifetime in seconds')
+
+        revoke = subparsers.add_parser('revoke', help='Revoke a previously issued token')
+        revoke.add_argument('token', type=str, help='The token to revoke, or the token_id printed by issue')
+        revoke.add_argument('--device', type=str, default=None,
+                            help='Robot the token_id was issued to (required with a token_id)')
+        revoke.add_argument('--ttl', type=int, default=None,
+                            help='With a token_id: keep the revocation this many seconds, at least '
+                                 'the --ttl it was issued with (default ROBOT_DEVICE_TOKEN_TTL)')
+
+        subparsers.add_parser('list', help='List revoked tokens that have not expired yet')
+
+    def handle(self, *args, **options):
+        action = options['action']
+
+        if action == 'issue':
+            token, token_id, expires_at = issue_device_token(options['device_id'], options['ttl'])
+            expires = datetime.fromtimestamp(expires_at, dt_timezone.utc)
+            self.stdout.write(self.style.SUCCESS(
+                f'Issued token {token_id} for {options["device_id"]} (expires {expires.isoformat()})'
+            ))
+            self.stdout.write(token)
+
+        elif action == 'revoke':
+            payload = self.revocation_payload(options)
+            if payload is None:
+                return
+            RevokedDeviceToken.objects.get_or_create(
+                token_id=payload['j'],
+                defaults={
+                    'device_id': payload['d'],
+                    'expires_at': datetime.fromtimestamp(payload['e'], dt_timezone.utc),
+                },
+            )
+            # Expired revocations are no longer needed, the signature check rejects them
+            RevokedDeviceToken.objects.filter(expires_at__lte=datetime.now(dt_timezone.utc)).delete()
+            refresh = getattr(settings, 'ROBOT_TOKEN_REVOCATION_REFRESH', 30.0)
+            self.stdout.write(self.style.SUCCESS(
+                f'Revoked token {payload["j"]} for {payload["d"]}; robots connected with it '
+                f'are disconnected within {refresh:g}s'
+            ))
+
+        elif action == 'list':
+            for entry in RevokedDeviceToken.objects.filter(
+                expires_at__gt=datetime.now(dt_timezone.utc)
+            ).order_by('-revoked_at'):
+                self.stdout.write(str(entry))
+
+    def revocation_payload(self, options):
+        """The token payload to revoke, from a full token or a token_id and --device"""
+        value = options['token']
+        if ':' in value:
+            try:
+                return decode_device_token(value)
+            except InvalidDeviceToken as e:
+                self.stdout.write(self.style.ERROR(f'Cannot revoke token: {e}'))
+                return None
+
+        # A bare token_id: its expiry is unknown, so keep the revocation for a full lifetime
+        if not options['device']:
+            raise CommandError('Revoking by token_id needs --device <device_id>')
+        ttl = options['ttl']
+        if ttl is None:
+            ttl = getattr(settings, 'ROBOT_DEVICE_TOKEN_TTL', 30 * 24 * 3600)
+        expires_at = datetime.now(dt_timezone.utc) + timedelta(seconds=ttl)
+        return {'d': options['device'], 'j': value, 'e': expires_at.timestamp()}
@@ -0,0 +1,55 @@
+import asyncio
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from robot.recorder import EVENT_CONNECT, EVENT_DISCONNECT, EVENT_RECEIVE, EVENT_SEND, read_session, \
+    replay_to_consumer, replay_to_robot
+
+EVENT_NAMES = {EVENT_CONNECT: 'connect', EVENT_RECEIVE: 'receive', EVENT_SEND: 'send', EVENT_DISCONNECT: 'disconnect'}
+
+
+class Command(BaseCommand):
+    help = 'Replay a recorded session (ROBOT_RECORD_SESSIONS) into the consumer or a simulated robot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Session log (.rlog)')
+        parser.add_argument('--target', choices=['consumer', 'robot', 'summary'], default='consumer',
+                            help='consumer: re-run the clients against TelemetryConsumer (writes to the database); '
+                                 'robot: feed the commands one robot received into a SimulatedRobot; '
+                                 'summary: only list what the log contains')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Playback speed, 1 = real time, 0 = as fast as possible')
+        parser.add_argument('--device', type=str, default=None,
+                            help='Robot to replay with --target robot (default: first robot in the log)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            records = list(read_session(path))
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if options['target'] == 'summary':
+            counts = Counter(EVENT_NAMES.get(record.event, record.event) for record in records)
+            duration = records[-1].t - records[0].t if records else 0.0
+            self.stdout.write(f'{len(records)} records over {duration:.1f}s: {dict(counts)}')
+            return
+
+        if options['target'] == 'consumer':
+            stats = asyncio.run(replay_to_consumer(records, options['speed']))
+            self.stdout.write(self.style.SUCCESS(
+                f'Replayed {stats["messages"]} messages over {stats["connections"]} connections '
+                f'({stats["replies"]} replies)'
+            ))
+            return
+
+        from robot_client import SimulatedActuator, SimulatedRobot
+
+        actuator = SimulatedActuator()
+        robot = SimulatedRobot('ws://replay/', options['device'] or 'replay', use_camera=False,
+                               buffer_offline=False, sensor_hz=0, actuator=actuator)
+        handled = asyncio.run(replay_to_robot(records, robot, options['device'], options['speed']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {handled} commands into the simulated robot ({len(actuator.history)} actuator updates)'
+        ))
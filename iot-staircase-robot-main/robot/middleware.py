@@ -0,0 +1,36 @@
+"""
+WebSocket authentication middleware
+Robot connections (?token= or legacy ?device_id=) skip the session/user
+lookup entirely; a token is verified in memory and its device_id and token
+id are put on the scope. Browser connections still go through AuthMiddlewareStack.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+
+from .device_tokens import InvalidDeviceToken, averify_device_token
+
+
+class DeviceTokenAuthMiddleware:
+    def __init__(self, inner):
+        self.inner = inner
+        self.session_stack = AuthMiddlewareStack(inner)
+
+    async def __call__(self, scope, receive, send):
+        params = parse_qs(scope.get('query_string', b'').decode())
+
+        if 'token' in params:
+            scope = dict(scope)
+            try:
+                payload = await averify_device_token(params['token'][0])
+                scope['device_id'] = payload['d']
+                scope['device_token_id'] = payload['j']
+            except InvalidDeviceToken as e:
+                scope['device_auth_error'] = str(e)
+            return await self.inner(scope, receive, send)
+
+        if 'device_id' in params:
+            return await self.inner(scope, receive, send)
+
+        return await self.session_stack(scope, receive, send)
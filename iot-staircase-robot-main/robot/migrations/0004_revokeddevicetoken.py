@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robot', '0003_delete_remembertoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedDeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_id', models.CharField(max_length=64, unique=True)),
+                ('device_id', models.CharField(max_length=100)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
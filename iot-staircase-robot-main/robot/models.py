@@ -12,3 +12,13 @@ class TelemetryData(models.Model):
 
     def __str__(self):
         return f"{self.timestamp} | Battery: {self.battery}% | CPU: {self.cpu}%"
+
+
+class RevokedDeviceToken(models.Model):
+    token_id = models.CharField(max_length=64, unique=True)
+    device_id = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.device_id} | {self.token_id} revoked {self.revoked_at}"
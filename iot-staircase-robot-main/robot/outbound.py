@@ -0,0 +1,91 @@
+"""
+Outbound Priority Lanes
+Per-connection scheduler for what the server sends, so control traffic
+never waits behind video:
+
+    control     commands, acks, e-stop, presence, pings   sent immediately
+    telemetry   telemetry updates, status, sensor frames  in order, before video
+    video       video frames                              newest per robot only
+
+Queued messages are written by a short-lived task per connection that exits
+once the queues are empty.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+
+logger = logging.getLogger(__name__)
+
+LANE_CONTROL = 0
+LANE_TELEMETRY = 1
+LANE_VIDEO = 2
+
+TELEMETRY_TYPES = {"telemetry_update", "telemetry_batch", "fleet_summary", "robot_status"}
+VIDEO_TYPES = {"video_frame"}
+
+
+def lane_for(msg_type):
+    if msg_type in VIDEO_TYPES:
+        return LANE_VIDEO
+    if msg_type in TELEMETRY_TYPES:
+        return LANE_TELEMETRY
+    return LANE_CONTROL
+
+
+class PriorityOutbox:
+    """
+    Priority lanes in front of a consumer's send()
+    A video frame still waiting when the same robot's next frame arrives is
+    replaced (and counted in dropped_video) instead of queued. The telemetry
+    lane holds at most max_telemetry messages; past that the oldest is
+    dropped (and counted in dropped_telemetry) so a slow dashboard can't
+    grow the server's memory.
+    """
+
+    def __init__(self, send, max_telemetry=1000):
+        self.send = send
+        self.telemetry = deque(maxlen=max_telemetry)
+        self.video = OrderedDict()
+        self.dropped_video = 0
+        self.dropped_telemetry = 0
+        self.task = None
+        self.closed = False
+
+    async def put(self, lane, text_data=None, bytes_data=None, key=None):
+        if self.closed:
+            return
+        if lane == LANE_CONTROL:
+            await self.send(text_data=text_data, bytes_data=bytes_data)
+            return
+
+        if lane == LANE_TELEMETRY:
+            if len(self.telemetry) == self.telemetry.maxlen:
+                self.dropped_telemetry += 1
+            self.telemetry.append((text_data, bytes_data))
+        else:
+            if self.video.pop(key, None) is not None:
+                self.dropped_video += 1
+            self.video[key] = (text_data, bytes_data)
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.drain())
+
+    async def drain(self):
+        while self.telemetry or self.video:
+            if self.telemetry:
+                text_data, bytes_data = self.telemetry.popleft()
+            else:
+                _, (text_data, bytes_data) = self.video.popitem(last=False)
+            try:
+                await self.send(text_data=text_data, bytes_data=bytes_data)
+            except Exception as e:
+                logger.error(f"Failed to send queued message: {e}")
+
+    def close(self):
+        self.closed = True
+        self.telemetry.clear()
+        self.video.clear()
+        if self.task and not self.task.done() and self.task is not asyncio.current_task():
+            self.task.cancel()
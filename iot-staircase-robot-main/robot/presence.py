@@ -0,0 +1,158 @@
+"""
+Presence and liveness tracking
+Every WebSocket connection is registered with a TTL that is refreshed by any
+incoming message. One background task per process pings all connections at a
+fixed interval, measures round-trip time from the pongs, and reaps
+connections whose TTL has run out (half-open sockets that never sent a close).
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat_interval():
+    return float(getattr(settings, 'ROBOT_HEARTBEAT_INTERVAL', 5.0))
+
+
+def presence_ttl():
+    return float(getattr(settings, 'ROBOT_PRESENCE_TTL', 15.0))
+
+
+class PresenceEntry:
+    """Liveness state for one connection"""
+
+    def __init__(self, consumer, ttl):
+        now = time.monotonic()
+        self.consumer = consumer
+        self.ttl = ttl
+        self.connected_at = time.time()
+        self.last_seen = now
+        self.rtt_ms = None
+        self.ping_seq = 0
+        self.pending_pings = {}     # {seq: monotonic send time}
+
+    @property
+    def device_type(self):
+        return self.consumer.device_type
+
+    @property
+    def device_id(self):
+        return self.consumer.device_id
+
+    def expired(self, now):
+        return now - self.last_seen > self.ttl
+
+    def as_dict(self):
+        clock = getattr(self.consumer, 'clock', None)
+        return {
+            "device_id": self.device_id,
+            "device_type": self.device_type,
+            "connected_at": self.connected_at,
+            "idle": round(time.monotonic() - self.last_seen, 3),
+            "rtt_ms": self.rtt_ms,
+            "clock": clock.as_dict() if clock and clock.synced else None,
+        }
+
+
+class PresenceRegistry:
+    """
+    All live connections keyed by connection_id, plus the heartbeat/reaper task
+    """
+
+    def __init__(self):
+        self.entries = {}           # {connection_id: PresenceEntry}
+        self._task = None
+
+    def register(self, consumer):
+        entry = PresenceEntry(consumer, presence_ttl())
+        self.entries[consumer.connection_id] = entry
+        self._ensure_task()
+        return entry
+
+    def remove(self, consumer):
+        entry = self.entries.pop(consumer.connection_id, None)
+        if not self.entries and self._task is not None:
+            # The loop exits on its own when the reaper removes the last entry
+            if self._task is not asyncio.current_task():
+                self._task.cancel()
+            self._task = None
+        return entry
+
+    def touch(self, consumer):
+        entry = self.entries.get(consumer.connection_id)
+        if entry is not None:
+            entry.last_seen = time.monotonic()
+        return entry
+
+    def record_pong(self, consumer, seq):
+        """Refresh liveness and update the connection's RTT from a pong"""
+        entry = self.touch(consumer)
+        if entry is None:
+            return None
+        sent_at = entry.pending_pings.pop(seq, None)
+        if sent_at is not None:
+            entry.rtt_ms = round((time.monotonic() - sent_at) * 1000.0, 2)
+        return entry.rtt_ms
+
+    def roster(self, device_type='robot'):
+        """Compact list of live connections of one type"""
+        return [
+            entry.as_dict()
+            for entry in self.entries.values()
+            if entry.device_type == device_type
+        ]
+
+    def _ensure_task(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        while self.entries and self._task is asyncio.current_task():
+            await asyncio.sleep(heartbeat_interval())
+            await self.reap()
+            await self.send_pings()
+
+    async def send_pings(self):
+        now = time.monotonic()
+        for entry in list(self.entries.values()):
+            entry.ping_seq += 1
+            entry.pending_pings[entry.ping_seq] = now
+            # Forget pings that were never answered
+            if len(entry.pending_pings) > 8:
+                entry.pending_pings.pop(next(iter(entry.pending_pings)))
+            try:
+                await entry.consumer.send(json.dumps({
+                    "type": "ping",
+                    "seq": entry.ping_seq,
+                    # Also t1 of the robot's clock sync sample (see clocksync.py)
+                    "server_ts": time.time(),
+                }))
+            except Exception as e:
+                logger.error(f"Failed to ping {entry.device_type} {entry.device_id}: {e}")
+
+    async def reap(self):
+        """Close and release every connection whose TTL has expired"""
+        now = time.monotonic()
+        for entry in [e for e in self.entries.values() if e.expired(now)]:
+            print(f"💀 Reaping stale {entry.device_type}: {entry.device_id} (idle {now - entry.last_seen:.1f}s)")
+            logger.warning(f"Reaping stale {entry.device_type} {entry.device_id}")
+            try:
+                await entry.consumer.reap()
+            except Exception:
+                logger.exception("Error reaping connection")
+                self.remove(entry.consumer)
+
+
+# Global presence registry for this server process
+presence = PresenceRegistry()
@@ -0,0 +1,282 @@
+"""
+Session Recording
+With ROBOT_RECORD_SESSIONS on, every message through TelemetryConsumer is
+appended to a binary log in ROBOT_RECORDING_DIR (one file per server
+process), so a session can be replayed later with
+`manage.py replay_session`.
+
+File layout (little-endian):
+    header    4sBd    b"RLOG", version, start time (epoch s)
+    records   IdBBB   payload length, t (monotonic s since start), event, flags, connection length
+              + connection id (ascii) + payload
+
+Events are connect (payload: JSON with device_type, device_id), receive
+(from the client), send (to a robot) and disconnect (payload: reason).
+What dashboards are sent is left out; replaying the inbound side rebuilds it.
+
+Records are written by a background thread, never on the event loop. The
+log is flushed when a connection closes and closed when the process exits.
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RLOG"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBd")
+RECORD_HEADER = struct.Struct("<IdBBB")
+
+EVENT_CONNECT = 0
+EVENT_RECEIVE = 1
+EVENT_SEND = 2
+EVENT_DISCONNECT = 3
+
+FLAG_BINARY = 1
+
+# Buffered records are written out at least this often (seconds)
+FLUSH_INTERVAL = 1.0
+
+
+class Record(namedtuple("Record", "t event connection payload binary")):
+    """One recorded event; payload is str for text frames, bytes otherwise"""
+
+    def json(self):
+        return json.loads(self.payload)
+
+
+class SessionRecorder:
+    """
+    Append-only writer for one session log
+    record() only packs and queues a record; the writer thread does the
+    file I/O.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.started = time.monotonic()
+        self.records = 0
+        self.closed = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, time.time()))
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="session-recorder", daemon=True)
+        self._writer.start()
+
+    def record(self, event, connection, payload):
+        if self.closed:
+            return
+        binary = isinstance(payload, (bytes, bytearray))
+        data = bytes(payload) if binary else (payload or "").encode()
+        label = connection.encode()
+        header = RECORD_HEADER.pack(len(data), time.monotonic() - self.started, event,
+                                    FLAG_BINARY if binary else 0, len(label))
+        self._queue.put(header + label + data)
+        self.records += 1
+
+    def _write_loop(self):
+        last_flush = time.monotonic()
+        unflushed = False
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = None
+            try:
+                if item is self._STOP:
+                    return
+                if item is not None:
+                    self._file.write(item)
+                    unflushed = True
+                now = time.monotonic()
+                if unflushed and (item is None or now - last_flush >= FLUSH_INTERVAL):
+                    self._file.flush()
+                    last_flush = now
+                    unflushed = False
+            except Exception as e:
+                logger.error(f"Failed to write session log {self.path}: {e}")
+            finally:
+                if item is not None:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued record is written and flushed (blocking)"""
+        if self.closed:
+            return
+        self._queue.join()
+        if not self._file.closed:
+            self._file.flush()
+
+    def connect(self, consumer):
+        self.record(EVENT_CONNECT, consumer.connection_id, json.dumps({
+            "device_type": consumer.device_type,
+            "device_id": consumer.device_id
+        }))
+
+    def close(self):
+        """Write out what is queued and close the file (blocking)"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(self._STOP)
+        self._writer.join()
+        self._file.close()
+
+
+def read_session(path):
+    """Records of a session log in order; a torn final record is ignored"""
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{path} is not a session recording")
+        magic, version, _ = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a session recording (bad magic or version)")
+
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, t, event, flags, label_length = RECORD_HEADER.unpack(header)
+            body = f.read(label_length + length)
+            if len(body) < label_length + length:
+                return
+            payload = body[label_length:]
+            binary = bool(flags & FLAG_BINARY)
+            yield Record(t, event, body[:label_length].decode(),
+                         payload if binary else payload.decode(), binary)
+
+
+_recorder = None
+
+
+def get_recorder():
+    """This process's recorder, or None unless ROBOT_RECORD_SESSIONS is on"""
+    global _recorder
+    if not getattr(settings, 'ROBOT_RECORD_SESSIONS', False):
+        return None
+    if _recorder is None:
+        directory = getattr(settings, 'ROBOT_RECORDING_DIR', 'recordings')
+        name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.rlog"
+        _recorder = SessionRecorder(os.path.join(str(directory), name))
+        # Records still queued when the server stops are written, not lost
+        atexit.register(_recorder.close)
+        print(f"⏺️  Recording session to {_recorder.path}")
+        logger.info(f"Recording session to {_recorder.path}")
+    return _recorder
+
+
+async def paced(records, speed=1.0):
+    """
+    Yield records at their recorded pace scaled by speed (2.0 = twice as
+    fast); speed 0 replays as fast as possible
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for record in records:
+        if speed > 0:
+            delay = record.t / speed - (loop.time() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield record
+
+
+async def replay_to_consumer(records, speed=1.0):
+    """
+    Drive fresh TelemetryConsumer instances with the recorded clients'
+    messages (connects, receives, disconnects). Returns counts per event.
+    """
+    from channels.testing import WebsocketCommunicator
+
+    from .consumers import TelemetryConsumer
+
+    clients = {}
+    drains = []
+    stats = {"connections": 0, "messages": 0, "replies": 0}
+
+    async def drain(communicator):
+        # Read replies straight off the queue: receive_output() kills the
+        # application when it times out
+        while True:
+            await communicator.output_queue.get()
+            stats["replies"] += 1
+
+    async for record in paced(records, speed):
+        if record.event == EVENT_CONNECT:
+            meta = record.json()
+            path = "/ws/telemetry/"
+            if meta.get("device_type") == "robot":
+                path += f"?device_id={meta['device_id']}"
+            communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), path)
+            connected, _ = await communicator.connect()
+            if connected:
+                clients[record.connection] = communicator
+                drains.append(asyncio.create_task(drain(communicator)))
+                stats["connections"] += 1
+
+        elif record.event == EVENT_RECEIVE and record.connection in clients:
+            if record.binary:
+                await clients[record.connection].send_to(bytes_data=record.payload)
+            else:
+                await clients[record.connection].send_to(text_data=record.payload)
+            stats["messages"] += 1
+
+        elif record.event == EVENT_DISCONNECT and record.connection in clients:
+            await clients.pop(record.connection).disconnect()
+
+    # Let the last messages finish before tearing down
+    await asyncio.sleep(0.1)
+    for communicator in clients.values():
+        await communicator.disconnect()
+    for task in drains:
+        task.cancel()
+    return stats
+
+
+async def replay_to_robot(records, robot, device_id=None, speed=1.0):
+    """
+    Feed what the server sent to one recorded robot (device_id, default
+    the first robot in the log) into a robot_client.SimulatedRobot, with
+    its control loop running. Returns the number of messages handled.
+    """
+    robots = {}
+    handled = 0
+    robot.running = True
+    control_task = asyncio.create_task(robot.control.run(lambda: robot.running))
+    try:
+        async for record in paced(records, speed):
+            if record.event == EVENT_CONNECT:
+                meta = record.json()
+                if meta.get("device_type") == "robot":
+                    if device_id is None:
+                        device_id = meta["device_id"]
+                    robots[record.connection] = meta["device_id"]
+
+            elif (record.event == EVENT_SEND and not record.binary
+                  and robots.get(record.connection) == device_id):
+                data = record.json()
+                if data.get("type") == "estop":
+                    await robot.handle_estop(data)
+                else:
+                    await robot.handle_message(data)
+                handled += 1
+    finally:
+        robot.running = False
+        await control_task
+    return handled
@@ -0,0 +1,168 @@
+"""
+Binary Sensor Streams
+High-rate channels (IMU pitch/roll, track motor currents, ...) arrive from
+robots as binary WebSocket frames, are relayed untouched to subscribed
+dashboards and appended to a compact per-device store.
+
+Frame layout (little-endian):
+    magic     4s      b"SNS1"
+    header    BBHdf   version, channel count, samples per channel, t0 (epoch s), rate (Hz)
+    source    B + utf-8 bytes   device_id of the sending robot
+    names     (B + utf-8 bytes) per channel
+    data      float32[channels][samples], channel-major
+"""
+
+import os
+import re
+import struct
+import threading
+
+import numpy as np
+from django.conf import settings
+
+
+MAGIC = b"SNS1"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHdf")
+
+# Per channel and batch: t0, rate, index of the first sample, sample count
+INDEX_RECORD = np.dtype([("t0", "<f8"), ("rate", "<f4"), ("first", "<u8"), ("n", "<u4")])
+
+# Device ids and channel names become file names
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$")
+
+
+class InvalidSensorFrame(ValueError):
+    pass
+
+
+class SensorBatch:
+    """One decoded frame; column data stays as the raw float32 bytes"""
+
+    def __init__(self, source, channels, rate, t0, n, data):
+        self.source = source
+        self.channels = channels
+        self.rate = rate
+        self.t0 = t0
+        self.n = n
+        self.data = data
+
+    def column(self, index):
+        size = self.n * 4
+        return self.data[index * size:(index + 1) * size]
+
+    def values(self, channel):
+        return np.frombuffer(self.column(self.channels.index(channel)), dtype="<f4")
+
+    def timestamps(self):
+        return self.t0 + np.arange(self.n) / self.rate
+
+
+def pack_sensor_batch(source, channels, rate, t0, columns):
+    """Encode equal-length columns (one per channel) as a binary frame"""
+    n = len(columns[0]) if columns else 0
+    parts = [HEADER.pack(MAGIC, VERSION, len(channels), n, t0, rate)]
+    for name in (source, *channels):
+        encoded = name.encode()
+        parts.append(struct.pack("<B", len(encoded)) + encoded)
+    for column in columns:
+        parts.append(np.asarray(column, dtype="<f4").tobytes())
+    return b"".join(parts)
+
+
+def unpack_sensor_batch(payload):
+    """Decode and validate a binary frame, raising InvalidSensorFrame"""
+    if len(payload) < HEADER.size:
+        raise InvalidSensorFrame("Sensor frame too short")
+    magic, version, channel_count, n, t0, rate = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise InvalidSensorFrame("Not a sensor frame (bad magic or version)")
+    if rate <= 0:
+        raise InvalidSensorFrame("Sample rate must be positive")
+
+    offset = HEADER.size
+    names = []
+    try:
+        for _ in range(channel_count + 1):
+            length = payload[offset]
+            names.append(payload[offset + 1:offset + 1 + length].decode())
+            offset += 1 + length
+    except (IndexError, UnicodeDecodeError):
+        raise InvalidSensorFrame("Truncated channel names")
+
+    source, channels = names[0], names[1:]
+    for name in names:
+        if not SAFE_NAME.match(name):
+            raise InvalidSensorFrame(f"Invalid name in sensor frame: {name!r}")
+    if len(set(channels)) != len(channels):
+        raise InvalidSensorFrame("Duplicate channel names")
+
+    data = bytes(payload[offset:])
+    if len(data) != channel_count * n * 4:
+        raise InvalidSensorFrame(f"Expected {channel_count * n * 4} data bytes, got {len(data)}")
+    return SensorBatch(source, channels, rate, t0, n, data)
+
+
+class SensorStore:
+    """
+    Append-only per-device, per-channel arrays on disk
+        <root>/<device_id>/<channel>.f32   samples (float32)
+        <root>/<device_id>/<channel>.idx   one INDEX_RECORD per appended batch
+    Appending a batch is two small writes per channel, no decode and no ORM rows.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, root):
+        self.root = str(root)
+
+    def _paths(self, device_id, channel):
+        base = os.path.join(self.root, device_id, channel)
+        return base + ".f32", base + ".idx"
+
+    def append(self, device_id, batch):
+        os.makedirs(os.path.join(self.root, device_id), exist_ok=True)
+        with self._lock:
+            for index, channel in enumerate(batch.channels):
+                data_path, index_path = self._paths(device_id, channel)
+                with open(data_path, "ab") as f:
+                    first = f.tell() // 4
+                    f.write(batch.column(index))
+                record = np.array([(batch.t0, batch.rate, first, batch.n)], dtype=INDEX_RECORD)
+                with open(index_path, "ab") as f:
+                    f.write(record.tobytes())
+
+    def channels(self, device_id):
+        try:
+            names = os.listdir(os.path.join(self.root, device_id))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith(".f32"))
+
+    def read(self, device_id, channel, start=None, end=None):
+        """(timestamps, values) of one channel, optionally limited to [start, end) epoch seconds"""
+        data_path, index_path = self._paths(device_id, channel)
+        if not os.path.exists(data_path):
+            return np.empty(0), np.empty(0, dtype="<f4")
+
+        with self._lock:
+            values = np.fromfile(data_path, dtype="<f4")
+            index = np.fromfile(index_path, dtype=INDEX_RECORD)
+
+        timestamps = np.empty(len(values))
+        for record in index:
+            first, n = int(record["first"]), int(record["n"])
+            timestamps[first:first + n] = record["t0"] + np.arange(n) / float(record["rate"])
+
+        keep = np.ones(len(values), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps < end
+        return timestamps[keep], values[keep]
+
+
+def get_sensor_store():
+    """Store under ROBOT_SENSOR_STORE_DIR, or None when storage is switched off"""
+    root = getattr(settings, 'ROBOT_SENSOR_STORE_DIR', None)
+    return SensorStore(root) if root else None
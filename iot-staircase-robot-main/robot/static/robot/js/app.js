@@ -9,6 +9,39 @@ let socket = null;
 // Track connected devices
 const connectedDevices = new Set();
 
+// What this dashboard asks the server for: telemetry and status from every
+// robot (for the device list), video only from the robot on screen
+const viewer = {
+    id: null,           // server-assigned viewer id
+    watching: null      // device_id whose video is shown
+};
+
+// Pages without a live video view only show an overview, one batched
+// telemetry update per this many seconds is plenty
+const OVERVIEW_TELEMETRY_INTERVAL = 1.0;
+
+function sendSubscription(type, deviceId, streams) {
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+    socket.send(JSON.stringify({ type, device_id: deviceId, streams }));
+}
+
+function watchRobot(deviceId) {
+    if (viewer.watching === deviceId) return;
+    if (viewer.watching) {
+        const previous = viewer.watching;
+        viewer.watching = null;
+        stopWebRTC(true);
+        sendSubscription("unsubscribe", previous, ["video"]);
+    }
+    viewer.watching = deviceId;
+    if (deviceId) {
+        console.log(`👀 Watching ${deviceId}`);
+        sendSubscription("subscribe", deviceId, ["video"]);
+        showTelemetryFor(deviceId);
+        startWebRTC(deviceId);
+    }
+}
+
 // Function to update connection status
 function updateConnectionStatus(isConnected) {
     const statusIndicator = document.getElementById('connectionStatus');
@@ -27,14 +60,10 @@ function updateConnectionStatus(isConnected) {
 
 // Function to update device status indicators
 function updateDeviceStatus(deviceId, isConnected) {
-    const deviceStatusMap = {
-        'robot_01': 'device1Status',
-        'robot_02': 'device2Status'
-    };
-    
-    const statusElementId = deviceStatusMap[deviceId];
-    if (statusElementId) {
-        const statusElement = document.getElementById(statusElementId);
+    if (!isConnected) connectedDevices.delete(deviceId);
+    const slot = isConnected ? assignDeviceSlot(deviceId) : deviceSlotOf(deviceId);
+    if (slot) {
+        const statusElement = document.getElementById(`device${slot}Status`);
         if (statusElement) {
             if (isConnected) {
                 statusElement.classList.add('connected');
@@ -52,16 +81,79 @@ function updateDeviceStatus(deviceId, isConnected) {
 // Initialize the main websocket after DOM is ready so status elements exist
 function initSocket() {
     socket = new WebSocket(wsUrl);
+    // Binary video frames are read as ArrayBuffers (no Blob round trip)
+    socket.binaryType = 'arraybuffer';
 
     socket.onopen = () => {
         console.log("✅ Main WebSocket connected");
         updateConnectionStatus(true);
+        startClockSync();
     };
 
     socket.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+            handleBinaryMessage(event.data);
+            return;
+        }
         try {
             const data = JSON.parse(event.data);
-                       // Handle connection status messages (robot or dashboard)
+
+            // Answer server heartbeats so this dashboard is not reaped
+            if (data.type === "ping") {
+                socket.send(JSON.stringify({ type: "pong", seq: data.seq }));
+                return;
+            }
+
+            // Reply to our clock sync probe
+            if (data.type === "clock_sync") {
+                handleClockSync(data);
+                return;
+            }
+
+            // Robot roster snapshot (sent once on connect)
+            if (data.type === "presence_snapshot" && Array.isArray(data.robots)) {
+                viewer.id = data.viewer_id || null;
+                data.robots.forEach((robot) => updateDeviceStatus(robot.device_id, true));
+                sendSubscription("subscribe", "*", ["telemetry", "status"]);
+                if (binaryVideoSupported()) {
+                    socket.send(JSON.stringify({ type: "video_format", format: "binary" }));
+                }
+                if (!document.getElementById('videoStream')) {
+                    socket.send(JSON.stringify({ type: "telemetry_rate", interval: OVERVIEW_TELEMETRY_INTERVAL }));
+                    if (document.getElementById('fleetOnline')) sendSubscription("subscribe", "*", ["fleet"]);
+                } else if (data.robots.length) {
+                    watchRobot(data.robots[0].device_id);
+                }
+            }
+
+            // WebRTC signaling for the low-latency video path
+            if (data.type === "webrtc_offer") {
+                handleWebRTCOffer(data);
+                return;
+            }
+            if (data.type === "webrtc_hangup") {
+                console.log(`📺 WebRTC video ended${data.reason ? ` (${data.reason})` : ''}, using JPEG frames`);
+                stopWebRTC(false);
+                return;
+            }
+
+            // Emergency stop progress and measured latency
+            if (data.type === "estop_status") {
+                handleEstopStatus(data);
+                return;
+            }
+
+            // Incremental robot presence changes
+            if (data.type === "presence_delta" && data.device_id) {
+                const online = data.state === "online";
+                console.log(`${online ? '✅' : '🔌'} Robot ${data.device_id} ${data.state}${data.reason ? ` (${data.reason})` : ''}`);
+                updateDeviceStatus(data.device_id, online);
+                if (online && !viewer.watching && document.getElementById('videoStream')) watchRobot(data.device_id);
+                else if (!online && viewer.watching === data.device_id) watchRobot(null);
+                return;
+            }
+
+            // Handle connection status messages (robot or dashboard)
             if (data.status === "connected") {
                 updateConnectionStatus(true);
                 if (data.device_type === "robot" && data.device_id) {
@@ -88,9 +180,24 @@ function initSocket() {
                 }
             }
             
+            // Server-side fleet figures, once per tick
+            if (data.type === "fleet_summary") {
+                updateFleetSummary(data);
+                return;
+            }
+
+            // Coalesced telemetry: only the fields that changed, per robot
+            if (data.type === "telemetry_batch" && data.robots) {
+                Object.entries(data.robots).forEach(([deviceId, fields]) => {
+                    recordTelemetry(deviceId, fields);
+                    updateDeviceStatus(deviceId, true);
+                });
+                return;
+            }
+
             // Handle telemetry updates
             if (data.type === "telemetry_update") {
-                updateTelemetryDisplay(data);
+                recordTelemetry(data.device_id, data);
                 // If we receive telemetry from a device, mark it as connected
                 if (data.device_id) {
                     updateDeviceStatus(data.device_id, true);
@@ -116,12 +223,15 @@ function initSocket() {
 
 // Function to display video frames
 function displayVideoFrame(data) {
+    // The WebRTC stream already shows this robot
+    if (webrtcVideo.active && webrtcVideo.deviceId === data.device_id) return;
     try {
         const videoCanvas = document.getElementById('videoCanvas');
         const videoFrame = document.getElementById('videoFrame');
         
         if (videoFrame) {
-            // Display in img element
+            // Display in img element; latency is measured once it is decoded
+            videoFrame.onload = () => requestAnimationFrame(() => recordFrameLatency(data));
             videoFrame.src = `data:image/jpeg;base64,${data.frame_data}`;
             videoFrame.style.display = 'block';
             console.log("🎥 Video frame displayed in img");
@@ -142,57 +252,491 @@ function displayVideoFrame(data) {
     }
 }
 
-// Function to update telemetry display (controller + dashboard metrics)
-function updateTelemetryDisplay(data) {
+// Binary video frames (robot/videoframe.py): the JPEG is decoded to an
+// ImageBitmap in a worker and drawn on the next animation frame. Only the
+// newest frame is kept waiting at each stage, older ones are dropped, and
+// nothing is decoded while the tab is hidden or the video is off-screen.
+const VIDEO_HEADER_SIZE = 33;
+const videoRenderer = {
+    worker: null,
+    decoding: null,     // header of the frame being decoded (one at a time)
+    pending: null,      // newest {info, buffer} waiting for the decoder
+    ready: null,        // newest {info, bitmap} waiting to be drawn
+    frame: null,
+    visible: true,      // tab visible and video on screen
+    onScreen: true,
+    dropped: 0
+};
+
+const VIDEO_WORKER_SOURCE = `
+self.onmessage = async (event) => {
+    const { buffer, offset } = event.data;
     try {
-        if (data.battery !== undefined) {
-            // Controller sidebar battery
-            const batteryLevel = document.getElementById("batteryLevel");
-            const batteryPercentage = document.getElementById("batteryPercentage");
-            if (batteryLevel) batteryLevel.style.width = `${data.battery}%`;
-            if (batteryPercentage) batteryPercentage.textContent = `${data.battery}%`;
-
-            // Dashboard cards
-            const batteryValue = document.getElementById("batteryValue");
-            if (batteryValue) batteryValue.textContent = `${Math.round(data.battery)}%`;
-
-            // Update Highcharts
-            if (appState.batteryChart && appState.batteryChart.series) {
-                const series = appState.batteryChart.series[0];
-                const x = (new Date()).getTime(); // current time
-                const y = data.battery;
-                // Add point, redraw, shift if > 100 points
-                const shift = series.data.length > 100;
-                series.addPoint([x, y], true, shift);
-            }
+        const bitmap = await createImageBitmap(new Blob([new Uint8Array(buffer, offset)], { type: 'image/jpeg' }));
+        self.postMessage({ bitmap }, [bitmap]);
+    } catch (err) {
+        self.postMessage({ error: String(err) });
+    }
+};`;
+
+function binaryVideoSupported() {
+    return typeof createImageBitmap === 'function' && !!document.getElementById('videoCanvas');
+}
+
+function setupVideoRenderer() {
+    if (!binaryVideoSupported()) return;
+    if (typeof Worker === 'function') {
+        try {
+            const url = URL.createObjectURL(new Blob([VIDEO_WORKER_SOURCE], { type: 'text/javascript' }));
+            videoRenderer.worker = new Worker(url);
+            videoRenderer.worker.onmessage = (event) => frameDecoded(event.data.bitmap, event.data.error);
+            videoRenderer.worker.onerror = () => {
+                // Decode on this thread instead (createImageBitmap is still asynchronous)
+                videoRenderer.worker = null;
+                frameDecoded(null, 'worker failed');
+            };
+        } catch (err) {
+            videoRenderer.worker = null;
         }
-        
-        if (data.signal !== undefined) {
-            // Controller header signal
-            const signalStrength = document.getElementById("signalStrength");
-            if (signalStrength) signalStrength.textContent = `${Math.round(data.signal)}%`;
+    }
+
+    document.addEventListener('visibilitychange', updateVideoVisibility);
+    const stream = document.getElementById('videoStream');
+    if (stream && typeof IntersectionObserver === 'function') {
+        new IntersectionObserver((entries) => {
+            videoRenderer.onScreen = entries[entries.length - 1].isIntersecting;
+            updateVideoVisibility();
+        }).observe(stream);
+    }
+}
+
+function updateVideoVisibility() {
+    const visible = document.visibilityState !== 'hidden' && videoRenderer.onScreen !== false;
+    if (visible === videoRenderer.visible) return;
+    videoRenderer.visible = visible;
+    if (!visible) videoRenderer.pending = null;
+    // No frames for a video nobody can see (WebRTC has its own subscription handling)
+    if (viewer.watching && !webrtcVideo.active) {
+        sendSubscription(visible ? "subscribe" : "unsubscribe", viewer.watching, ["video"]);
+    }
+}
+
+function parseVideoFrame(buffer) {
+    if (buffer.byteLength < VIDEO_HEADER_SIZE) return null;
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== 'VID1') return null;
+    const time = (offset) => {
+        const value = view.getFloat64(offset, true);
+        return Number.isNaN(value) ? null : value;
+    };
+    const length = view.getUint8(32);
+    return {
+        device_id: new TextDecoder().decode(new Uint8Array(buffer, VIDEO_HEADER_SIZE, length)),
+        frame_number: view.getUint32(4, true),
+        capture_ts: time(8),
+        sent_ts: time(16),
+        server_ts: time(24),
+        offset: VIDEO_HEADER_SIZE + length
+    };
+}
+
+function handleBinaryMessage(buffer) {
+    // Other binary messages (sensor streams) are not shown on this page
+    const info = parseVideoFrame(buffer);
+    if (!info) return;
+    if (webrtcVideo.active && webrtcVideo.deviceId === info.device_id) return;
+    if (!videoRenderer.visible || videoRenderer.pending) videoRenderer.dropped++;
+    if (!videoRenderer.visible) return;
+    videoRenderer.pending = { info, buffer };
+    decodeNextFrame();
+}
 
-            // Dashboard cards
-            const signalValue = document.getElementById("signalValue");
-            const networkSignal = document.getElementById("networkSignal");
-            if (signalValue) signalValue.textContent = `${Math.round(data.signal)}%`;
-            if (networkSignal) networkSignal.textContent = `${Math.round(data.signal)}%`;
+function decodeNextFrame() {
+    if (videoRenderer.decoding || !videoRenderer.pending) return;
+    const { info, buffer } = videoRenderer.pending;
+    videoRenderer.pending = null;
+    videoRenderer.decoding = info;
+    if (videoRenderer.worker) {
+        videoRenderer.worker.postMessage({ buffer, offset: info.offset }, [buffer]);
+    } else {
+        createImageBitmap(new Blob([new Uint8Array(buffer, info.offset)], { type: 'image/jpeg' }))
+            .then((bitmap) => frameDecoded(bitmap), (err) => frameDecoded(null, err));
+    }
+}
+
+function frameDecoded(bitmap, error) {
+    const info = videoRenderer.decoding;
+    videoRenderer.decoding = null;
+    if (bitmap && info) {
+        if (videoRenderer.ready) {
+            videoRenderer.ready.bitmap.close();
+            videoRenderer.dropped++;
         }
-        
-        if (data.cpu !== undefined) {
-            const cpuValue = document.getElementById("cpuValue");
-            if (cpuValue) cpuValue.textContent = `${Math.round(data.cpu)}%`;
+        videoRenderer.ready = { info, bitmap };
+        if (videoRenderer.frame === null) {
+            videoRenderer.frame = requestAnimationFrame(drawVideoFrame);
         }
+    } else if (error) {
+        console.warn("⚠️ Video frame decode failed:", error);
+    }
+    decodeNextFrame();
+}
+
+function drawVideoFrame() {
+    videoRenderer.frame = null;
+    const ready = videoRenderer.ready;
+    videoRenderer.ready = null;
+    if (!ready) return;
+
+    const canvas = document.getElementById('videoCanvas');
+    if (canvas) {
+        if (canvas.width !== ready.bitmap.width || canvas.height !== ready.bitmap.height) {
+            canvas.width = ready.bitmap.width;
+            canvas.height = ready.bitmap.height;
+        }
+        canvas.getContext('2d').drawImage(ready.bitmap, 0, 0);
+        const img = document.getElementById('videoFrame');
+        if (img && img.style.display !== 'none') img.style.display = 'none';
+    }
+    ready.bitmap.close();
+    recordFrameLatency(ready.info);
+}
 
-        if (data.temperature !== undefined) {
-            const temperatureValue = document.getElementById("temperatureValue");
-            if (temperatureValue) temperatureValue.textContent = `${Math.round(data.temperature)}°C`;
+// Low-latency video over WebRTC, signaled over the main WebSocket.
+// JPEG frames keep being displayed until the track plays, and again if the
+// robot or browser cannot do WebRTC or the connection fails.
+const webrtcVideo = {
+    pc: null,
+    deviceId: null,
+    active: false
+};
+
+function startWebRTC(deviceId) {
+    if (!window.RTCPeerConnection || webrtcVideo.deviceId) return;
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+    webrtcVideo.deviceId = deviceId;
+    socket.send(JSON.stringify({ type: "webrtc_request", device_id: deviceId }));
+}
+
+async function handleWebRTCOffer(data) {
+    if (webrtcVideo.pc) webrtcVideo.pc.close();
+    webrtcVideo.deviceId = data.device_id;
+    const pc = webrtcVideo.pc = new RTCPeerConnection();
+
+    pc.ontrack = (event) => {
+        const video = document.getElementById('videoRtc');
+        if (!video) return;
+        video.srcObject = event.streams[0] || new MediaStream([event.track]);
+        video.style.display = 'block';
+        const img = document.getElementById('videoFrame');
+        if (img) img.style.display = 'none';
+        const canvas = document.getElementById('videoCanvas');
+        if (canvas) canvas.style.display = 'none';
+        webrtcVideo.active = true;
+        // The track replaces the JPEG frames, stop the server sending them
+        sendSubscription("unsubscribe", data.device_id, ["video"]);
+        console.log(`📺 WebRTC video from ${data.device_id}`);
+    };
+    pc.onicecandidate = (event) => {
+        if (event.candidate && socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify({
+                type: "webrtc_ice",
+                device_id: data.device_id,
+                candidate: event.candidate.toJSON()
+            }));
         }
-        
-        console.log("📊 Telemetry updated");
+    };
+    pc.onconnectionstatechange = () => {
+        if (pc.connectionState === 'failed') {
+            console.warn("⚠️ WebRTC connection failed, using JPEG frames");
+            stopWebRTC(true);
+        }
+    };
+
+    try {
+        await pc.setRemoteDescription({ type: 'offer', sdp: data.sdp });
+        await pc.setLocalDescription(await pc.createAnswer());
+        socket.send(JSON.stringify({
+            type: "webrtc_answer",
+            device_id: data.device_id,
+            sdp: pc.localDescription.sdp
+        }));
+    } catch (err) {
+        console.error("❌ WebRTC negotiation failed:", err);
+        stopWebRTC(true);
+    }
+}
+
+function stopWebRTC(notify) {
+    if (notify && webrtcVideo.deviceId && socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ type: "webrtc_hangup", device_id: webrtcVideo.deviceId }));
+    }
+    if (webrtcVideo.pc) webrtcVideo.pc.close();
+    if (webrtcVideo.active && webrtcVideo.deviceId === viewer.watching) {
+        // Back to JPEG frames
+        sendSubscription("subscribe", webrtcVideo.deviceId, ["video"]);
+    }
+    const video = document.getElementById('videoRtc');
+    if (video) {
+        video.srcObject = null;
+        video.style.display = 'none';
+    }
+    const canvas = document.getElementById('videoCanvas');
+    if (canvas) canvas.style.display = '';
+    webrtcVideo.pc = null;
+    webrtcVideo.deviceId = null;
+    webrtcVideo.active = false;
+}
+
+// Dashboard ↔ server clock offset, NTP style over clock_sync messages:
+// t1 sent here, t2/t3 server receive/send, t4 received here (epoch ms).
+// With it, robot capture times (already on the server clock) and our display
+// time can be compared directly.
+const clockSync = {
+    samples: [],        // recent {offset, delay}
+    offset: null,       // server clock minus browser clock (ms)
+    timer: null
+};
+
+function preciseNow() {
+    return performance.timeOrigin + performance.now();
+}
+
+function startClockSync() {
+    clearInterval(clockSync.timer);
+    // A quick burst for a first estimate, then a refresh every 10s
+    for (let i = 0; i < 4; i++) setTimeout(sendClockSync, i * 250);
+    clockSync.timer = setInterval(sendClockSync, 10000);
+}
+
+function sendClockSync() {
+    if (socket && socket.readyState === 1) {
+        socket.send(JSON.stringify({ type: 'clock_sync', t1: preciseNow() }));
+    }
+}
+
+function handleClockSync(data) {
+    const t4 = preciseNow();
+    const delay = (t4 - data.t1) - (data.t3 - data.t2);
+    if (delay < 0) return;
+    clockSync.samples.push({ offset: ((data.t2 - data.t1) + (data.t3 - t4)) / 2, delay });
+    if (clockSync.samples.length > 8) clockSync.samples.shift();
+    // The fastest exchange has the least queuing error
+    const best = clockSync.samples.reduce((a, b) => (b.delay < a.delay ? b : a));
+    clockSync.offset = best.offset;
+}
+
+// Capture → display latency of video frames, split into encode (robot),
+// uplink (robot → server) and relay + downlink + decode (server → screen)
+const videoLatency = {
+    last: null,
+    jitter: 0,
+    lastLog: 0
+};
+
+function recordFrameLatency(data) {
+    if (clockSync.offset === null || !data.capture_ts || !data.server_ts) return;
+
+    const displayedAt = preciseNow() + clockSync.offset;
+    const total = displayedAt - data.capture_ts;
+    const encode = data.sent_ts ? data.sent_ts - data.capture_ts : null;
+    const uplink = data.server_ts - (data.sent_ts || data.capture_ts);
+    const downlink = displayedAt - data.server_ts;
+
+    // Interarrival jitter as in RFC 3550: smoothed change in latency per frame
+    if (videoLatency.last !== null) {
+        videoLatency.jitter += (Math.abs(total - videoLatency.last) - videoLatency.jitter) / 16;
+    }
+    videoLatency.last = total;
+
+    const element = document.getElementById('videoLatency');
+    if (element) {
+        element.textContent = `${Math.round(total)} ms ±${Math.round(videoLatency.jitter)}`;
+        element.title = `encode ${encode === null ? '-' : Math.round(encode)} ms, ` +
+            `uplink ${Math.round(uplink)} ms, server → screen ${Math.round(downlink)} ms`;
+    }
+
+    const now = Date.now();
+    if (now - videoLatency.lastLog > 5000) {
+        videoLatency.lastLog = now;
+        console.log(`⏱️ Video latency ${total.toFixed(1)} ms (jitter ${videoLatency.jitter.toFixed(1)}): ` +
+            `encode ${encode === null ? '-' : encode.toFixed(1)}, uplink ${uplink.toFixed(1)}, ` +
+            `server → screen ${downlink.toFixed(1)}`);
+    }
+}
+
+// Latest real telemetry per robot. Messages only update the store; one
+// animation frame later renderTelemetry writes the fields of the robot on
+// screen that changed, so a burst of samples costs one DOM pass.
+const telemetryStore = {
+    devices: {},            // {device_id: {field: value}}
+    shown: null,            // device_id on screen, null = first robot to report
+    changed: new Set(),     // fields of the shown robot not yet on screen
+    frame: null,            // pending requestAnimationFrame id
+    chart: null,            // dashboard battery chart, once it exists
+    activeSlot: null        // dashboard device button on screen (null = no buttons)
+};
+
+// Dashboard device buttons (data-device) → the robot each one shows, filled
+// from the presence roster in the order robots come online
+const deviceSlots = {};
+
+function deviceSlotOf(deviceId) {
+    return Object.keys(deviceSlots).find((slot) => deviceSlots[slot] === deviceId) || null;
+}
+
+// Give a robot a device button: its own, a free one, or one whose robot is offline
+function assignDeviceSlot(deviceId) {
+    let slot = deviceSlotOf(deviceId);
+    if (slot) return slot;
+    const buttons = Array.from(document.querySelectorAll('.device-btn[data-device]'));
+    const button = buttons.find((btn) => !deviceSlots[btn.dataset.device])
+        || buttons.find((btn) => !connectedDevices.has(deviceSlots[btn.dataset.device]));
+    if (!button) return null;
+    slot = button.dataset.device;
+    deviceSlots[slot] = deviceId;
+    const label = button.querySelector('span');
+    if (label) label.textContent = deviceId;
+    if (slot === telemetryStore.activeSlot) showDeviceSlot(slot);
+    return slot;
+}
+
+// Show the robot behind a dashboard device button
+function showDeviceSlot(slot) {
+    telemetryStore.activeSlot = slot;
+    const title = document.getElementById('activeDeviceTitle');
+    if (title) title.textContent = `${deviceSlots[slot] || `Device ${slot}`} — Live Metrics`;
+    showTelemetryFor(deviceSlots[slot]);
+}
+
+const telemetryElementCache = {};
+
+function telemetryElement(id) {
+    if (!(id in telemetryElementCache)) telemetryElementCache[id] = document.getElementById(id);
+    return telemetryElementCache[id];
+}
+
+function setTelemetryText(id, value, unit) {
+    const el = telemetryElement(id);
+    if (el) el.textContent = value === undefined ? '--' : `${Math.round(value)}${unit}`;
+}
+
+function setTelemetryBar(id, value) {
+    const el = telemetryElement(id);
+    if (el) el.style.width = `${value === undefined ? 0 : Math.round(value)}%`;
+}
+
+// Field → how it is drawn; undefined means no data from this robot yet
+const telemetryRenderers = {
+    battery(value) {
+        setTelemetryText('batteryPercentage', value, '%');
+        setTelemetryText('batteryValue', value, '%');
+        const level = telemetryElement('batteryLevel');
+        if (level) {
+            level.style.width = `${value === undefined ? 0 : value}%`;
+            if (value !== undefined && value < 25) {
+                level.style.background = 'linear-gradient(90deg, #ef4444 0%, #dc2626 100%)';
+                level.style.animation = value < 15 ? 'batteryBlink 1s ease-in-out infinite' : '';
+            } else if (value !== undefined && value < 50) {
+                level.style.background = 'linear-gradient(90deg, #f97316 0%, #ea580c 100%)';
+                level.style.animation = '';
+            } else {
+                level.style.background = 'linear-gradient(90deg, #10b981 0%, #1FB8CD 100%)';
+                level.style.animation = '';
+            }
+        }
+        // One chart point per frame at most, shift once past 100 points
+        const chart = telemetryStore.chart;
+        if (value !== undefined && chart && chart.series && chart.series[0]) {
+            const series = chart.series[0];
+            series.addPoint([Date.now(), value], true, series.data.length > 100);
+        }
+    },
+    signal(value) {
+        setTelemetryText('signalStrength', value, '%');
+        setTelemetryText('signalValue', value, '%');
+        setTelemetryText('networkSignal', value, '%');
+    },
+    cpu(value) {
+        setTelemetryText('cpuValue', value, '%');
+        setTelemetryText('cpuPercent', value, '%');
+        setTelemetryBar('cpuBar', value);
+    },
+    temperature(value) {
+        setTelemetryText('temperatureValue', value, '°C');
+    },
+    memory(value) {
+        setTelemetryText('memoryPercent', value, '%');
+        setTelemetryBar('memoryBar', value);
+    },
+    storage(value) {
+        setTelemetryText('storagePercent', value, '%');
+        setTelemetryBar('storageBar', value);
+    },
+    download(value) {
+        setTelemetryText('networkDownload', value, ' Mbps');
+    },
+    upload(value) {
+        setTelemetryText('networkUpload', value, ' Mbps');
+    }
+};
+
+// Store one telemetry_update (or one robot's part of a telemetry_batch)
+function recordTelemetry(deviceId, fields) {
+    if (!deviceId) return;
+    const device = telemetryStore.devices[deviceId] || (telemetryStore.devices[deviceId] = {});
+    if (telemetryStore.shown === null && telemetryStore.activeSlot === null) showTelemetryFor(deviceId);
+    Object.keys(telemetryRenderers).forEach((field) => {
+        const value = fields[field];
+        if (value === undefined || value === null || device[field] === value) return;
+        device[field] = value;
+        if (deviceId === telemetryStore.shown) telemetryStore.changed.add(field);
+    });
+    scheduleTelemetryRender();
+}
+
+// Put another robot on screen, redrawing every field from the store
+function showTelemetryFor(deviceId) {
+    const previous = telemetryStore.shown;
+    telemetryStore.shown = deviceId || null;
+    // The battery chart follows one robot: another robot starts from an empty series
+    const chart = telemetryStore.chart;
+    if (previous !== null && previous !== telemetryStore.shown && chart && chart.series && chart.series[0]) {
+        chart.series[0].setData([], true);
+    }
+    Object.keys(telemetryRenderers).forEach((field) => telemetryStore.changed.add(field));
+    scheduleTelemetryRender();
+}
+
+function scheduleTelemetryRender() {
+    if (telemetryStore.frame !== null || !telemetryStore.changed.size) return;
+    telemetryStore.frame = requestAnimationFrame(renderTelemetry);
+}
+
+function renderTelemetry() {
+    telemetryStore.frame = null;
+    const fields = telemetryStore.devices[telemetryStore.shown] || {};
+    try {
+        telemetryStore.changed.forEach((field) => telemetryRenderers[field](fields[field]));
     } catch (err) {
         console.error("❌ Error updating telemetry:", err);
     }
+    telemetryStore.changed.clear();
+}
+
+// Fleet card on the overview page, from the server's fleet_summary
+function updateFleetSummary(data) {
+    const online = document.getElementById('fleetOnline');
+    const detail = document.getElementById('fleetDetail');
+    if (online) online.textContent = `${data.robots_online} online`;
+    if (detail) {
+        const parts = [];
+        if (data.battery && data.battery.min !== null) parts.push(`min battery ${Math.round(data.battery.min)}%`);
+        if (data.temperature && data.temperature.max !== null) parts.push(`max ${Math.round(data.temperature.max)}°C`);
+        parts.push(`${data.robots_alerting} alerting`);
+        detail.textContent = parts.join(' · ');
+    }
 }
 
 // Simple throttling for control messages (per type)
@@ -201,28 +745,154 @@ const controlSendState = {
     minIntervalMs: 100
 };
 
-function sendControlMessage(payload) {
+// Joystick output is sampled once per animation frame and sent at most
+// maxRateHz; moves smaller than deadBand (in normalized deflection, -1..1)
+// are not sent again. Release always sends zero at once. Override with
+// window.JOYSTICK_CONFIG before this script, or edit at runtime.
+const joystickConfig = Object.assign({
+    maxRateHz: 20,
+    deadBand: 0.03,
+    debug: false
+}, window.JOYSTICK_CONFIG || {});
+
+// Pass throttle=false for commands with their own rate control (joystick)
+// or that must never be dropped (the zero on release)
+function sendControlMessage(payload, throttle = true) {
     if (!socket || socket.readyState !== 1) {
         console.warn("WS not open  cannot send control message", payload);
-        return;
+        return false;
     }
 
     const now = Date.now();
     const typeKey = payload && payload.type ? payload.type : "generic";
     const last = controlSendState.lastSentAt[typeKey] || 0;
-    if (now - last < controlSendState.minIntervalMs) {
-        return;
+    if (throttle && now - last < controlSendState.minIntervalMs) {
+        return false;
     }
     controlSendState.lastSentAt[typeKey] = now;
 
     try {
         const withTs = Object.assign({ client_ts: now }, payload || {});
         socket.send(JSON.stringify(withTs));
-        // Optional debug
-        // console.log("WS control →", withTs);
+        if (joystickConfig.debug) console.log("WS control →", withTs);
+        return true;
     } catch (err) {
         console.warn("WS send error (control)", err, payload);
+        return false;
+    }
+}
+
+// The robot stops its tracks when no robot_move arrives within its deadman
+// window (~0.6 s), so the last drive command is repeated while the joystick is held
+const driveKeepalive = {
+    intervalMs: 200,
+    timer: null,
+    lastCommand: null
+};
+
+function startDriveKeepalive() {
+    stopDriveKeepalive();
+    driveKeepalive.timer = setInterval(() => {
+        if (driveKeepalive.lastCommand) {
+            sendControlMessage(driveKeepalive.lastCommand);
+        }
+    }, driveKeepalive.intervalMs);
+}
+
+function stopDriveKeepalive() {
+    if (driveKeepalive.timer) {
+        clearInterval(driveKeepalive.timer);
+        driveKeepalive.timer = null;
     }
+    driveKeepalive.lastCommand = null;
+}
+
+// Emergency stop: sent at once (never throttled) to the robot on screen.
+// The server retransmits it to that robot until acknowledged and reports
+// the latency as estop_status. The robot stays stopped until released.
+const estopState = {
+    latched: false,
+    lastSentTs: null,
+    deviceId: null          // robot the last estop went to, released by releaseEstop
+};
+
+// The robot this page is showing: its video, else its telemetry
+function estopTarget() {
+    return viewer.watching || telemetryStore.shown;
+}
+
+function sendEstop() {
+    if (!socket || socket.readyState !== 1) {
+        console.error("🛑 E-STOP not sent: WebSocket is not open");
+        return;
+    }
+    stopDriveKeepalive();
+    const target = estopTarget();
+    if (!target) {
+        console.error("🛑 E-STOP not sent: no robot on screen");
+        updateEstopUI("No robot selected");
+        return;
+    }
+    estopState.deviceId = target;
+    estopState.lastSentTs = Date.now();
+    socket.send(JSON.stringify({ type: 'estop', device_id: target, client_ts: estopState.lastSentTs }));
+    console.warn(`🛑 E-STOP sent to ${target}`);
+}
+
+function releaseEstop() {
+    if (!socket || socket.readyState !== 1) return;
+    const target = estopState.deviceId || estopTarget();
+    if (!target) return;
+    socket.send(JSON.stringify({ type: 'estop_release', device_id: target, client_ts: Date.now() }));
+    estopState.latched = false;
+    estopState.deviceId = null;
+    updateEstopUI("Released");
+}
+
+function handleEstopStatus(data) {
+    if (data.status === "sent") {
+        updateEstopUI("Stopping...");
+    } else if (data.status === "no_robot") {
+        updateEstopUI("No robot connected");
+    } else if (data.status === "acknowledged") {
+        estopState.latched = true;
+        let text = `${data.device_id} stopped in ${data.latency_ms} ms`;
+        if (!data.within_budget) text += ` (over ${data.budget_ms} ms budget)`;
+        // End-to-end time only means something against our own clock
+        if (data.client_ts && data.client_ts === estopState.lastSentTs) {
+            console.log(`🛑 E-STOP end-to-end: ${Date.now() - data.client_ts} ms`);
+        }
+        updateEstopUI(text);
+    } else if (data.status === "failed") {
+        updateEstopUI(`${data.device_id} did NOT confirm the stop`);
+    }
+}
+
+function updateEstopUI(statusText) {
+    const button = document.getElementById('estopBtn');
+    const status = document.getElementById('estopStatus');
+    if (button) {
+        button.classList.toggle('latched', estopState.latched);
+        button.querySelector('span').textContent = estopState.latched ? 'Release E-STOP' : 'E-STOP';
+    }
+    if (status && statusText) status.textContent = statusText;
+}
+
+function setupEstopControls() {
+    const button = document.getElementById('estopBtn');
+    if (button) {
+        button.addEventListener('click', () => {
+            if (estopState.latched) {
+                releaseEstop();
+            } else {
+                sendEstop();
+            }
+        });
+    }
+    // Escape always stops, wherever the focus is
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') sendEstop();
+    });
 }
 
 // Modern IoT Robot Controller - Fixed Application
@@ -245,10 +915,7 @@ document.addEventListener('DOMContentLoaded', function () {
         loading: false,
         user: null,
         connected: true,
-        devices: {
-            '1': { name: 'Device 1', battery: 85, cpu: 38, temperature: 41, signal: 93, memory: 64, storage: 23, download: 125, upload: 32 },
-            '2': { name: 'Device 2', battery: 72, cpu: 44, temperature: 39, signal: 88, memory: 58, storage: 31, download: 118, upload: 28 }
-        },
+        // Device button on screen, metrics come from telemetryStore (see deviceSlots)
         activeDevice: '1',
         robotPosition: { x: 0.00, y: 0.00 },
         cameraPosition: { x: 0.00, y: 0.00 },
@@ -274,23 +941,6 @@ document.addEventListener('DOMContentLoaded', function () {
         password: "password123"
     };
 
-    // Enhanced battery chart data
-    const batteryChartData = [
-        { time: "00:00", battery: 100 },
-        { time: "01:00", battery: 98 },
-        { time: "02:00", battery: 95 },
-        { time: "03:00", battery: 92 },
-        { time: "04:00", battery: 89 },
-        { time: "05:00", battery: 87 },
-        { time: "06:00", battery: 84 },
-        { time: "07:00", battery: 82 },
-        { time: "08:00", battery: 80 },
-        { time: "09:00", battery: 78 },
-        { time: "10:00", battery: 76 },
-        { time: "11:00", battery: 75 },
-        { time: "12:00", battery: 73 }
-    ];
-
     // Get DOM Elements
     let elements = {};
 
@@ -391,6 +1041,8 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // Ensure WebSocket is ready now that DOM is loaded
     initSocket();
+    setupEstopControls();
+    setupVideoRenderer();
 
     // Fallback: if socket already open (e.g., quick reload), mark connected
     setTimeout(() => {
@@ -444,9 +1096,6 @@ document.addEventListener('DOMContentLoaded', function () {
             console.log('🤖 Initializing Robot Controller/Dashboard...');
             initElements();
             setupEventListeners();
-            updateTimestamp();
-            setInterval(updateTimestamp, 1000);
-            startAdvancedDataSimulation();
 
             // If this is a split page containing only the dashboard, initialize it now
             const onlyDashboard = document.getElementById('dashboardPage') && !document.getElementById('controllerPage');
@@ -462,8 +1111,6 @@ document.addEventListener('DOMContentLoaded', function () {
         updateTimestamp();
         setInterval(updateTimestamp, 1000);
 
-        // Start enhanced data simulation
-        startAdvancedDataSimulation();
         if (isRobotPage && elements.loadingScreen) {
             const params = new URLSearchParams(window.location.search);
             const preferredView = params.get('view');
@@ -1263,8 +1910,9 @@ document.addEventListener('DOMContentLoaded', function () {
         if (elements.batteryLevel) {
             elements.batteryLevel.style.width = '0%';
             setTimeout(() => {
+                const battery = (telemetryStore.devices[telemetryStore.shown] || {}).battery;
                 elements.batteryLevel.style.transition = 'width 2s cubic-bezier(0.16, 1, 0.3, 1)';
-                elements.batteryLevel.style.width = `${appState.battery}%`;
+                elements.batteryLevel.style.width = `${battery === undefined ? 0 : battery}%`;
             }, 500);
         }
 
@@ -1430,92 +2078,127 @@ document.addEventListener('DOMContentLoaded', function () {
 
         if (typeof Highcharts === 'undefined') {
             console.error("❌ Highcharts library not loaded!");
-            chartContainer.innerHTML = '<div style="display:flex;justify-content:center;align-items:center;height:100%;color:red;text-align:center;">Highcharts library not loaded.<br>Please check internet connection.</div>';
+            chartContainer.innerHTML = '<div style="display:flex;justify-content:center;align-items:center;height:100%;color:#ff6b6b;font-size:16px;">Highcharts library not loaded. Check internet connection.</div>';
             return;
         }
 
-        // Fetch data from backend
+        // Recorded history only: without it the chart starts empty and
+        // fills from live telemetry (renderTelemetry adds the points)
         let data = [];
+        let note = null;
         try {
             console.log("Fetching battery history...");
             const response = await fetch('/api/battery-history/');
-            if (response.ok) {
-                data = await response.json();
-                console.log(`✅ Fetched ${data.length} data points`);
-            } else {
-                console.error("❌ Failed to fetch battery history:", response.status);
-                throw new Error("Fetch failed");
-            }
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            data = await response.json();
+            console.log(`✅ Fetched ${data.length} data points`);
         } catch (e) {
-            console.warn("⚠️ Using fallback data for chart:", e);
-             // Fallback
-             const now = new Date();
-             data = batteryChartData.map((d, i) => {
-                 const timeParts = d.time.split(':');
-                 const date = new Date(now);
-                 date.setHours(parseInt(timeParts[0]), parseInt(timeParts[1]), 0, 0);
-                 return [date.getTime(), d.battery];
-             });
+            console.warn("⚠️ Battery history unavailable:", e.message);
+            note = 'Battery history unavailable, showing live telemetry only';
         }
-
-        if (!data || data.length === 0) {
-             console.warn("⚠️ No data available, using empty dataset");
-             data = [];
+        if (!note && (!data || data.length === 0)) {
+            data = [];
+            note = 'No battery history recorded yet';
         }
 
         try {
-            appState.batteryChart = Highcharts.chart('batteryChart', {
+            appState.batteryChart = telemetryStore.chart = Highcharts.chart('batteryChart', {
                 chart: {
                     zooming: {
                         type: 'x'
                     },
-                    backgroundColor: 'transparent'
+                    backgroundColor: 'transparent',
+                    style: {
+                        fontFamily: 'Inter, system-ui, sans-serif'
+                    }
                 },
                 title: {
-                    text: 'Battery Level Over Time',
-                    style: { color: '#333' }
+                    text: 'Robot Battery Level Over Time',
+                    style: {
+                        color: '#333',
+                        fontSize: '18px',
+                        fontWeight: '600'
+                    }
                 },
                 subtitle: {
-                    text: document.ontouchstart === undefined ?
+                    text: note || (document.ontouchstart === undefined ?
                         'Click and drag in the plot area to zoom in' :
-                        'Pinch the chart to zoom in'
+                        'Pinch the chart to zoom in'),
+                    style: {
+                        color: note ? '#ff6b6b' : '#666'
+                    }
                 },
                 xAxis: {
                     type: 'datetime',
-                    labels: { style: { color: '#666' } }
+                    labels: {
+                        style: { color: '#666' }
+                    },
+                    lineColor: '#ddd',
+                    tickColor: '#ddd'
                 },
                 yAxis: {
                     title: {
-                        text: 'Battery Level (%)'
+                        text: 'Battery Level (%)',
+                        style: { color: '#666' }
                     },
                     min: 0,
                     max: 100,
-                    labels: { style: { color: '#666' } }
+                    labels: {
+                        style: { color: '#666' },
+                        format: '{value}%'
+                    },
+                    gridLineColor: 'rgba(0,0,0,0.1)'
                 },
                 legend: {
                     enabled: false
                 },
+                tooltip: {
+                    backgroundColor: 'rgba(255, 255, 255, 0.95)',
+                    borderColor: '#ccc',
+                    borderRadius: 8,
+                    shadow: true,
+                    style: {
+                        color: '#333'
+                    },
+                    xDateFormat: '%Y-%m-%d %H:%M:%S',
+                    valueSuffix: '%'
+                },
                 plotOptions: {
                     area: {
-                        marker: {
-                            radius: 2
-                        },
-                        lineWidth: 1,
-                        color: {
+                        fillColor: {
                             linearGradient: {
                                 x1: 0,
                                 y1: 0,
                                 x2: 0,
                                 y2: 1
                             },
+                            stops: [
+                                [0, 'rgba(199, 113, 243, 0.6)'],
+                                [0.5, 'rgba(76, 175, 254, 0.3)'],
+                                [1, 'rgba(76, 175, 254, 0.05)']
+                            ]
+                        },
+                        marker: {
+                            enabled: false,
+                            radius: 2,
+                            states: {
+                                hover: {
+                                    enabled: true,
+                                    radius: 5
+                                }
+                            }
+                        },
+                        lineWidth: 2,
+                        lineColor: {
+                            linearGradient: { x1: 0, y1: 0, x2: 1, y2: 0 },
                             stops: [
                                 [0, 'rgb(199, 113, 243)'],
-                                [0.7, 'rgb(76, 175, 254)']
+                                [1, 'rgb(76, 175, 254)']
                             ]
                         },
                         states: {
                             hover: {
-                                lineWidth: 1
+                                lineWidth: 2
                             }
                         },
                         threshold: null
@@ -1528,12 +2211,30 @@ document.addEventListener('DOMContentLoaded', function () {
                 }],
                 credits: {
                     enabled: false
+                },
+                responsive: {
+                    rules: [{
+                        condition: {
+                            maxWidth: 500
+                        },
+                        chartOptions: {
+                            title: {
+                                style: { fontSize: '14px' }
+                            },
+                            subtitle: {
+                                style: { fontSize: '10px' }
+                            }
+                        }
+                    }]
                 }
             });
             console.log("✅ Highcharts initialized successfully");
+            // Live points of the robot already on screen
+            telemetryStore.changed.add('battery');
+            scheduleTelemetryRender();
         } catch (err) {
             console.error("❌ Error creating Highcharts:", err);
-            chartContainer.innerHTML = `<div style="color:red;padding:20px;">Error creating chart: ${err.message}</div>`;
+            chartContainer.innerHTML = `<div style="color:#ff6b6b;padding:20px;text-align:center;">Error creating chart: ${err.message}</div>`;
         }
     }
 
@@ -1717,6 +2418,10 @@ document.addEventListener('DOMContentLoaded', function () {
 
             joystickElement.classList.add('active');
             appState.joysticks[type].active = true;
+            if (type === 'robot') {
+                startDriveKeepalive();
+            }
+            startJoystickSampler();
 
             // Enhanced visual feedback
             knobElement.style.transform = 'translate(-50%, -50%) scale(1.1)';
@@ -1751,15 +2456,10 @@ document.addEventListener('DOMContentLoaded', function () {
             const normalizedX = deltaX / maxDistance;
             const normalizedY = -deltaY / maxDistance;
 
+            // Only recorded here, the frame sampler sends it
             appState.joysticks[type].x = normalizedX;
             appState.joysticks[type].y = normalizedY;
-
-            // Debug: show drag movement per event
-            try {
-                console.log(`Drag → ${type}: ${normalizedX.toFixed(2)}, ${normalizedY.toFixed(2)}`);
-            } catch {}
-
-            updatePositionFromJoystick(type, normalizedX, normalizedY);
+            startJoystickSampler();
 
             e.preventDefault();
         }
@@ -1783,20 +2483,11 @@ document.addEventListener('DOMContentLoaded', function () {
             appState.joysticks[type].x = 0;
             appState.joysticks[type].y = 0;
 
-            // Send a stop/zero command when joystick is released
+            // Zero goes out now, whatever the rate limit or dead-band
             if (type === 'robot') {
-                sendControlMessage({
-                    type: 'robot_move',
-                    x: 0,
-                    y: 0
-                });
-            } else if (type === 'camera') {
-                sendControlMessage({
-                    type: 'camera_move',
-                    x: 0,
-                    y: 0
-                });
+                stopDriveKeepalive();
             }
+            sendJoystickCommand(type, 0, 0);
 
             document.removeEventListener('mousemove', drag);
             document.removeEventListener('mouseup', stopDrag);
@@ -1808,74 +2499,91 @@ document.addEventListener('DOMContentLoaded', function () {
         knobElement.addEventListener('touchstart', startDrag, { passive: false });
     }
 
-    // Enhanced position updates + WebSocket sending
-    function updatePositionFromJoystick(type, x, y) {
-        // sensitivity logic — keep original
-        const sensitivity = 0.15;
-
-        // Debug log for joystick values
-        try {
-            console.log("Joystick:", type, "X:", x.toFixed(2), "Y:", y.toFixed(2));
-        } catch {}
-
-        if (type === 'robot') {
-            appState.robotPosition.x += x * sensitivity;
-            appState.robotPosition.y += y * sensitivity;
-
-            appState.robotPosition.x = Math.max(-99.99, Math.min(99.99, appState.robotPosition.x));
-            appState.robotPosition.y = Math.max(-99.99, Math.min(99.99, appState.robotPosition.y));
+    // One requestAnimationFrame loop samples both joysticks while either is held
+    const joystickSampler = {
+        frame: null,
+        lastFrameAt: null,
+        lastSentAt: { robot: -Infinity, camera: -Infinity },
+        lastSent: { robot: { x: 0, y: 0 }, camera: { x: 0, y: 0 } }
+    };
 
-            // SEND ROBOT JOYSTICK DATA as robot_move control message
-            sendControlMessage({
-                type: 'robot_move',
-                x: appState.robotPosition.x,
-                y: appState.robotPosition.y
-            });
+    function startJoystickSampler() {
+        if (joystickSampler.frame === null) {
+            joystickSampler.lastFrameAt = null;
+            joystickSampler.frame = requestAnimationFrame(sampleJoysticks);
+        }
+    }
 
-            updateStatusDisplay('position');
+    function sampleJoysticks(now) {
+        const elapsed = joystickSampler.lastFrameAt === null ? 16.7 : now - joystickSampler.lastFrameAt;
+        joystickSampler.lastFrameAt = now;
+        let active = false;
+        ['robot', 'camera'].forEach((type) => {
+            const joystick = appState.joysticks[type];
+            if (!joystick.active) return;
+            active = true;
+            updatePositionFromJoystick(type, joystick.x, joystick.y, elapsed);
+
+            const last = joystickSampler.lastSent[type];
+            const moved = Math.max(Math.abs(joystick.x - last.x), Math.abs(joystick.y - last.y));
+            if (moved < joystickConfig.deadBand) return;
+            if (now - joystickSampler.lastSentAt[type] < 1000 / joystickConfig.maxRateHz) return;
+            sendJoystickCommand(type, joystick.x, joystick.y, now);
+        });
+        joystickSampler.frame = active ? requestAnimationFrame(sampleJoysticks) : null;
+    }
 
-        } else if (type === 'camera') {
-            appState.cameraPosition.x += x * sensitivity;
-            appState.cameraPosition.y += y * sensitivity;
+    function sendJoystickCommand(type, x, y, now = performance.now()) {
+        const command = {
+            type: type === 'robot' ? 'robot_move' : 'camera_move',
+            x: Math.round(x * 1000) / 1000,
+            y: Math.round(y * 1000) / 1000
+        };
+        if (type === 'robot' && (x || y)) {
+            // Repeated by the keepalive while the joystick is held
+            driveKeepalive.lastCommand = command;
+        }
+        if (sendControlMessage(command, false)) {
+            joystickSampler.lastSent[type] = { x: command.x, y: command.y };
+            joystickSampler.lastSentAt[type] = now;
+        }
+        if (joystickConfig.debug) {
+            console.log(`Joystick → ${type}: ${command.x.toFixed(2)}, ${command.y.toFixed(2)}`);
+        }
+    }
 
-            appState.cameraPosition.x = Math.max(-99.99, Math.min(99.99, appState.cameraPosition.x));
-            appState.cameraPosition.y = Math.max(-99.99, Math.min(99.99, appState.cameraPosition.y));
+    // On-screen position estimate, integrated per frame from the deflection
+    function updatePositionFromJoystick(type, x, y, elapsedMs) {
+        // Same speed as before at 60 frames per second
+        const step = 0.15 * (elapsedMs / 16.7);
+        const position = type === 'robot' ? appState.robotPosition : appState.cameraPosition;
 
-            // SEND CAMERA JOYSTICK DATA as camera_move control message
-            sendControlMessage({
-                type: 'camera_move',
-                x: appState.cameraPosition.x,
-                y: appState.cameraPosition.y
-            });
+        position.x = Math.max(-99.99, Math.min(99.99, position.x + x * step));
+        position.y = Math.max(-99.99, Math.min(99.99, position.y + y * step));
 
-            updateStatusDisplay('camera');
-        }
+        updateStatusDisplay(type === 'robot' ? 'position' : 'camera');
     }
 
     // Enhanced status display updates
     function updateStatusDisplay(type) {
         if (type === 'position') {
-            if (elements.positionX) {
-                elements.positionX.textContent = appState.robotPosition.x.toFixed(2);
-                elements.positionX.classList.add('updating');
-                setTimeout(() => elements.positionX.classList.remove('updating'), 300);
-            }
-            if (elements.positionY) {
-                elements.positionY.textContent = appState.robotPosition.y.toFixed(2);
-                elements.positionY.classList.add('updating');
-                setTimeout(() => elements.positionY.classList.remove('updating'), 300);
-            }
+            showStatusValue(elements.positionX, appState.robotPosition.x);
+            showStatusValue(elements.positionY, appState.robotPosition.y);
         } else if (type === 'camera') {
-            if (elements.cameraX) {
-                elements.cameraX.textContent = appState.cameraPosition.x.toFixed(2);
-                elements.cameraX.classList.add('updating');
-                setTimeout(() => elements.cameraX.classList.remove('updating'), 300);
-            }
-            if (elements.cameraY) {
-                elements.cameraY.textContent = appState.cameraPosition.y.toFixed(2);
-                elements.cameraY.classList.add('updating');
-                setTimeout(() => elements.cameraY.classList.remove('updating'), 300);
-            }
+            showStatusValue(elements.cameraX, appState.cameraPosition.x);
+            showStatusValue(elements.cameraY, appState.cameraPosition.y);
+        }
+    }
+
+    function showStatusValue(element, value) {
+        if (!element) return;
+        const text = value.toFixed(2);
+        if (element.textContent === text) return;
+        element.textContent = text;
+        // One highlight timer per element at a time, not one per update
+        if (!element.classList.contains('updating')) {
+            element.classList.add('updating');
+            setTimeout(() => element.classList.remove('updating'), 300);
         }
     }
 
@@ -1885,7 +2593,7 @@ document.addEventListener('DOMContentLoaded', function () {
         if (elements.positionY) elements.positionY.textContent = appState.robotPosition.y.toFixed(2);
         if (elements.cameraX) elements.cameraX.textContent = appState.cameraPosition.x.toFixed(2);
         if (elements.cameraY) elements.cameraY.textContent = appState.cameraPosition.y.toFixed(2);
-        // Controller sidebar legacy values remain handled in simulation
+        // Battery and signal are drawn from telemetryStore by renderTelemetry
     }
 
     // Enhanced status entrance animation
@@ -1919,106 +2627,10 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    // Enhanced data simulation
-    function startAdvancedDataSimulation() {
-        // Signal simulation per device
-        setInterval(() => {
-            if ((appState.currentPage === 'controller' || appState.currentPage === 'dashboard')) {
-                Object.keys(appState.devices).forEach(id => {
-                    const dev = appState.devices[id];
-                    const variation = Math.random() * 8 - 4;
-                    dev.signal = Math.max(70, Math.min(100, dev.signal + variation));
-                });
-
-                // Update controller sidebar signal (use active device for display if available)
-                const activeDev = appState.devices[appState.activeDevice];
-                if (elements.signalStrength && activeDev) {
-                    elements.signalStrength.textContent = `${Math.round(activeDev.signal)}%`;
-                }
-                if (appState.currentPage === 'dashboard') updateActiveDeviceUI();
-            }
-        }, 3000);
-
-        // Battery simulation per device
-        setInterval(() => {
-            if ((appState.currentPage === 'controller' || appState.currentPage === 'dashboard')) {
-                Object.keys(appState.devices).forEach(id => {
-                    const dev = appState.devices[id];
-                    dev.battery = Math.max(15, dev.battery - 0.02);
-                });
-
-                const activeDev = appState.devices[appState.activeDevice];
-                if (elements.batteryLevel && elements.batteryPercentage && activeDev) {
-                    elements.batteryLevel.style.width = `${activeDev.battery}%`;
-                    elements.batteryPercentage.textContent = `${Math.round(activeDev.battery)}%`;
-
-                    if (activeDev.battery < 25) {
-                        elements.batteryLevel.style.background = 'linear-gradient(90deg, #ef4444 0%, #dc2626 100%)';
-                        if (activeDev.battery < 15) {
-                            elements.batteryLevel.style.animation = 'batteryBlink 1s ease-in-out infinite';
-                        }
-                    } else if (activeDev.battery < 50) {
-                        elements.batteryLevel.style.background = 'linear-gradient(90deg, #f97316 0%, #ea580c 100%)';
-                        elements.batteryLevel.style.animation = '';
-                    } else {
-                        elements.batteryLevel.style.background = 'linear-gradient(90deg, #10b981 0%, #1FB8CD 100%)';
-                        elements.batteryLevel.style.animation = '';
-                    }
-                }
-
-                if (appState.currentPage === 'dashboard') updateActiveDeviceUI();
-            }
-        }, 12000);
-
-        // CPU/Temp/Network simulation per device
-        setInterval(() => {
-            if (appState.currentPage === 'dashboard') {
-                Object.keys(appState.devices).forEach(id => {
-                    const dev = appState.devices[id];
-                    dev.cpu = Math.max(15, Math.min(95, dev.cpu + (Math.random() * 10 - 5)));
-                    dev.temperature = Math.max(30, Math.min(70, dev.temperature + (Math.random() * 4 - 2)));
-                    dev.memory = Math.max(20, Math.min(95, dev.memory + (Math.random() * 6 - 3)));
-                    dev.storage = Math.max(10, Math.min(90, dev.storage + (Math.random() * 3 - 1.5)));
-                    dev.download = Math.max(50, Math.min(200, dev.download + (Math.random() * 20 - 10)));
-                    dev.upload = Math.max(10, Math.min(80, dev.upload + (Math.random() * 10 - 5)));
-                });
-
-                updateActiveDeviceUI();
-            }
-        }, 6000);
-    }
-
+    // Device buttons pick which robot's telemetry the dashboard shows
     function updateActiveDeviceUI() {
         if (!document.getElementById('dashboardPage')) return;
-        const dev = appState.devices[appState.activeDevice];
-        if (!dev) return;
-
-        if (elements.activeDeviceTitle) {
-            elements.activeDeviceTitle.textContent = `${dev.name} — Live Metrics`;
-        }
-        if (elements.batteryValue) elements.batteryValue.textContent = `${Math.round(dev.battery)}%`;
-        if (elements.cpuValue) elements.cpuValue.textContent = `${Math.round(dev.cpu)}%`;
-        if (elements.temperatureValue) elements.temperatureValue.textContent = `${Math.round(dev.temperature)}°C`;
-        if (elements.signalValue) elements.signalValue.textContent = `${Math.round(dev.signal)}%`;
-
-        if (elements.cpuBar) {
-            elements.cpuBar.style.width = `${Math.round(dev.cpu)}%`;
-            elements.cpuBar.style.background = '#06B6D4';
-        }
-        if (elements.memoryBar) {
-            elements.memoryBar.style.width = `${Math.round(dev.memory)}%`;
-            elements.memoryBar.style.background = '#B4413C';
-        }
-        if (elements.storageBar) {
-            elements.storageBar.style.width = `${Math.round(dev.storage)}%`;
-            elements.storageBar.style.background = '#5D878F';
-        }
-        if (elements.cpuPercent) elements.cpuPercent.textContent = `${Math.round(dev.cpu)}%`;
-        if (elements.memoryPercent) elements.memoryPercent.textContent = `${Math.round(dev.memory)}%`;
-        if (elements.storagePercent) elements.storagePercent.textContent = `${Math.round(dev.storage)}%`;
-        if (elements.networkSignal) elements.networkSignal.textContent = `${Math.round(dev.signal)}%`;
-        if (elements.networkDownload) elements.networkDownload.textContent = `${Math.round(dev.download)} Mbps`;
-        if (elements.networkUpload) elements.networkUpload.textContent = `${Math.round(dev.upload)} Mbps`;
+        showDeviceSlot(appState.activeDevice);
     }
 
     // Handle window resize
@@ -0,0 +1,118 @@
+"""
+Viewer Subscriptions
+Which dashboards want which robot's streams. Dashboards send
+
+    {"type": "subscribe",   "device_id": "robot_01", "streams": ["video", "telemetry"]}
+    {"type": "unsubscribe", "device_id": "robot_01", "streams": ["video"]}
+
+device_id "*" means every robot; leaving out streams means all of
+DEFAULT_STREAMS. The index is kept from (robot, stream) to viewers, so a
+robot's broadcast only touches the dashboards watching it.
+
+A dashboard that never subscribes keeps the old behaviour and receives all
+robots' video, telemetry and status. Its first subscribe or unsubscribe
+of one of those streams drops that implicit wildcard, leaving exactly what
+it asked for. Opt-in streams (sensors, fleet) are added to or removed from
+the wildcard, so the older sensor_subscribe spelling keeps working as before.
+"""
+
+from collections import defaultdict
+
+WILDCARD = "*"
+STREAM_VIDEO = "video"
+STREAM_TELEMETRY = "telemetry"
+STREAM_STATUS = "status"
+STREAM_SENSORS = "sensors"
+STREAM_FLEET = "fleet"          # fleet_summary, subscribed with device_id "*"
+# Binary sensor streams and fleet summaries are opt-in, so not part of the defaults
+DEFAULT_STREAMS = (STREAM_VIDEO, STREAM_TELEMETRY, STREAM_STATUS)
+STREAMS = DEFAULT_STREAMS + (STREAM_SENSORS, STREAM_FLEET)
+
+
+class InvalidSubscription(ValueError):
+    """A subscribe/unsubscribe naming an unknown stream"""
+
+
+def parse_streams(streams):
+    """Stream names from a subscribe message (None = the defaults)"""
+    if streams is None:
+        return DEFAULT_STREAMS
+    if isinstance(streams, str):
+        streams = [streams]
+    unknown = [stream for stream in streams if stream not in STREAMS]
+    if unknown:
+        raise InvalidSubscription(f"Unknown stream(s): {', '.join(map(str, unknown))}")
+    return tuple(streams)
+
+
+class SubscriptionIndex:
+    """Reverse index {(device_id, stream): {connection_id: consumer}}"""
+
+    def __init__(self):
+        self.subscribers = defaultdict(dict)
+        self.by_viewer = defaultdict(set)       # {connection_id: {(device_id, stream)}}
+        self.legacy = set()                     # viewers still on the implicit wildcard
+
+    def add_viewer(self, consumer):
+        """A new dashboard, subscribed to everything until it says otherwise"""
+        self.legacy.add(consumer.connection_id)
+        for stream in DEFAULT_STREAMS:
+            self._add(consumer, WILDCARD, stream)
+
+    def _add(self, consumer, device_id, stream):
+        self.subscribers[(device_id, stream)][consumer.connection_id] = consumer
+        self.by_viewer[consumer.connection_id].add((device_id, stream))
+
+    def _discard(self, connection_id, device_id, stream):
+        key = (device_id, stream)
+        viewers = self.subscribers.get(key)
+        if viewers is not None:
+            viewers.pop(connection_id, None)
+            if not viewers:
+                del self.subscribers[key]
+        self.by_viewer.get(connection_id, set()).discard(key)
+
+    def _leave_legacy(self, consumer, streams):
+        if consumer.connection_id in self.legacy and set(streams) & set(DEFAULT_STREAMS):
+            self.legacy.discard(consumer.connection_id)
+            for stream in DEFAULT_STREAMS:
+                self._discard(consumer.connection_id, WILDCARD, stream)
+
+    def subscribe(self, consumer, device_id=WILDCARD, streams=None):
+        streams = parse_streams(streams)
+        self._leave_legacy(consumer, streams)
+        for stream in streams:
+            self._add(consumer, device_id or WILDCARD, stream)
+
+    def unsubscribe(self, consumer, device_id=WILDCARD, streams=None):
+        streams = parse_streams(streams)
+        self._leave_legacy(consumer, streams)
+        for stream in streams:
+            self._discard(consumer.connection_id, device_id or WILDCARD, stream)
+
+    def remove(self, consumer):
+        """Forget a disconnected dashboard"""
+        self.legacy.discard(consumer.connection_id)
+        for device_id, stream in self.by_viewer.pop(consumer.connection_id, ()):
+            self._discard(consumer.connection_id, device_id, stream)
+
+    def viewers(self, device_id, stream):
+        """Dashboards to send this robot's stream to"""
+        direct = self.subscribers.get((device_id, stream))
+        wildcard = self.subscribers.get((WILDCARD, stream))
+        if not wildcard:
+            return list(direct.values()) if direct else []
+        if not direct:
+            return list(wildcard.values())
+        return list({**wildcard, **direct}.values())
+
+    def of(self, consumer):
+        """One dashboard's subscriptions as {device_id: [streams]}"""
+        result = defaultdict(list)
+        for device_id, stream in sorted(self.by_viewer.get(consumer.connection_id, ())):
+            result[device_id].append(stream)
+        return dict(result)
+
+
+# Global subscription index for this server process
+subscriptions = SubscriptionIndex()
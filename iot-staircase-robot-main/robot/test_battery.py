@@ -0,0 +1,82 @@
+"""
+Battery Estimator Test Suite
+Tests the incremental time-to-empty regression
+"""
+
+from django.test import SimpleTestCase
+from robot.battery import BatteryEstimator, battery_estimators, record_battery, all_estimates, forget_battery
+
+
+class BatteryEstimatorTests(SimpleTestCase):
+    """Test the online discharge regression"""
+
+    def test_needs_samples_before_estimating(self):
+        """No estimate until a slope can be fitted"""
+        estimator = BatteryEstimator()
+        self.assertIsNone(estimator.estimate())
+        estimator.update(90, now=0)
+        estimator.update(89, now=60)
+        self.assertIsNone(estimator.estimate())
+
+    def test_linear_discharge(self):
+        """A steady 1% per minute drain empties in level minutes"""
+        estimator = BatteryEstimator()
+        for minute in range(11):
+            estimator.update(80 - minute, now=minute * 60)
+
+        estimate = estimator.estimate()
+        self.assertAlmostEqual(estimate["discharge_rate"], 1.0, places=3)
+        self.assertAlmostEqual(estimate["battery"], 70.0, places=3)
+        self.assertAlmostEqual(estimate["time_to_empty"], 70 * 60, delta=1)
+        self.assertLessEqual(estimate["time_to_empty_lower"], estimate["time_to_empty"])
+        self.assertGreaterEqual(estimate["time_to_empty_upper"], estimate["time_to_empty"])
+
+    def test_weights_recent_load(self):
+        """A change in drain rate shows up once recent samples dominate"""
+        estimator = BatteryEstimator(half_life=60)
+        for second in range(0, 600, 10):
+            estimator.update(100 - second / 600, now=second)        # 0.1 %/min
+        for second in range(600, 1200, 10):
+            estimator.update(99 - (second - 600) / 60, now=second)  # 1 %/min climbing
+
+        self.assertGreater(estimator.estimate()["discharge_rate"], 0.8)
+
+    def test_late_sample_decayed(self):
+        """An out-of-order sample counts for what it would weigh by now and doesn't move the latest level"""
+        estimator = BatteryEstimator(half_life=60)
+        estimator.update(90, now=0)
+        estimator.update(80, now=120)
+        estimator.update(85, now=60)
+
+        self.assertEqual(estimator.last_time, 120)
+        self.assertEqual(estimator.last_battery, 80)
+        # 0.25 (first sample, decayed 120s) + 1 + 0.5 (late sample, 60s old)
+        self.assertAlmostEqual(estimator.sw, 1.75)
+
+    def test_charging_has_no_time_to_empty(self):
+        """A rising battery level is not draining"""
+        estimator = BatteryEstimator()
+        for minute in range(5):
+            estimator.update(50 + minute, now=minute * 60)
+        self.assertIsNone(estimator.estimate()["time_to_empty"])
+
+    def test_registry_per_device(self):
+        """Estimates are kept separately for each robot"""
+        battery_estimators.clear()
+        self.addCleanup(battery_estimators.clear)
+        for minute in range(4):
+            record_battery("robot_01", 90 - minute, now=minute * 60)
+            record_battery("robot_02", 60 - 2 * minute, now=minute * 60)
+
+        estimates = all_estimates()
+        self.assertEqual(set(estimates), {"robot_01", "robot_02"})
+        self.assertAlmostEqual(estimates["robot_02"]["discharge_rate"], 2.0, places=3)
+
+    def test_forget_disconnected_robot(self):
+        """A forgotten robot is no longer reported"""
+        battery_estimators.clear()
+        self.addCleanup(battery_estimators.clear)
+        for minute in range(4):
+            record_battery("robot_01", 90 - minute, now=minute * 60)
+        forget_battery("robot_01")
+        self.assertEqual(all_estimates(), {})
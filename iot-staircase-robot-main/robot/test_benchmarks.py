@@ -0,0 +1,61 @@
+"""
+Benchmark Regression Suite
+Runs robot.benchmarks and compares against robot/benchmark_baselines.json.
+Skipped unless ROBOT_BENCHMARKS is set:
+
+    ROBOT_BENCHMARKS=1 python manage.py test robot.test_benchmarks       # compare
+    ROBOT_BENCHMARKS=update python manage.py test robot.test_benchmarks  # re-baseline
+
+ROBOT_BENCHMARK_TOLERANCE overrides the allowed relative change (default 0.25).
+"""
+
+import os
+import unittest
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from robot import benchmarks
+
+
+BENCHMARK_MODE = os.environ.get('ROBOT_BENCHMARKS', '')
+
+
+class RegressionCheckTests(SimpleTestCase):
+    """Test the baseline comparison itself"""
+
+    def test_within_tolerance(self):
+        baseline = {"relay": {"throughput": 100.0, "p99_ms": 10.0}}
+        result = {"relay": {"throughput": 90.0, "p99_ms": 11.0}}
+        self.assertEqual(benchmarks.find_regressions(result, baseline, 0.25), [])
+
+    def test_throughput_and_latency_regressions(self):
+        baseline = {"relay": {"throughput": 100.0, "p99_ms": 10.0}}
+        result = {"relay": {"throughput": 50.0, "p99_ms": 20.0}}
+        self.assertEqual(len(benchmarks.find_regressions(result, baseline, 0.25)), 2)
+
+    def test_new_scenario_has_no_baseline(self):
+        result = {"new": {"throughput": 1.0, "p99_ms": 1000.0}}
+        self.assertEqual(benchmarks.find_regressions(result, {}, 0.25), [])
+
+
+@unittest.skipUnless(BENCHMARK_MODE, "set ROBOT_BENCHMARKS=1 to run benchmarks")
+@override_settings(CHANNEL_LAYERS=benchmarks.IN_MEMORY_CHANNEL_LAYERS)
+class ConsumerBenchmarkTests(TransactionTestCase):
+    """Benchmark the consumer hot paths against stored baselines"""
+
+    async def test_hot_paths(self):
+        results = await benchmarks.run_all()
+
+        print("\n📊 Consumer benchmarks")
+        for name, result in results.items():
+            print(f"   {name:<26} {result['throughput']:>9} ops/s   "
+                  f"p50 {result['p50_ms']:>8} ms   p99 {result['p99_ms']:>8} ms")
+
+        if BENCHMARK_MODE == 'update':
+            benchmarks.save_baselines(results)
+            print(f"💾 Baselines written to {benchmarks.BASELINE_PATH}")
+            return
+
+        tolerance = float(os.environ.get('ROBOT_BENCHMARK_TOLERANCE', benchmarks.DEFAULT_TOLERANCE))
+        regressions = benchmarks.find_regressions(results, benchmarks.load_baselines(), tolerance)
+        self.assertEqual(regressions, [], "Benchmark regressions:\n" + "\n".join(regressions))
@@ -0,0 +1,94 @@
+"""
+Clock Sync Test Suite
+Tests the NTP-style offset/drift estimator and frame timestamp conversion
+"""
+
+import random
+import time
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase
+
+from robot.clocksync import ClockSync
+from robot.consumers import TelemetryConsumer
+
+
+def exchange(clock, server_t1, offset, up, down, hold=0.001):
+    """One ping/pong with the robot clock `offset` ahead and the given one-way delays"""
+    t2 = server_t1 + up + offset
+    t3 = t2 + hold
+    t4 = t3 - offset + down
+    return clock.add(server_t1, t2, t3, t4)
+
+
+class ClockSyncTests(SimpleTestCase):
+    """Test offset and drift estimation"""
+
+    def test_symmetric_exchange_is_exact(self):
+        clock = ClockSync()
+        offset, delay = exchange(clock, 1000.0, offset=2.5, up=0.02, down=0.02)
+        self.assertAlmostEqual(offset, 2.5)
+        self.assertAlmostEqual(delay, 0.04)
+        self.assertAlmostEqual(clock.to_server_time(1002.5 + 10.0), 1010.0)
+
+    def test_lowest_delay_samples_win(self):
+        """Queuing on one leg skews a sample; the filter prefers quiet exchanges"""
+        rng = random.Random(1)
+        clock = ClockSync()
+        for i in range(16):
+            queued = rng.uniform(0.0, 0.2) if i % 4 else 0.0
+            exchange(clock, 1000.0 + i * 5, offset=-1.0, up=0.01 + queued, down=0.01)
+        self.assertAlmostEqual(clock.offset, -1.0, delta=0.005)
+
+    def test_drift(self):
+        """A robot clock running 100 ppm fast is tracked between samples"""
+        clock = ClockSync()
+        for i in range(12):
+            t = 1000.0 + i * 5
+            exchange(clock, t, offset=0.3 + 100e-6 * (t - 1000.0), up=0.01, down=0.01)
+        self.assertAlmostEqual(clock.drift * 1e6, 100.0, delta=1.0)
+        later = 1000.0 + 120
+        robot_time = later + 0.3 + 100e-6 * 120
+        self.assertAlmostEqual(clock.to_server_time(robot_time), later, delta=0.0005)
+
+    def test_rejects_impossible_samples(self):
+        clock = ClockSync()
+        self.assertIsNone(clock.add(1000.0, 1000.5, 1000.4, 1000.1))
+        self.assertIsNone(clock.add(None, 1.0, 2.0, 3.0))
+        self.assertFalse(clock.synced)
+        self.assertEqual(clock.to_server_time(5.0), 5.0)
+
+
+class FrameTimestampTests(TransactionTestCase):
+    """Test clock sync over the WebSocket"""
+
+    async def test_frames_carry_server_time(self):
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_clock")
+        await robot.connect()
+        await robot.receive_json_from()
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+
+        # The robot's clock is 30 s ahead
+        now = time.time()
+        await robot.send_json_to({"type": "pong", "seq": 1, "t1": now - 0.002,
+                                  "t2": now + 30.0 - 0.001, "t3": now + 30.0 - 0.0005})
+        capture = (now + 30.0) * 1000.0
+        await robot.send_json_to({"type": "video_frame", "frame_data": "abc", "frame_number": 1,
+                                  "client_ts": capture, "sent_ts": capture + 5.0})
+        await robot.receive_json_from()
+
+        frame = await website.receive_json_from()
+        self.assertAlmostEqual(frame["capture_ts"], now * 1000.0, delta=50)
+        self.assertAlmostEqual(frame["sent_ts"] - frame["capture_ts"], 5.0, delta=0.5)
+        self.assertGreaterEqual(frame["server_ts"], frame["capture_ts"])
+
+        # Dashboards sync their own clock with clock_sync
+        await website.send_json_to({"type": "clock_sync", "t1": 123.0})
+        reply = await website.receive_json_from()
+        self.assertEqual(reply["t1"], 123.0)
+        self.assertLessEqual(reply["t2"], reply["t3"])
+
+        await website.disconnect()
+        await robot.disconnect()
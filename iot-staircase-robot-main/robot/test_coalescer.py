@@ -0,0 +1,83 @@
+"""
+Telemetry Coalescing Test Suite
+Tests batched, changed-fields-only telemetry delivery
+"""
+
+import asyncio
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from robot.coalescer import TelemetryCoalescer
+from robot.consumers import TelemetryConsumer
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.sent = []
+
+    async def put(self, lane, text_data=None, bytes_data=None, key=None):
+        self.sent.append(text_data)
+
+
+class TelemetryCoalescerTests(SimpleTestCase):
+    """Test what goes into a batch"""
+
+    async def test_only_changed_fields(self):
+        coalescer = TelemetryCoalescer(RecordingOutbox(), interval=3600)
+        self.addCleanup(coalescer.close)
+
+        coalescer.add({"type": "telemetry_update", "device_id": "r1", "battery": 90, "cpu": 10})
+        coalescer.add({"type": "telemetry_update", "device_id": "r1", "battery": 89, "cpu": 10})
+        coalescer.add({"type": "telemetry_update", "device_id": "r2", "battery": 50})
+        self.assertEqual(coalescer.changes(), {"r1": {"battery": 89, "cpu": 10}, "r2": {"battery": 50}})
+
+        coalescer.add({"type": "telemetry_update", "device_id": "r1", "battery": 88, "cpu": 10})
+        coalescer.add({"type": "telemetry_update", "device_id": "r2", "battery": 50})
+        self.assertEqual(coalescer.changes(), {"r1": {"battery": 88}})
+        self.assertEqual(coalescer.changes(), {})
+
+        # A robot that reconnects is sent in full again
+        coalescer.forget("r2")
+        coalescer.add({"type": "telemetry_update", "device_id": "r2", "battery": 50})
+        self.assertEqual(coalescer.changes(), {"r2": {"battery": 50}})
+
+
+class TelemetryRateTests(TransactionTestCase):
+    """Test a dashboard asking for batched telemetry over the WebSocket"""
+
+    @override_settings(ROBOT_TELEMETRY_MIN_INTERVAL=0.05)
+    async def test_batched_delivery(self):
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_rate")
+        await robot.connect()
+        await robot.receive_json_from()
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+
+        await website.send_json_to({"type": "telemetry_rate", "interval": 0.2})
+        self.assertEqual((await website.receive_json_from())["interval"], 0.2)
+
+        for battery in (80, 79, 78):
+            await robot.send_json_to({"type": "telemetry", "battery": battery, "cpu": 30.0,
+                                      "temperature": 35.0, "signal": 90})
+            await robot.receive_json_from()
+
+        batch = await website.receive_json_from(timeout=2)
+        self.assertEqual(batch["type"], "telemetry_batch")
+        fields = batch["robots"]["robot_rate"]
+        self.assertEqual(fields["battery"], 78)
+        self.assertEqual(fields["cpu"], 30.0)
+
+        # Back to every sample
+        await website.send_json_to({"type": "telemetry_rate", "interval": 0})
+        self.assertEqual((await website.receive_json_from())["interval"], 0.0)
+        await robot.send_json_to({"type": "telemetry", "battery": 77, "cpu": 30.0,
+                                  "temperature": 35.0, "signal": 90})
+        await robot.receive_json_from()
+        self.assertEqual((await website.receive_json_from())["type"], "telemetry_update")
+        await asyncio.sleep(0.3)
+        self.assertTrue(await website.receive_nothing())
+
+        await website.disconnect()
+        await robot.disconnect()
@@ -0,0 +1,126 @@
+"""
+Device Token Test Suite
+Tests signed robot tokens, revocation and token-authenticated connects
+"""
+
+from io import StringIO
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+import robot.routing
+from robot.device_tokens import (
+    InvalidDeviceToken, issue_device_token, revocation_list, verify_device_token,
+)
+from robot.middleware import DeviceTokenAuthMiddleware
+from robot.models import RevokedDeviceToken
+
+
+def application():
+    return DeviceTokenAuthMiddleware(URLRouter(robot.routing.websocket_urlpatterns))
+
+
+class DeviceTokenTests(TestCase):
+    """Test token signing and the cached revocation list"""
+
+    def setUp(self):
+        revocation_list.load()
+        self.addCleanup(revocation_list.load)
+
+    def test_round_trip(self):
+        """A fresh token verifies to its device_id without any query"""
+        token, _, _ = issue_device_token("robot_01")
+        with self.assertNumQueries(0):
+            self.assertEqual(verify_device_token(token), "robot_01")
+
+    def test_tampered_token(self):
+        """Changing the payload breaks the signature"""
+        token, _, _ = issue_device_token("robot_01")
+        with self.assertRaises(InvalidDeviceToken):
+            verify_device_token("x" + token)
+
+    def test_expired_token(self):
+        """Tokens stop working after their TTL"""
+        token, _, _ = issue_device_token("robot_01", ttl=-1)
+        with self.assertRaises(InvalidDeviceToken):
+            verify_device_token(token)
+
+    def test_revoke_command(self):
+        """The management command revokes a token once the cache reloads"""
+        token, token_id, _ = issue_device_token("robot_01")
+        call_command("device_token", "revoke", token, stdout=StringIO())
+        self.assertTrue(RevokedDeviceToken.objects.filter(token_id=token_id).exists())
+
+        revocation_list.load()
+        with self.assertRaises(InvalidDeviceToken):
+            verify_device_token(token)
+
+    def test_revoke_by_token_id(self):
+        """Only the token_id printed by issue is needed, with the device it belongs to"""
+        token, token_id, _ = issue_device_token("robot_01")
+        with self.assertRaises(CommandError):
+            call_command("device_token", "revoke", token_id, stdout=StringIO())
+
+        call_command("device_token", "revoke", token_id, "--device", "robot_01", stdout=StringIO())
+        self.assertEqual(RevokedDeviceToken.objects.get(token_id=token_id).device_id, "robot_01")
+        revocation_list.load()
+        with self.assertRaises(InvalidDeviceToken):
+            verify_device_token(token)
+
+    def test_issue_command(self):
+        """The issued token is printed on the last line"""
+        out = StringIO()
+        call_command("device_token", "issue", "robot_07", stdout=out)
+        self.assertEqual(verify_device_token(out.getvalue().strip().splitlines()[-1]), "robot_07")
+
+
+class DeviceTokenConnectTests(TransactionTestCase):
+    """Test robot connections through DeviceTokenAuthMiddleware"""
+
+    async def test_token_identifies_robot(self):
+        """The device_id comes from the token, not the query string"""
+        token, _, _ = issue_device_token("robot_signed")
+        communicator = WebsocketCommunicator(application(), f"/ws/telemetry/?token={token}")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        response = await communicator.receive_json_from()
+        self.assertEqual(response["device_type"], "robot")
+        self.assertEqual(response["device_id"], "robot_signed")
+        await communicator.disconnect()
+
+    async def test_bad_token_rejected(self):
+        """An invalid token is refused during the handshake"""
+        communicator = WebsocketCommunicator(application(), "/ws/telemetry/?token=forged")
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    @override_settings(ROBOT_REQUIRE_DEVICE_TOKEN=True)
+    async def test_unsigned_robot_rejected_when_required(self):
+        """Bare device_id connections can be switched off"""
+        communicator = WebsocketCommunicator(application(), "/ws/telemetry/?device_id=robot_01")
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    @override_settings(ROBOT_TOKEN_REVOCATION_REFRESH=0.05)
+    async def test_revoke_disconnects_live_robot(self):
+        """A robot already connected with the token is closed at the next refresh"""
+        token, token_id, _ = issue_device_token("robot_revoked")
+        communicator = WebsocketCommunicator(application(), f"/ws/telemetry/?token={token}")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        await database_sync_to_async(call_command)(
+            "device_token", "revoke", token_id, "--device", "robot_revoked", stdout=StringIO())
+        while True:
+            output = await communicator.receive_output(timeout=2)
+            if output["type"] == "websocket.close":
+                break
+        self.assertEqual(output["code"], 4401)
+        self.assertNotIn(token_id, revocation_list.watched)
+        await communicator.wait()
@@ -0,0 +1,88 @@
+"""
+Emergency Stop Test Suite
+Tests sequenced, retransmitted estop delivery and latency reporting
+"""
+
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+
+from robot.consumers import TelemetryConsumer
+
+
+@override_settings(ROBOT_ESTOP_RETRY_INTERVAL=0.05, ROBOT_ESTOP_TIMEOUT=0.5)
+class EStopTests(TransactionTestCase):
+    """Test the estop fast path between a dashboard and a robot"""
+
+    async def connect_pair(self):
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_estop")
+        await robot.connect()
+        await robot.receive_json_from()
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+        return robot, website
+
+    async def test_retransmit_until_acknowledged(self):
+        robot, website = await self.connect_pair()
+
+        await website.send_json_to({"type": "estop", "client_ts": 1234})
+        first = await robot.receive_json_from()
+        self.assertEqual(first["type"], "estop")
+        self.assertEqual(first["attempt"], 1)
+
+        sent = await website.receive_json_from()
+        self.assertEqual(sent["status"], "sent")
+        self.assertEqual(sent["devices"], ["robot_estop"])
+
+        # No ack yet: the same seq comes again
+        second = await robot.receive_json_from()
+        self.assertEqual(second["seq"], first["seq"])
+        self.assertEqual(second["attempt"], 2)
+
+        await robot.send_json_to({"type": "estop_ack", "seq": first["seq"], "attempt": 2})
+        status = await website.receive_json_from()
+        self.assertEqual(status["type"], "estop_status")
+        self.assertEqual(status["status"], "acknowledged")
+        self.assertEqual(status["client_ts"], 1234)
+        self.assertIsNotNone(status["latency_ms"])
+
+        await website.disconnect()
+        await robot.disconnect()
+
+    async def test_unacknowledged_estop_fails(self):
+        robot, website = await self.connect_pair()
+
+        await website.send_json_to({"type": "estop", "device_id": "robot_estop"})
+        await website.receive_json_from()
+        status = await website.receive_json_from(timeout=2)
+        self.assertEqual(status["status"], "failed")
+        self.assertGreater(status["attempts"], 2)
+
+        await website.disconnect()
+        await robot.disconnect()
+
+    async def test_no_robot(self):
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+
+        await website.send_json_to({"type": "estop"})
+        status = await website.receive_json_from()
+        self.assertEqual(status["status"], "no_robot")
+
+        await website.disconnect()
+
+    async def test_target_not_connected(self):
+        """An estop for a robot that is not connected is refused at once, not retransmitted"""
+        from robot.estop import estops
+
+        robot, website = await self.connect_pair()
+        await website.send_json_to({"type": "estop", "device_id": "robot_gone"})
+        status = await website.receive_json_from()
+        self.assertEqual((status["status"], status["device_id"]), ("no_robot", "robot_gone"))
+        self.assertFalse([d for d in estops.pending.values() if d.device_id == "robot_gone"])
+        # The connected robot is left alone
+        self.assertTrue(await robot.receive_nothing())
+
+        await website.disconnect()
+        await robot.disconnect()
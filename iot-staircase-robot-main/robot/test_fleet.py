@@ -0,0 +1,106 @@
+"""
+Fleet Summary Test Suite
+Tests the running fleet aggregates and their delivery
+"""
+
+from unittest import mock
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from robot import fleet as fleet_module
+from robot.consumers import TelemetryConsumer
+from robot.fleet import FleetAggregator
+
+
+class FleetAggregatorTests(SimpleTestCase):
+    """Test the incremental summary"""
+
+    def test_extremes_follow_updates(self):
+        fleet = FleetAggregator()
+        fleet.update("r1", battery=80, temperature=40)
+        fleet.update("r2", battery=15, temperature=75)
+        fleet.update("r3", battery=17, temperature=41)
+
+        summary = fleet.summary()
+        self.assertEqual(summary["robots_online"], 3)
+        self.assertEqual((summary["battery"]["min"], summary["battery"]["min_device"]), (15, "r2"))
+        self.assertEqual(summary["temperature"]["max"], 75)
+        self.assertEqual(summary["battery"]["histogram"][1], 2)
+        self.assertEqual(summary["alerts"]["battery_low"], 2)
+        self.assertEqual(summary["alerts"]["temperature_high"], 1)
+        self.assertEqual(summary["robots_alerting"], 2)
+
+        # r2 charges and cools down, then r3 goes away
+        fleet.update("r2", battery=95, temperature=30)
+        fleet.offline("r3")
+        summary = fleet.summary()
+        self.assertEqual(summary["robots_online"], 2)
+        self.assertEqual(summary["battery"]["min_device"], "r1")
+        self.assertEqual(summary["temperature"]["max"], 40)
+        self.assertEqual(summary["battery"]["mean"], 87.5)
+        self.assertEqual(summary["alerts"], dict.fromkeys(summary["alerts"], 0))
+        self.assertEqual(summary["robots_alerting"], 0)
+
+    def test_summary_built_once_per_change(self):
+        fleet = FleetAggregator()
+        fleet.update("r1", battery=50)
+        first = fleet.summary()
+        self.assertIs(fleet.summary(), first)
+        fleet.update("r1", battery=49)
+        self.assertEqual(fleet.summary()["seq"], first["seq"] + 1)
+
+
+class FleetDeliveryTests(TransactionTestCase):
+    """Test fleet_summary messages to subscribed dashboards"""
+
+    async def next_summary(self, website, until=lambda summary: True):
+        """The next fleet_summary matching until, skipping other traffic and earlier ticks"""
+        while True:
+            message = await website.receive_json_from(timeout=2)
+            if message.get("type") == "fleet_summary" and until(message):
+                return message
+
+    @override_settings(ROBOT_FLEET_SUMMARY_INTERVAL=0.05)
+    async def test_subscribers_get_ticks(self):
+        with mock.patch.object(fleet_module, "fleet", FleetAggregator()) as fleet, \
+                mock.patch("robot.consumers.fleet", fleet):
+            website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+            await website.connect()
+            await website.receive_json_from()
+            await website.send_json_to({"type": "subscribe", "device_id": "*", "streams": ["fleet"]})
+            await website.receive_json_from()
+            self.assertEqual((await self.next_summary(website))["robots_online"], 0)
+
+            robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_fleet")
+            await robot.connect()
+            await robot.receive_json_from()
+            await robot.send_json_to({"type": "telemetry", "battery": 12, "cpu": 30.0,
+                                      "temperature": 35.0, "signal": 90})
+            await robot.receive_json_from()
+
+            summary = await self.next_summary(website, until=lambda summary: summary["reporting"])
+            self.assertEqual(summary["robots_online"], 1)
+            self.assertEqual(summary["battery"]["min"], 12)
+            self.assertEqual(summary["alerts"]["battery_low"], 1)
+
+            await robot.disconnect()
+            # The robot leaving is in a later tick
+            await self.next_summary(website, until=lambda summary: summary["robots_online"] == 0)
+            await website.disconnect()
+
+
+class FleetSummaryViewTests(TestCase):
+    """Test the cached HTTP endpoint"""
+
+    def test_serves_latest_summary(self):
+        user = User.objects.create_user("operator", password="secret-pass-1")
+        self.client.force_login(user)
+        with mock.patch("robot.views.fleet", FleetAggregator()) as fleet:
+            fleet.update("r1", battery=64)
+            fleet.summary()
+            response = self.client.get("/api/fleet-summary/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertEqual(response.json()["battery"]["min"], 64)
@@ -0,0 +1,59 @@
+"""
+Outbound Lanes Test Suite
+Tests the per-connection priority outbox used for broadcasts
+"""
+
+import asyncio
+
+from django.test import SimpleTestCase
+
+from robot.outbound import (
+    LANE_CONTROL, LANE_TELEMETRY, LANE_VIDEO, PriorityOutbox, lane_for,
+)
+
+
+class PriorityOutboxTests(SimpleTestCase):
+    """Test lane ordering and stale video replacement"""
+
+    def test_lanes(self):
+        self.assertEqual(lane_for("video_frame"), LANE_VIDEO)
+        self.assertEqual(lane_for("telemetry_update"), LANE_TELEMETRY)
+        self.assertEqual(lane_for("robot_move"), LANE_CONTROL)
+
+    def test_control_first_and_newest_frame_only(self):
+        sent = []
+
+        async def send(text_data=None, bytes_data=None):
+            sent.append(text_data)
+
+        async def scenario():
+            outbox = PriorityOutbox(send)
+            await outbox.put(LANE_VIDEO, "robot_a frame 1", key="robot_a")
+            await outbox.put(LANE_VIDEO, "robot_b frame 1", key="robot_b")
+            await outbox.put(LANE_VIDEO, "robot_a frame 2", key="robot_a")
+            await outbox.put(LANE_TELEMETRY, "telemetry")
+            await outbox.put(LANE_CONTROL, "ack")
+            await outbox.task
+            return outbox.dropped_video
+
+        dropped = asyncio.run(scenario())
+        self.assertEqual(sent, ["ack", "telemetry", "robot_b frame 1", "robot_a frame 2"])
+        self.assertEqual(dropped, 1)
+
+    def test_telemetry_lane_bounded(self):
+        """A full telemetry lane drops its oldest messages and counts them"""
+        sent = []
+
+        async def send(text_data=None, bytes_data=None):
+            sent.append(text_data)
+
+        async def scenario():
+            outbox = PriorityOutbox(send, max_telemetry=3)
+            for n in range(5):
+                await outbox.put(LANE_TELEMETRY, f"telemetry {n}")
+            await outbox.task
+            return outbox.dropped_telemetry
+
+        dropped = asyncio.run(scenario())
+        self.assertEqual(sent, ["telemetry 2", "telemetry 3", "telemetry 4"])
+        self.assertEqual(dropped, 2)
@@ -0,0 +1,95 @@
+"""
+Presence Test Suite
+Tests heartbeats, roster snapshots and stale-connection reaping
+"""
+
+import asyncio
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from robot.consumers import TelemetryConsumer, connected_devices
+from robot.presence import presence
+
+
+def robot_communicator(device_id="robot_01"):
+    return WebsocketCommunicator(TelemetryConsumer.as_asgi(), f"/ws/telemetry/?device_id={device_id}")
+
+
+def website_communicator():
+    return WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+
+
+async def receive_type(communicator, msg_type, timeout=2):
+    """Skip messages until one of the given type arrives"""
+    while True:
+        message = await communicator.receive_json_from(timeout=timeout)
+        if message.get("type") == msg_type:
+            return message
+
+
+class PresenceTests(TransactionTestCase):
+    """Test the presence registry and heartbeat reaper"""
+
+    async def test_dashboard_gets_roster_snapshot(self):
+        """A new dashboard receives all robots in its connection ack"""
+        robot = robot_communicator()
+        await robot.connect()
+        await robot.receive_json_from()
+
+        website = website_communicator()
+        await website.connect()
+        snapshot = await website.receive_json_from()
+
+        self.assertEqual(snapshot["type"], "presence_snapshot")
+        self.assertEqual(snapshot["status"], "connected")
+        self.assertEqual([r["device_id"] for r in snapshot["robots"]], ["robot_01"])
+
+        await robot.disconnect()
+        delta = await receive_type(website, "presence_delta")
+        self.assertEqual(delta["state"], "offline")
+        self.assertEqual(delta["reason"], "disconnect")
+
+        await website.disconnect()
+        self.assertEqual(presence.entries, {})
+
+    @override_settings(ROBOT_HEARTBEAT_INTERVAL=0.05, ROBOT_PRESENCE_TTL=1)
+    async def test_pong_measures_rtt(self):
+        """Answering a ping records an RTT for the connection"""
+        robot = robot_communicator()
+        await robot.connect()
+        await robot.receive_json_from()
+
+        ping = await receive_type(robot, "ping")
+        await robot.send_json_to({"type": "pong", "seq": ping["seq"]})
+        await asyncio.sleep(0.01)
+
+        entry = next(iter(presence.entries.values()))
+        self.assertIsNotNone(entry.rtt_ms)
+        await robot.disconnect()
+
+    @override_settings(ROBOT_HEARTBEAT_INTERVAL=0.05, ROBOT_PRESENCE_TTL=0.2)
+    async def test_silent_robot_is_reaped(self):
+        """A robot that stops answering is closed and reported offline"""
+        website = website_communicator()
+        await website.connect()
+        await website.receive_json_from()
+
+        robot = robot_communicator("robot_silent")
+        await robot.connect()
+        await robot.receive_json_from()
+        self.assertIn("robot_silent", connected_devices["robots"])
+
+        # Keep the dashboard alive, the robot never answers
+        delta = None
+        while delta is None or delta["state"] != "offline":
+            message = await website.receive_json_from(timeout=2)
+            if message.get("type") == "ping":
+                await website.send_json_to({"type": "pong", "seq": message["seq"]})
+            elif message.get("type") == "presence_delta":
+                delta = message
+
+        self.assertEqual(delta["device_id"], "robot_silent")
+        self.assertEqual(delta["reason"], "timeout")
+        self.assertNotIn("robot_silent", connected_devices["robots"])
+
+        await website.disconnect()
+        await robot.wait()
@@ -0,0 +1,114 @@
+"""
+Session Recording Test Suite
+Tests the binary session log and replaying it
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+import robot_client
+from robot import recorder
+from robot.consumers import TelemetryConsumer
+from robot.recorder import (
+    EVENT_CONNECT, EVENT_DISCONNECT, EVENT_RECEIVE, EVENT_SEND, SessionRecorder, read_session,
+    replay_to_consumer, replay_to_robot,
+)
+
+
+class SessionLogTests(SimpleTestCase):
+    """Test writing and reading session logs"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "session.rlog")
+
+    def test_round_trip(self):
+        log = SessionRecorder(self.path)
+        log.record(EVENT_RECEIVE, "abc", '{"type": "ping"}')
+        log.record(EVENT_RECEIVE, "abc", b"\x00\x01binary")
+        log.close()
+
+        text, binary = list(read_session(self.path))
+        self.assertEqual(text.connection, "abc")
+        self.assertEqual(text.json(), {"type": "ping"})
+        self.assertFalse(text.binary)
+        self.assertEqual(binary.payload, b"\x00\x01binary")
+        self.assertTrue(binary.binary)
+        self.assertLessEqual(text.t, binary.t)
+
+    def test_flush_without_close(self):
+        """A flushed log is complete on disk while the recorder keeps running"""
+        log = SessionRecorder(self.path)
+        self.addCleanup(log.close)
+        for n in range(50):
+            log.record(EVENT_RECEIVE, "abc", f"message {n}")
+        log.flush()
+        self.assertEqual(len(list(read_session(self.path))), 50)
+
+        log.close()
+        log.record(EVENT_RECEIVE, "abc", "after close")
+        self.assertEqual(len(list(read_session(self.path))), 50)
+
+    def test_torn_tail_is_ignored(self):
+        log = SessionRecorder(self.path)
+        log.record(EVENT_RECEIVE, "abc", "first")
+        log.record(EVENT_RECEIVE, "abc", "second")
+        log.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+
+        self.assertEqual([record.payload for record in read_session(self.path)], ["first"])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a recording at all")
+        with self.assertRaises(ValueError):
+            list(read_session(self.path))
+
+
+class SessionRecordingTests(TransactionTestCase):
+    """Test recording through the consumer and replaying the result"""
+
+    async def test_record_and_replay(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "session.rlog")
+        log = SessionRecorder(path)
+
+        with override_settings(ROBOT_RECORD_SESSIONS=True), mock.patch.object(recorder, "_recorder", log):
+            robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_rec")
+            await robot.connect()
+            await robot.receive_json_from()
+            website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+            await website.connect()
+            await website.receive_json_from()
+
+            await website.send_json_to({"type": "robot_move", "x": 0.0, "y": 1.0})
+            self.assertEqual((await robot.receive_json_from())["type"], "robot_move")
+            await website.disconnect()
+            await robot.disconnect()
+        log.close()
+
+        records = list(read_session(path))
+        events = [record.event for record in records]
+        self.assertEqual(events.count(EVENT_CONNECT), 2)
+        self.assertEqual(events.count(EVENT_DISCONNECT), 2)
+        self.assertIn({"type": "robot_move", "x": 0.0, "y": 1.0},
+                      [record.json() for record in records if record.event == EVENT_RECEIVE])
+        sent = [record.json().get("type") for record in records if record.event == EVENT_SEND]
+        self.assertIn("robot_move", sent)
+
+        stats = await replay_to_consumer(records, speed=0)
+        self.assertEqual(stats["connections"], 2)
+        self.assertEqual(stats["messages"], 1)
+
+        simulated = robot_client.SimulatedRobot("ws://replay/", "robot_rec", use_camera=False,
+                                                buffer_offline=False, sensor_hz=0)
+        # The connection ack and the drive command
+        self.assertEqual(await replay_to_robot(records, simulated, speed=0), 2)
+        self.assertEqual(simulated.control.mailbox.latest("drive")[0], (0.0, 1.0))
@@ -0,0 +1,603 @@
+"""
+Robot Client Test Suite
+Tests the robot-side building blocks in robot_client.py without a server
+"""
+
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+from django.test import SimpleTestCase
+
+import robot_client
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class FakeCamera:
+    """Camera stand-in that produces numbered frames at a fixed interval"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.count = 0
+        self.reads = threading.Event()
+
+    def read(self):
+        time.sleep(self.interval)
+        self.count += 1
+        self.reads.set()
+        return True, {"frame": self.count}
+
+
+class CameraCaptureTests(SimpleTestCase):
+    """Test the threaded latest-frame camera capture"""
+
+    def test_latest_frame_only(self):
+        """Reads return the newest frame and nothing until a newer one exists"""
+        capture = robot_client.CameraCapture(FakeCamera())
+        capture.start()
+        self.addCleanup(capture.stop)
+
+        time.sleep(0.05)
+        frame, seq, captured_at = capture.latest()
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame["frame"], seq)
+        self.assertIsNotNone(captured_at)
+
+        # Frames captured while we were not looking are skipped, not queued
+        time.sleep(0.05)
+        newer, newer_seq, _ = capture.latest(seq)
+        self.assertGreater(newer_seq, seq + 1)
+
+        capture.stop()
+        self.assertIsNone(capture.latest(capture.latest()[1])[0])
+
+    def test_latest_never_blocks(self):
+        """Picking up a frame does not wait for a slow camera read"""
+        capture = robot_client.CameraCapture(FakeCamera(interval=0.5))
+        capture.start()
+        self.addCleanup(capture.stop)
+
+        started = time.perf_counter()
+        frame, seq, _ = capture.latest()
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(seq, 0)
+
+
+class PipelineRobot:
+    """Minimal robot for driving VideoPipeline with a slow encoder"""
+
+    def __init__(self, encode_delay):
+        self.running = True
+        self.video_fps = 100
+        self.encode_delay = encode_delay
+        self.next_frame = 0
+        self.sent = []
+
+    def capture_frame(self):
+        self.next_frame += 1
+        return self.next_frame
+
+    def annotate_frame(self, frame, frame_number):
+        return frame
+
+    def encode_frame(self, frame):
+        time.sleep(self.encode_delay)
+        return f"jpeg-{frame}"
+
+    async def send_encoded_frame(self, frame_data, frame_number, captured_at):
+        self.sent.append(frame_number)
+        if len(self.sent) >= 10:
+            self.running = False
+
+
+class VideoPipelineTests(SimpleTestCase):
+    """Test the staged capture → annotate → encode → send pipeline"""
+
+    def run_pipeline(self, robot, **kwargs):
+        pipeline = robot_client.VideoPipeline(robot, report_interval=None, **kwargs)
+        asyncio.run(asyncio.wait_for(pipeline.run(), timeout=10))
+        return pipeline
+
+    def test_frames_sent_in_order(self):
+        """Frames arrive at the sender in increasing order"""
+        robot = PipelineRobot(encode_delay=0)
+        self.run_pipeline(robot)
+        self.assertEqual(robot.sent, sorted(robot.sent))
+        self.assertGreaterEqual(len(robot.sent), 10)
+
+    def test_slow_encoder_drops_oldest(self):
+        """A bottleneck stage drops old frames and shows up in the stage stats"""
+        robot = PipelineRobot(encode_delay=0.05)
+        pipeline = self.run_pipeline(robot, encode_workers=1)
+
+        stats = pipeline.stats_summary()
+        self.assertGreater(stats["encode"]["dropped"], 0)
+        self.assertGreater(stats["encode"]["avg_ms"], stats["annotate"]["avg_ms"])
+        # Dropping the oldest means the sender skips ahead rather than lagging
+        self.assertGreater(robot.sent[-1] - robot.sent[0], len(robot.sent) - 1)
+
+
+@unittest.skipUnless(robot_client.HAS_NUMPY, "numpy not installed")
+class MotionDetectorTests(SimpleTestCase):
+    """Test still-frame skipping with keep-alives"""
+
+    def setUp(self):
+        self.still = np.full((480, 640, 3), 100, dtype=np.uint8)
+
+    def test_still_scene_keepalive(self):
+        """Still frames are skipped until the keep-alive interval passes"""
+        detector = robot_client.MotionDetector(threshold=2.0, keepalive_interval=2.0)
+        self.assertTrue(detector.should_send(self.still, now=0.0))
+        self.assertFalse(detector.should_send(self.still.copy(), now=0.1))
+        self.assertFalse(detector.should_send(self.still.copy(), now=1.9))
+        self.assertTrue(detector.should_send(self.still.copy(), now=2.0))
+        self.assertEqual(detector.skipped, 2)
+
+    def test_motion_resumes_immediately(self):
+        """The first changed frame is sent, and so is every frame while moving"""
+        detector = robot_client.MotionDetector(threshold=2.0, keepalive_interval=2.0)
+        detector.should_send(self.still, now=0.0)
+        self.assertFalse(detector.should_send(self.still, now=0.1))
+
+        for i in range(1, 4):
+            moving = self.still.copy()
+            moving[:, : i * 100] = 200
+            self.assertTrue(detector.should_send(moving, now=0.1 + i * 0.1))
+
+    def test_slow_drift_accumulates(self):
+        """Differences are measured against the last sent frame, not the previous one"""
+        detector = robot_client.MotionDetector(threshold=2.0, keepalive_interval=60.0)
+        detector.should_send(self.still, now=0.0)
+        sent = [detector.should_send(self.still + i, now=i * 0.1) for i in range(1, 4)]
+        self.assertEqual(sent, [False, True, False])
+
+
+@unittest.skipUnless(robot_client.HAS_NUMPY, "numpy not installed")
+class FrameEncoderTests(SimpleTestCase):
+    """Test the pluggable JPEG encoder backends"""
+
+    def setUp(self):
+        self.frame = robot_client.test_pattern(160, 120)
+
+    def test_installed_backends_encode(self):
+        """Every installed backend turns camera frames and PIL images into JPEGs"""
+        for name in robot_client.available_encoders():
+            encoder = robot_client.make_encoder(name, quality=80)
+            self.assertEqual(encoder.name, name)
+            self.assertEqual(bytes(encoder.encode(self.frame))[:2], b"\xff\xd8")
+            if robot_client.HAS_PIL:
+                image = robot_client.Image.new("RGB", (160, 120), color="green")
+                self.assertEqual(bytes(encoder.encode(image))[:2], b"\xff\xd8")
+
+    @unittest.skipUnless(robot_client.HAS_PIL, "Pillow not installed")
+    def test_quality_and_subsampling(self):
+        sizes = {}
+        for quality, subsampling in ((30, "420"), (90, "420"), (90, "444")):
+            encoder = robot_client.PillowEncoder(quality, subsampling)
+            sizes[quality, subsampling] = len(encoder.encode(self.frame))
+        self.assertLess(sizes[30, "420"], sizes[90, "420"])
+        self.assertLess(sizes[90, "420"], sizes[90, "444"])
+
+        with self.assertRaises(ValueError):
+            robot_client.PillowEncoder(70, "411")
+
+    @unittest.skipUnless(robot_client.HAS_PIL, "Pillow not installed")
+    def test_buffer_reused(self):
+        """The output buffer is rewritten in place rather than reallocated"""
+        encoder = robot_client.PillowEncoder()
+        first = bytes(encoder.encode(self.frame))
+        encoder.encode(self.frame)
+        buffer = encoder.local.buffer
+        self.assertEqual(bytes(encoder.encode(self.frame)), first)
+        self.assertIs(encoder.local.buffer, buffer)
+
+    def test_unknown_encoder(self):
+        with self.assertRaises(ValueError):
+            robot_client.make_encoder("gif")
+
+    def test_benchmark_reports_every_backend(self):
+        rows = robot_client.benchmark_encoders(sizes=((160, 120),), frames=3)
+        self.assertEqual([row["encoder"] for row in rows], robot_client.available_encoders())
+        for row in rows:
+            self.assertGreater(row["fps"], 0)
+            self.assertGreater(row["bytes_per_frame"], 0)
+
+
+@unittest.skipUnless(robot_client.HAS_NUMPY and robot_client.available_encoders(), "numpy or JPEG encoder missing")
+class SyntheticVideoSourceTests(SimpleTestCase):
+    """Test the load-test video source"""
+
+    def test_precoded_frames_cycle(self):
+        source = robot_client.SyntheticVideoSource(size=(160, 120), patterns=3)
+        frames = [source.frame(i).data for i in range(6)]
+        self.assertEqual(frames[:3], frames[3:])
+        self.assertEqual(len(set(frames[:3])), 3)
+        self.assertEqual(base64.b64decode(frames[0])[:2], b"\xff\xd8")
+
+    def test_entropy_sets_payload_size(self):
+        flat = robot_client.SyntheticVideoSource(size=(320, 240), patterns=2, entropy=0.0)
+        noisy = robot_client.SyntheticVideoSource(size=(320, 240), patterns=2, entropy=0.5)
+        self.assertGreater(noisy.payload_bytes(), 3 * flat.payload_bytes())
+
+    def test_stamp_region_only(self):
+        """Stamping touches a copy's corner, never the shared pattern"""
+        source = robot_client.SyntheticVideoSource(size=(320, 240), patterns=1, precoded=False)
+        pattern = source.frame(0)
+        original = pattern.copy()
+        stamped = source.annotate(pattern, 5)
+
+        self.assertTrue(np.array_equal(pattern, original))
+        changed = np.argwhere((stamped != original).any(axis=2))
+        self.assertLess(changed[:, 0].max(), 2 * source.STAMP_BLOCK)
+        self.assertLess(changed[:, 1].max(), source.STAMP_BITS * source.STAMP_BLOCK)
+        # Frame 5 = bits 0 and 2 set
+        self.assertEqual(stamped[0, 0, 0], 255)
+        self.assertEqual(stamped[0, source.STAMP_BLOCK, 0], 0)
+
+    def test_stamp_fits_small_frames(self):
+        source = robot_client.SyntheticVideoSource(size=(160, 120), patterns=1, precoded=False)
+        stamped = source.annotate(source.frame(0), 5)
+        self.assertEqual(source.stamp_block, 5)
+        self.assertEqual(stamped.shape, (120, 160, 3))
+        self.assertEqual((stamped[0, 0, 0], stamped[0, 5, 0], stamped[0, 10, 0]), (255, 0, 255))
+
+        with self.assertRaises(ValueError):
+            robot_client.SyntheticVideoSource(size=(16, 16), patterns=1, precoded=False)
+
+    def test_robot_sends_cached_frames(self):
+        source = robot_client.SyntheticVideoSource(size=(160, 120), patterns=2)
+        robot = robot_client.SimulatedRobot("ws://unused/", "robot_syn", use_camera=False,
+                                            buffer_offline=False, video_source=source)
+        frame = robot.annotate_frame(robot.capture_frame(), 1)
+        self.assertEqual(robot.encode_frame(frame), source.frame(1).data)
+
+
+class OfflineQueueTests(SimpleTestCase):
+    """Test the disk-backed queue used while the server is unreachable"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "queue", "offline.jsonl")
+
+    def test_survives_restart(self):
+        """Messages are read back by a new queue on the same file, torn lines skipped"""
+        queue = robot_client.OfflineQueue(self.path)
+        queue.append({"n": 1})
+        queue.append({"n": 2})
+        with open(self.path, "a") as f:
+            f.write('{"n": 3')
+
+        reopened = robot_client.OfflineQueue(self.path)
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.peek(10), [{"n": 1}, {"n": 2}])
+
+    def test_bounded_drop_oldest(self):
+        """A full queue keeps the newest messages"""
+        queue = robot_client.OfflineQueue(self.path, max_items=10)
+        for n in range(25):
+            queue.append({"n": n})
+
+        self.assertLessEqual(len(queue), 11)
+        items = queue.peek(100)
+        self.assertEqual(items[-1], {"n": 24})
+        self.assertEqual(queue.dropped, 25 - len(items))
+
+    def test_discard_survives_restart(self):
+        """Acknowledged messages stay gone after a restart and a drained file is emptied"""
+        queue = robot_client.OfflineQueue(self.path)
+        for n in range(5):
+            queue.append({"n": n})
+        queue.discard(1)
+
+        reopened = robot_client.OfflineQueue(self.path)
+        self.assertEqual(reopened.peek(10), [{"n": 1}, {"n": 2}, {"n": 3}, {"n": 4}])
+        reopened.discard(2)
+        reopened.append({"n": 5})
+        self.assertEqual(robot_client.OfflineQueue(self.path).peek(10), [{"n": 3}, {"n": 4}, {"n": 5}])
+
+        reopened.discard(3)
+        self.assertEqual(len(robot_client.OfflineQueue(self.path)), 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+    def test_reconnect_delay_full_jitter(self):
+        """Delays stay within the exponential envelope and the cap"""
+        for attempt in range(12):
+            delay = robot_client.reconnect_delay(attempt, base=0.5, cap=30.0)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(30.0, 0.5 * 2 ** attempt))
+
+
+class AckingSocket:
+    """WebSocket stand-in that acknowledges offline batches through the robot"""
+
+    def __init__(self, robot, reject=lambda batch: False):
+        self.robot = robot
+        self.reject = reject
+        self.batches = []
+
+    async def send(self, text):
+        message = json.loads(text)
+        if message["type"] == "offline_batch":
+            batch = json.loads(zlib.decompress(base64.b64decode(message["data"])))
+            status = "rejected" if self.reject(batch) else "received"
+            if status == "received":
+                self.batches.append(batch)
+            asyncio.get_running_loop().call_soon(asyncio.ensure_future, self.robot.handle_message({
+                "type": "ack", "original_type": "offline_batch", "batch_id": message["batch_id"],
+                "status": status,
+            }))
+
+
+class OfflineReplayTests(SimpleTestCase):
+    """Test buffering while offline and replaying on reconnect"""
+
+    def test_buffer_then_replay_in_order(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        robot = robot_client.SimulatedRobot(
+            "ws://unused/", use_camera=False,
+            offline_queue_path=os.path.join(directory.name, "offline.jsonl"),
+        )
+        robot.REPLAY_BATCH_SIZE = 3
+
+        async def scenario():
+            # Offline: nothing is sent, everything lands on disk
+            for n in range(7):
+                self.assertFalse(await robot.send_message({"type": "telemetry", "n": n}))
+            self.assertEqual(len(robot.offline_queue), 7)
+
+            robot.websocket = AckingSocket(robot)
+            robot.outbound = robot_client.OutboundScheduler(robot.websocket)
+            robot.connected.set()
+            await robot.replay_offline_queue()
+
+        asyncio.run(scenario())
+        sent = [m["n"] for batch in robot.websocket.batches for m in batch]
+        self.assertEqual(sent, list(range(7)))
+        self.assertEqual(len(robot.offline_queue), 0)
+
+    def test_rejected_batch_split_then_dropped(self):
+        """A rejected batch is retried in halves and a message refused on its own is dropped"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        robot = robot_client.SimulatedRobot(
+            "ws://unused/", use_camera=False,
+            offline_queue_path=os.path.join(directory.name, "offline.jsonl"),
+        )
+        robot.REPLAY_BATCH_SIZE = 4
+
+        async def scenario():
+            for n in range(6):
+                await robot.send_message({"type": "telemetry", "n": n})
+            robot.websocket = AckingSocket(robot, reject=lambda batch: any(m["n"] == 2 for m in batch))
+            robot.outbound = robot_client.OutboundScheduler(robot.websocket)
+            robot.connected.set()
+            await robot.replay_offline_queue()
+
+        asyncio.run(scenario())
+        sent = [m["n"] for batch in robot.websocket.batches for m in batch]
+        self.assertEqual(sent, [0, 1, 3, 4, 5])
+        self.assertEqual(robot.offline_queue.dropped, 1)
+        self.assertEqual(len(robot.offline_queue), 0)
+
+
+class SystemSamplerTests(SimpleTestCase):
+    """Test reading metrics from a fake /proc and /sys tree"""
+
+    def write(self, path, content):
+        full = os.path.join(self.root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def test_reads_system_files(self):
+        self.write("/proc/stat", "cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 1 2 3 4\n")
+        self.write("/sys/class/thermal/thermal_zone0/temp", "41500\n")
+        self.write("/sys/class/thermal/thermal_zone1/temp", "52000\n")
+        self.write("/sys/class/power_supply/AC/type", "Mains\n")
+        self.write("/sys/class/power_supply/BAT0/type", "Battery\n")
+        self.write("/sys/class/power_supply/BAT0/capacity", "67\n")
+        self.write("/proc/net/wireless",
+                   "Inter-| sta-|   Quality        |\n"
+                   " face | tus | link level noise |\n"
+                   " wlan0: 0000   56.  -54.  -256        0      0      0      0      0        0\n")
+
+        sampler = robot_client.SystemSampler(root=self.root)
+        first = sampler.sample()
+        self.assertEqual(first, {"battery": 67.0, "cpu": 20.0, "temperature": 52.0, "signal": 80.0})
+        self.assertEqual(set(sampler.sources.values()), {"system"})
+
+        # CPU is the busy share of the ticks since the previous sample
+        self.write("/proc/stat", "cpu  150 0 100 750 100 0 0 0 0 0\n")
+        self.assertEqual(sampler.sample()["cpu"], 50.0)
+
+    def test_missing_sources_simulated(self):
+        """A machine without these files still produces plausible values"""
+        sampler = robot_client.SystemSampler(root=self.root)
+        sample = sampler.sample()
+        self.assertEqual(set(sample), set(robot_client.TELEMETRY_FIELDS))
+        self.assertEqual(set(sampler.sources.values()), {"simulated"})
+
+
+class ControlLoopTests(SimpleTestCase):
+    """Test the fixed-rate control loop with a simulated actuator"""
+
+    def setUp(self):
+        self.actuator = robot_client.SimulatedActuator()
+        self.loop = robot_client.ControlLoop(self.actuator, rate_hz=50, deadman_timeout=0.5,
+                                             max_rate=4.0, smoothing=0.5)
+
+    def run_ticks(self, start, seconds):
+        ticks = int(seconds * 50)
+        for i in range(1, ticks + 1):
+            self.loop.step(start + i / 50)
+        return start + ticks / 50
+
+    def test_only_newest_command_applies(self):
+        """A burst of commands collapses to its last value"""
+        for x in (-1.0, 1.0, -0.5, 0.0):
+            self.loop.command("drive", (x, 1.0), now=0.0)
+        self.run_ticks(0.0, 0.4)
+        left, right = self.actuator.tracks
+        self.assertAlmostEqual(left, 1.0, places=2)
+        self.assertAlmostEqual(right, 1.0, places=2)
+
+    def test_rate_limited_ramp(self):
+        """Tracks change at most max_rate per second"""
+        self.loop.command("drive", (0.0, 1.0), now=0.0)
+        self.loop.step(0.0)
+        self.loop.step(0.02)
+        self.assertAlmostEqual(self.actuator.tracks[0], 0.16)
+
+        previous = 0.0
+        for _, left, _ in self.actuator.history:
+            self.assertLessEqual(left - previous, 4.0 / 50 + 1e-9)
+            previous = left
+
+    def test_deadman_stops_tracks(self):
+        """Without fresh commands the tracks stop on their own"""
+        self.loop.command("drive", (0.0, 1.0), now=0.0)
+        now = self.run_ticks(0.0, 0.4)
+        self.assertGreater(self.actuator.tracks[0], 0.5)
+
+        self.run_ticks(now, 0.2)
+        self.assertEqual(self.actuator.tracks, (0.0, 0.0))
+        self.assertTrue(self.loop.deadman_tripped)
+
+    def test_speed_scale(self):
+        self.loop.speed_scale = 0.5
+        self.loop.command("drive", (0.0, 1.0), now=0.0)
+        self.run_ticks(0.0, 0.4)
+        self.assertAlmostEqual(self.actuator.tracks[0], 0.5, places=2)
+
+    def test_emergency_stop_latches(self):
+        """After an estop, drive commands are ignored until released"""
+        self.loop.command("drive", (0.0, 1.0), now=0.0)
+        now = self.run_ticks(0.0, 0.2)
+        self.loop.emergency_stop()
+        self.assertEqual(self.actuator.tracks, (0.0, 0.0))
+
+        self.loop.command("drive", (0.0, 1.0), now=now)
+        now = self.run_ticks(now, 0.2)
+        self.assertEqual(self.actuator.tracks, (0.0, 0.0))
+
+        self.loop.release_estop()
+        self.loop.command("drive", (0.0, 1.0), now=now)
+        self.run_ticks(now, 0.2)
+        self.assertGreater(self.actuator.tracks[0], 0.0)
+
+    def test_release_does_not_resume_stale_drive(self):
+        """A drive command sent during the estop is not applied on release"""
+        self.loop.command("drive", (0.0, 1.0), now=0.0)
+        now = self.run_ticks(0.0, 0.2)
+        self.loop.emergency_stop()
+
+        self.loop.command("drive", (0.0, 1.0), now=now)
+        self.loop.release_estop()
+        self.run_ticks(now, 0.2)
+        self.assertEqual(self.actuator.tracks, (0.0, 0.0))
+
+
+class SlowSocket:
+    """WebSocket stand-in whose sends take a while, like a congested uplink"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, payload):
+        await asyncio.sleep(self.delay)
+        self.sent.append(payload)
+
+
+class OutboundSchedulerTests(SimpleTestCase):
+    """Test the robot's priority outbound lanes"""
+
+    def test_priority_order_and_video_dropping(self):
+        async def scenario():
+            socket = SlowSocket(delay=0.01)
+            scheduler = robot_client.OutboundScheduler(socket)
+            scheduler.put("video-1", robot_client.LANE_VIDEO)
+            await asyncio.sleep(0.005)  # video-1 is now being written
+
+            for n in range(2, 5):
+                scheduler.put(f"video-{n}", robot_client.LANE_VIDEO)
+            scheduler.put("telemetry", robot_client.LANE_TELEMETRY)
+            scheduler.put("pong", robot_client.LANE_CONTROL)
+
+            await asyncio.sleep(0.1)
+            scheduler.close()
+            return socket.sent, scheduler.dropped_video
+
+        sent, dropped = asyncio.run(scenario())
+        # Control overtakes telemetry, which overtakes video; stale frames never go out
+        self.assertEqual(sent, ["video-1", "pong", "telemetry", "video-4"])
+        self.assertEqual(dropped, 2)
+
+    def test_failed_messages_handed_back(self):
+        """Buffered messages still queued at disconnect go to on_failed"""
+        failed = []
+
+        async def scenario():
+            scheduler = robot_client.OutboundScheduler(SlowSocket(delay=1.0), on_failed=failed.append)
+            scheduler.put("a", robot_client.LANE_TELEMETRY, fallback={"n": 1})
+            scheduler.put("b", robot_client.LANE_TELEMETRY, fallback={"n": 2})
+            scheduler.put("frame", robot_client.LANE_VIDEO)
+            await asyncio.sleep(0.01)
+            scheduler.close()
+            await asyncio.sleep(0)
+            self.assertFalse(scheduler.put("c", robot_client.LANE_TELEMETRY))
+
+        asyncio.run(scenario())
+        self.assertEqual(failed, [{"n": 1}, {"n": 2}])
+
+
+class SlowPublisher:
+    """WebRTCPublisher stand-in whose offer takes a while, like ICE gathering"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def offer(self, peer_id):
+        await asyncio.sleep(0.2)
+        self.calls.append(("offer", peer_id))
+
+    async def answer(self, peer_id, sdp):
+        self.calls.append(("answer", peer_id))
+
+
+class WebRTCSignalingTests(SimpleTestCase):
+    """Test that WebRTC signaling stays off the command receive path"""
+
+    def test_offer_does_not_block_commands(self):
+        robot = robot_client.SimulatedRobot("ws://unused/", use_camera=False, buffer_offline=False,
+                                            webrtc=False)
+        robot.webrtc = SlowPublisher()
+
+        async def scenario():
+            started = time.monotonic()
+            await robot.handle_webrtc({"peer_id": "viewer-1"}, "webrtc_request")
+            await robot.handle_webrtc({"peer_id": "viewer-1", "sdp": "v=0"}, "webrtc_answer")
+            self.assertLess(time.monotonic() - started, 0.1)
+            await asyncio.wait(list(robot.webrtc_tasks.values()))
+
+        asyncio.run(scenario())
+        # The answer still waits for its peer's offer
+        self.assertEqual(robot.webrtc.calls, [("offer", "viewer-1"), ("answer", "viewer-1")])
+        self.assertEqual(robot.webrtc_tasks, {})
@@ -0,0 +1,110 @@
+"""
+Sensor Stream Test Suite
+Tests the binary sensor frame format, the per-device store and relaying
+"""
+
+import tempfile
+
+import numpy as np
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+import robot_client
+from robot.consumers import TelemetryConsumer
+from robot.sensorstream import (
+    InvalidSensorFrame, SensorStore, pack_sensor_batch, unpack_sensor_batch,
+)
+
+
+CHANNELS = ("imu_pitch", "motor_current_left")
+COLUMNS = [[1.5, 2.5, 3.5], [0.25, 0.5, 0.75]]
+
+
+class SensorFrameTests(SimpleTestCase):
+    """Test packing and unpacking binary sensor frames"""
+
+    def test_round_trip(self):
+        payload = pack_sensor_batch("robot_01", CHANNELS, 100.0, 1700000000.0, COLUMNS)
+        batch = unpack_sensor_batch(payload)
+        self.assertEqual(batch.source, "robot_01")
+        self.assertEqual(batch.channels, list(CHANNELS))
+        self.assertEqual(batch.n, 3)
+        self.assertEqual(batch.values("motor_current_left").tolist(), COLUMNS[1])
+        self.assertAlmostEqual(batch.timestamps()[-1], 1700000000.02)
+
+    def test_robot_client_encoding_matches(self):
+        """The standalone robot client produces byte-identical frames"""
+        self.assertEqual(
+            robot_client.pack_sensor_batch("robot_01", CHANNELS, 100.0, 1700000000.0, COLUMNS),
+            pack_sensor_batch("robot_01", CHANNELS, 100.0, 1700000000.0, COLUMNS),
+        )
+
+    def test_rejects_bad_frames(self):
+        payload = pack_sensor_batch("robot_01", CHANNELS, 100.0, 1700000000.0, COLUMNS)
+        for bad in (b"nope", b"XXXX" + payload[4:], payload[:-1],
+                    pack_sensor_batch("../etc", CHANNELS, 100.0, 0.0, COLUMNS)):
+            with self.assertRaises(InvalidSensorFrame):
+                unpack_sensor_batch(bad)
+
+
+class SensorStoreTests(SimpleTestCase):
+    """Test the append-only per-channel store"""
+
+    def test_append_and_read_range(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = SensorStore(directory.name)
+
+        for i in range(3):
+            columns = [[i * 10.0 + k for k in range(10)], [0.0] * 10]
+            store.append("robot_01", unpack_sensor_batch(
+                pack_sensor_batch("robot_01", CHANNELS, 10.0, 1000.0 + i, columns)
+            ))
+
+        self.assertEqual(store.channels("robot_01"), sorted(CHANNELS))
+        timestamps, values = store.read("robot_01", "imu_pitch")
+        self.assertEqual(len(values), 30)
+        self.assertTrue(np.all(np.diff(timestamps) > 0))
+
+        timestamps, values = store.read("robot_01", "imu_pitch", start=1001.0, end=1002.0)
+        self.assertEqual(values.tolist(), [10.0 + k for k in range(10)])
+
+
+class SensorRelayTests(TransactionTestCase):
+    """Test relaying binary sensor frames to subscribed dashboards"""
+
+    async def test_relay_to_subscribers_only(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        with override_settings(ROBOT_SENSOR_STORE_DIR=directory.name):
+            robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_imu")
+            await robot.connect()
+            await robot.receive_json_from()
+
+            subscriber = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+            await subscriber.connect()
+            await subscriber.receive_json_from()
+            await subscriber.send_json_to({"type": "sensor_subscribe", "device_id": "robot_imu"})
+            await subscriber.receive_json_from()
+
+            bystander = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+            await bystander.connect()
+            await bystander.receive_json_from()
+
+            payload = pack_sensor_batch("robot_imu", CHANNELS, 100.0, 1700000000.0, COLUMNS)
+            await robot.send_to(bytes_data=payload)
+
+            relayed = await subscriber.receive_output()
+            self.assertEqual(relayed["bytes"], payload)
+            self.assertTrue(await bystander.receive_nothing())
+
+            _, values = SensorStore(directory.name).read("robot_imu", "imu_pitch")
+            self.assertEqual(values.tolist(), COLUMNS[0])
+
+            # Frames claiming another robot's identity are refused
+            await robot.send_to(bytes_data=pack_sensor_batch("robot_other", CHANNELS, 100.0, 0.0, COLUMNS))
+            self.assertIn("error", await robot.receive_json_from())
+
+            for communicator in (robot, subscriber, bystander):
+                await communicator.disconnect()
@@ -0,0 +1,121 @@
+"""
+Subscription Test Suite
+Tests the robot → viewer reverse index and per-robot stream delivery
+"""
+
+from types import SimpleNamespace
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase
+
+from robot.consumers import TelemetryConsumer
+from robot.subscriptions import InvalidSubscription, SubscriptionIndex
+
+
+def viewer(connection_id):
+    return SimpleNamespace(connection_id=connection_id)
+
+
+class SubscriptionIndexTests(SimpleTestCase):
+    """Test subscribing, unsubscribing and the implicit wildcard"""
+
+    def test_new_viewers_see_everything(self):
+        index = SubscriptionIndex()
+        a = viewer("a")
+        index.add_viewer(a)
+        self.assertEqual(index.viewers("robot_01", "video"), [a])
+        self.assertEqual(index.viewers("robot_01", "sensors"), [])
+
+    def test_first_subscribe_replaces_wildcard(self):
+        index = SubscriptionIndex()
+        a, b = viewer("a"), viewer("b")
+        index.add_viewer(a)
+        index.add_viewer(b)
+        index.subscribe(a, "robot_01", ["video"])
+
+        self.assertEqual(index.viewers("robot_01", "video"), [b, a])
+        self.assertEqual(index.viewers("robot_02", "video"), [b])
+        self.assertEqual(index.viewers("robot_01", "telemetry"), [b])
+        self.assertEqual(index.of(a), {"robot_01": ["video"]})
+
+    def test_wildcard_and_direct_deliver_once(self):
+        index = SubscriptionIndex()
+        a = viewer("a")
+        index.add_viewer(a)
+        index.subscribe(a, "*", ["telemetry"])
+        index.subscribe(a, "robot_01", ["telemetry"])
+        self.assertEqual(index.viewers("robot_01", "telemetry"), [a])
+
+    def test_remove_leaves_nothing_behind(self):
+        index = SubscriptionIndex()
+        a = viewer("a")
+        index.add_viewer(a)
+        index.subscribe(a, "robot_01")
+        index.unsubscribe(a, "robot_01", "status")
+        index.remove(a)
+        self.assertEqual(dict(index.subscribers), {})
+        self.assertEqual(dict(index.by_viewer), {})
+
+    def test_opt_in_streams_keep_wildcard(self):
+        index = SubscriptionIndex()
+        a = viewer("a")
+        index.add_viewer(a)
+        index.subscribe(a, "robot_01", ["sensors"])
+        index.subscribe(a, "*", ["fleet"])
+        self.assertEqual(index.viewers("robot_02", "video"), [a])
+        self.assertEqual(index.viewers("robot_01", "sensors"), [a])
+
+        index.unsubscribe(a, "robot_01", ["sensors"])
+        self.assertEqual(index.viewers("robot_01", "telemetry"), [a])
+
+    def test_unknown_stream(self):
+        with self.assertRaises(InvalidSubscription):
+            SubscriptionIndex().subscribe(viewer("a"), "robot_01", ["audio"])
+
+
+class SubscriptionDeliveryTests(TransactionTestCase):
+    """Test that dashboards only receive the robots they watch"""
+
+    async def connect(self, path):
+        communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), path)
+        await communicator.connect()
+        return communicator, await communicator.receive_json_from()
+
+    async def test_video_only_to_watchers(self):
+        robot_a, _ = await self.connect("/ws/telemetry/?device_id=robot_sub_a")
+        robot_b, _ = await self.connect("/ws/telemetry/?device_id=robot_sub_b")
+        watcher, ack = await self.connect("/ws/telemetry/")
+        legacy, legacy_ack = await self.connect("/ws/telemetry/")
+        self.assertNotEqual(ack["viewer_id"], legacy_ack["viewer_id"])
+
+        await watcher.send_json_to({"type": "subscribe", "device_id": "robot_sub_a", "streams": ["video"]})
+        reply = await watcher.receive_json_from()
+        self.assertEqual(reply["subscriptions"], {"robot_sub_a": ["video"]})
+
+        for robot, number in ((robot_b, 1), (robot_a, 2)):
+            await robot.send_json_to({"type": "video_frame", "frame_data": "abc", "frame_number": number})
+            await robot.receive_json_from()
+
+        self.assertEqual((await watcher.receive_json_from())["device_id"], "robot_sub_a")
+        self.assertTrue(await watcher.receive_nothing())
+        received = [(await legacy.receive_json_from())["device_id"] for _ in range(2)]
+        self.assertEqual(sorted(received), ["robot_sub_a", "robot_sub_b"])
+
+        for communicator in (robot_a, robot_b, watcher, legacy):
+            await communicator.disconnect()
+
+    async def test_sensor_subscribe_keeps_legacy_streams(self):
+        """The older sensor_subscribe spelling only adds sensors to a legacy dashboard"""
+        robot, _ = await self.connect("/ws/telemetry/?device_id=robot_sub_sensors")
+        legacy, _ = await self.connect("/ws/telemetry/")
+
+        await legacy.send_json_to({"type": "sensor_subscribe", "device_id": "robot_sub_sensors"})
+        await legacy.receive_json_from()
+        await robot.send_json_to({"type": "telemetry", "battery": 80, "cpu": 10.0,
+                                  "temperature": 30.0, "signal": 90})
+        await robot.receive_json_from()
+        update = await legacy.receive_json_from()
+        self.assertEqual((update["type"], update["device_id"]), ("telemetry_update", "robot_sub_sensors"))
+
+        await legacy.disconnect()
+        await robot.disconnect()
@@ -0,0 +1,61 @@
+"""
+Binary Video Frame Test Suite
+Tests the binary frame layout and per-dashboard video format
+"""
+
+import base64
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase
+
+from robot.consumers import TelemetryConsumer
+from robot.videoframe import InvalidVideoFrame, pack_video_frame, unpack_video_frame
+
+
+JPEG = b"\xff\xd8\xff\xe0fake jpeg\xff\xd9"
+
+
+class VideoFrameTests(SimpleTestCase):
+    """Test packing and unpacking"""
+
+    def test_round_trip(self):
+        frame = unpack_video_frame(pack_video_frame("robot_01", JPEG, 7, 1700000000000.5, None, 1700000000004.0))
+        self.assertEqual(frame["device_id"], "robot_01")
+        self.assertEqual(frame["frame_number"], 7)
+        self.assertEqual(frame["capture_ts"], 1700000000000.5)
+        self.assertIsNone(frame["sent_ts"])
+        self.assertEqual(frame["jpeg"], JPEG)
+
+    def test_rejects_other_frames(self):
+        with self.assertRaises(InvalidVideoFrame):
+            unpack_video_frame(b"SNS1" + bytes(40))
+
+
+class VideoFormatTests(TransactionTestCase):
+    """Test that each dashboard gets video in the format it asked for"""
+
+    async def test_binary_and_json_viewers(self):
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_vf")
+        await robot.connect()
+        await robot.receive_json_from()
+        binary = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await binary.connect()
+        await binary.receive_json_from()
+        legacy = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await legacy.connect()
+        await legacy.receive_json_from()
+
+        await binary.send_json_to({"type": "video_format", "format": "binary"})
+        self.assertEqual((await binary.receive_json_from())["format"], "binary")
+
+        frame_data = base64.b64encode(JPEG).decode()
+        await robot.send_json_to({"type": "video_frame", "frame_data": frame_data, "frame_number": 3})
+        await robot.receive_json_from()
+
+        frame = unpack_video_frame((await binary.receive_output())["bytes"])
+        self.assertEqual((frame["device_id"], frame["frame_number"], frame["jpeg"]), ("robot_vf", 3, JPEG))
+        self.assertIsNotNone(frame["server_ts"])
+        self.assertEqual((await legacy.receive_json_from())["frame_data"], frame_data)
+
+        for communicator in (robot, binary, legacy):
+            await communicator.disconnect()
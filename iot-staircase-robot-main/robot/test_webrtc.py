@@ -0,0 +1,164 @@
+"""
+WebRTC Test Suite
+Tests signaling over the telemetry WebSocket and, with aiortc installed,
+a full loopback session through it (direct and via the server relay)
+"""
+
+import asyncio
+import unittest
+
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+
+import robot_client
+from robot.consumers import TelemetryConsumer
+from robot.webrtc import HAS_AIORTC, RELAY_PEER, webrtc_relay
+
+if HAS_AIORTC:
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+
+
+class WebRTCTestMixin:
+
+    async def connect_pair(self, device_id):
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), f"/ws/telemetry/?device_id={device_id}")
+        await robot.connect()
+        await robot.receive_json_from()
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+        return robot, website
+
+
+class SignalingTests(WebRTCTestMixin, TransactionTestCase):
+    """Test routing of signaling messages between a dashboard and a robot"""
+
+    async def test_messages_routed_by_peer(self):
+        robot, website = await self.connect_pair("robot_rtc")
+
+        await website.send_json_to({"type": "webrtc_request", "device_id": "robot_rtc"})
+        request = await robot.receive_json_from()
+        self.assertEqual(request["type"], "webrtc_request")
+        peer_id = request["peer_id"]
+
+        await robot.send_json_to({"type": "webrtc_offer", "peer_id": peer_id, "sdp": "v=0 offer"})
+        offer = await website.receive_json_from()
+        self.assertEqual(offer, {"type": "webrtc_offer", "sdp": "v=0 offer", "device_id": "robot_rtc"})
+
+        await website.send_json_to({"type": "webrtc_answer", "device_id": "robot_rtc", "sdp": "v=0 answer"})
+        answer = await robot.receive_json_from()
+        self.assertEqual(answer, {"type": "webrtc_answer", "sdp": "v=0 answer", "peer_id": peer_id})
+
+        # Leaving dashboards hang up their sessions
+        await website.disconnect()
+        hangup = await robot.receive_json_from()
+        self.assertEqual(hangup["type"], "webrtc_hangup")
+        self.assertEqual(hangup["peer_id"], peer_id)
+        await robot.disconnect()
+
+    async def test_no_robot(self):
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+        await website.send_json_to({"type": "webrtc_request", "device_id": "robot_missing"})
+        reply = await website.receive_json_from()
+        self.assertEqual(reply["type"], "webrtc_hangup")
+        self.assertEqual(reply["reason"], "no_robot")
+        await website.disconnect()
+
+
+@unittest.skipUnless(HAS_AIORTC, "aiortc not installed")
+@override_settings(ROBOT_WEBRTC_RELAY=True, ROBOT_WEBRTC_TRACK_TIMEOUT=0.2)
+class RelayFeedTests(WebRTCTestMixin, TransactionTestCase):
+    """Test that the relay forgets robot connections that never worked or died"""
+
+    async def request(self, robot, website, device_id):
+        await website.send_json_to({"type": "webrtc_request", "device_id": device_id})
+        return await robot.receive_json_from(timeout=2)
+
+    async def test_timed_out_feed_is_dropped(self):
+        robot, website = await self.connect_pair("robot_rtc_silent")
+
+        self.assertEqual((await self.request(robot, website, "robot_rtc_silent"))["peer_id"], RELAY_PEER)
+        hangup = await website.receive_json_from(timeout=2)
+        self.assertEqual(hangup["reason"], "no_track")
+        self.assertNotIn("robot_rtc_silent", webrtc_relay.feeds)
+
+        # The robot is asked again for the next viewer
+        self.assertEqual((await self.request(robot, website, "robot_rtc_silent"))["type"], "webrtc_request")
+        await website.receive_json_from(timeout=2)
+
+        await website.disconnect()
+        await robot.disconnect()
+
+    async def test_closed_upstream_is_dropped(self):
+        robot, website = await self.connect_pair("robot_rtc_closed")
+        await self.request(robot, website, "robot_rtc_closed")
+        feed = webrtc_relay.feeds["robot_rtc_closed"]
+
+        await feed.pc.close()
+        await asyncio.sleep(0.05)     # the state change handler runs as its own task
+        self.assertNotIn("robot_rtc_closed", webrtc_relay.feeds)
+        with self.assertRaises(ConnectionError):
+            feed.track.result()
+
+        await website.receive_json_from(timeout=2)
+        await website.disconnect()
+        await robot.disconnect()
+
+
+@unittest.skipUnless(HAS_AIORTC and robot_client.HAS_NUMPY, "aiortc not installed")
+class LoopbackTests(WebRTCTestMixin, TransactionTestCase):
+    """A robot publisher and a viewer peer on localhost, signaled through the consumer"""
+
+    async def run_robot(self, robot, publisher):
+        """The robot client's side of signaling"""
+        while True:
+            data = await robot.receive_json_from(timeout=10)
+            if data.get("type") == "webrtc_request":
+                await publisher.offer(data["peer_id"])
+            elif data.get("type") == "webrtc_answer":
+                await publisher.answer(data["peer_id"], data["sdp"])
+
+    async def watch(self, device_id, expect_peer):
+        robot, website = await self.connect_pair(device_id)
+        publisher = robot_client.WebRTCPublisher(robot.send_json_to, frame_size=(160, 120))
+        publisher.track.push(robot_client.test_pattern(160, 120))
+        peers = []
+        original_offer = publisher.offer
+
+        async def offer(peer_id):
+            peers.append(peer_id)
+            await original_offer(peer_id)
+
+        publisher.offer = offer
+        robot_side = asyncio.create_task(self.run_robot(robot, publisher))
+
+        viewer = RTCPeerConnection()
+        track = asyncio.get_running_loop().create_future()
+        viewer.on("track", lambda t: track.done() or track.set_result(t))
+        try:
+            await website.send_json_to({"type": "webrtc_request", "device_id": device_id})
+            offer_msg = await website.receive_json_from(timeout=10)
+            self.assertEqual(offer_msg["type"], "webrtc_offer")
+            await viewer.setRemoteDescription(RTCSessionDescription(sdp=offer_msg["sdp"], type="offer"))
+            await viewer.setLocalDescription(await viewer.createAnswer())
+            await website.send_json_to({"type": "webrtc_answer", "device_id": device_id,
+                                        "sdp": viewer.localDescription.sdp})
+
+            frame = await asyncio.wait_for((await asyncio.wait_for(track, 10)).recv(), 10)
+            self.assertEqual((frame.width, frame.height), (160, 120))
+            self.assertEqual(peers[0] == RELAY_PEER, expect_peer == RELAY_PEER)
+        finally:
+            robot_side.cancel()
+            await viewer.close()
+            await publisher.close()
+            await website.disconnect()
+            await robot.disconnect()
+
+    async def test_direct(self):
+        await self.watch("robot_rtc_direct", expect_peer="viewer")
+
+    @override_settings(ROBOT_WEBRTC_RELAY=True)
+    async def test_relay(self):
+        await self.watch("robot_rtc_relay", expect_peer=RELAY_PEER)
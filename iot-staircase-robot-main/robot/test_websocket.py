@@ -4,11 +4,13 @@ Tests all control messages through the WebSocket pipeline
 """
 
 import asyncio
+import base64
 import json
 import logging
+import zlib
 from channels.testing import WebsocketCommunicator
-from django.test import TransactionTestCase
-from robot.consumers import TelemetryConsumer
+from django.test import TransactionTestCase, override_settings
+from robot.consumers import TelemetryConsumer, expand_telemetry
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -165,6 +167,153 @@ class WebSocketControlMessageTests(TransactionTestCase):
         print("✅ Full sequence completed successfully!")
 
 
+class OfflineBatchTests(TransactionTestCase):
+    """Test ingesting telemetry a robot buffered while offline"""
+
+    async def test_offline_batch_bulk_insert(self):
+        """Replayed samples are stored with their original timestamps and acknowledged"""
+        from asgiref.sync import sync_to_async
+        from robot.models import TelemetryData
+
+        communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_offline")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        samples = [
+            {"type": "telemetry", "battery": 80 - i, "cpu": 30.0, "temperature": 35.0,
+             "signal": 70.0, "client_ts": 1700000000000 + i * 3000}
+            for i in range(5)
+        ]
+        payload = base64.b64encode(zlib.compress(json.dumps(samples).encode())).decode()
+        await communicator.send_json_to({
+            "type": "offline_batch",
+            "batch_id": 7,
+            "encoding": "zlib+base64",
+            "count": len(samples),
+            "data": payload
+        })
+
+        ack = await communicator.receive_json_from()
+        self.assertEqual(ack["original_type"], "offline_batch")
+        self.assertEqual(ack["batch_id"], 7)
+
+        timestamps = await sync_to_async(list)(
+            TelemetryData.objects.order_by("timestamp").values_list("timestamp", flat=True)
+        )
+        self.assertEqual(len(timestamps), 5)
+        self.assertEqual(timestamps[0].timestamp(), 1700000000.0)
+        self.assertEqual(timestamps[-1].timestamp(), 1700000012.0)
+
+        await communicator.disconnect()
+
+    async def test_oversized_batch_rejected(self):
+        """A batch the server refuses is still answered with its batch_id"""
+        communicator = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_offline")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        samples = [{"type": "telemetry", "battery": 80, "client_ts": 1700000000000 + i} for i in range(50)]
+        with override_settings(ROBOT_OFFLINE_BATCH_MAX_BYTES=256):
+            await communicator.send_json_to({
+                "type": "offline_batch",
+                "batch_id": 8,
+                "encoding": "zlib+base64",
+                "count": len(samples),
+                "data": base64.b64encode(zlib.compress(json.dumps(samples).encode())).decode()
+            })
+            ack = await communicator.receive_json_from()
+
+        self.assertEqual(ack["type"], "ack")
+        self.assertEqual(ack["batch_id"], 8)
+        self.assertEqual(ack["status"], "rejected")
+
+        await communicator.disconnect()
+
+
+class TelemetryBatchTests(TransactionTestCase):
+    """Test columnar multi-sample telemetry messages"""
+
+    async def test_batch_single_bulk_write(self):
+        """A batch is stored in one insert and dashboards get the newest sample"""
+        from asgiref.sync import sync_to_async
+        from robot.models import TelemetryData
+
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_batch")
+        await robot.connect()
+        await robot.receive_json_from()
+        website = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/")
+        await website.connect()
+        await website.receive_json_from()
+
+        await robot.send_json_to({
+            "type": "telemetry_batch",
+            "count": 5,
+            "battery": [90.0, 89.9, 89.8, 89.7, 89.6],
+            "cpu": [10.0, 20.0, 30.0, 40.0, 50.0],
+            "temperature": [40.0] * 5,
+            "signal": [75.0] * 5,
+            "client_ts": [1700000000000 + i * 200 for i in range(5)]
+        })
+
+        ack = await robot.receive_json_from()
+        self.assertEqual(ack["original_type"], "telemetry_batch")
+        self.assertEqual(await sync_to_async(TelemetryData.objects.count)(), 5)
+
+        update = await website.receive_json_from()
+        self.assertEqual(update["type"], "telemetry_update")
+        self.assertEqual(update["cpu"], 50.0)
+        self.assertEqual(update["samples"], 5)
+        self.assertIsNotNone(update["battery_estimate"])
+
+        await website.disconnect()
+        await robot.disconnect()
+
+    async def test_batch_without_client_ts(self):
+        """Samples without client_ts are stored at the receive time, not dropped"""
+        from asgiref.sync import sync_to_async
+        from robot.models import TelemetryData
+
+        robot = WebsocketCommunicator(TelemetryConsumer.as_asgi(), "/ws/telemetry/?device_id=robot_nots")
+        await robot.connect()
+        await robot.receive_json_from()
+
+        await robot.send_json_to({
+            "type": "telemetry_batch",
+            "battery": [70.0, 69.9, 69.8],
+            "cpu": [10.0, 20.0, 30.0],
+            "temperature": [40.0] * 3,
+            "signal": [75.0] * 3
+        })
+
+        ack = await robot.receive_json_from()
+        self.assertEqual(ack["message"], "Stored 3 telemetry sample(s)")
+        self.assertEqual(await sync_to_async(TelemetryData.objects.count)(), 3)
+
+        # Value columns that do not line up are refused instead of cut short
+        await robot.send_json_to({"type": "telemetry_batch", "battery": [70.0, 69.9], "cpu": [10.0],
+                                  "temperature": [40.0], "signal": [75.0]})
+        self.assertIn("Invalid telemetry batch", (await robot.receive_json_from())["error"])
+
+        await robot.disconnect()
+
+    def test_latest_sample_keeps_its_client_ts(self):
+        """A skipped last row does not shift timestamps onto the newest stored sample"""
+        samples = expand_telemetry({
+            "type": "telemetry_batch",
+            "battery": [90.0, 89.0, None],
+            "cpu": [10.0, 11.0, 12.0],
+            "temperature": [40.0] * 3,
+            "signal": [75.0] * 3,
+            "client_ts": [1700000000000, 1700000000200, 1700000000400]
+        })
+        values, sampled_at, client_ts = samples[-1]
+        self.assertEqual(values["battery"], 89.0)
+        self.assertEqual(client_ts, 1700000000200)
+        self.assertEqual(sampled_at.timestamp(), 1700000000.2)
+
+
 # Run tests with: python manage.py test robot.tests.WebSocketControlMessageTests
 if __name__ == "__main__":
     import django
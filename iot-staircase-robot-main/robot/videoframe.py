@@ -0,0 +1,54 @@
+"""
+Binary Video Frames
+Dashboards that send {"type": "video_format", "format": "binary"} receive
+video as binary WebSocket frames instead of base64 JPEG inside JSON: a third
+smaller, nothing to parse, and the JPEG goes straight to createImageBitmap.
+
+Frame layout (little-endian):
+    magic      4s     b"VID1"
+    header     IdddB  frame number, capture_ts, sent_ts, server_ts
+                      (epoch ms on the server clock, NaN = unknown),
+                      device_id length
+    device_id  utf-8 bytes
+    jpeg       the rest of the frame
+"""
+
+import math
+import struct
+
+
+MAGIC = b"VID1"
+HEADER = struct.Struct("<4sIdddB")
+
+
+class InvalidVideoFrame(ValueError):
+    pass
+
+
+def _ms(value):
+    return float("nan") if value is None else float(value)
+
+
+def pack_video_frame(device_id, jpeg, frame_number=0, capture_ts=None, sent_ts=None, server_ts=None):
+    source = device_id.encode("utf-8")
+    if len(source) > 255:
+        raise InvalidVideoFrame(f"device_id too long: {device_id[:32]}...")
+    header = HEADER.pack(MAGIC, (frame_number or 0) & 0xFFFFFFFF,
+                         _ms(capture_ts), _ms(sent_ts), _ms(server_ts), len(source))
+    return b"".join((header, source, jpeg))
+
+
+def unpack_video_frame(payload):
+    """A binary frame as a dict like the JSON video_frame, with the JPEG as bytes"""
+    if len(payload) < HEADER.size or payload[:4] != MAGIC:
+        raise InvalidVideoFrame("Not a binary video frame")
+    _, frame_number, capture_ts, sent_ts, server_ts, length = HEADER.unpack_from(payload)
+    start = HEADER.size + length
+    return {
+        "device_id": bytes(payload[HEADER.size:start]).decode("utf-8"),
+        "frame_number": frame_number,
+        "capture_ts": None if math.isnan(capture_ts) else capture_ts,
+        "sent_ts": None if math.isnan(sent_ts) else sent_ts,
+        "server_ts": None if math.isnan(server_ts) else server_ts,
+        "jpeg": bytes(payload[start:]),
+    }
@@ -4,8 +4,10 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from .models import TelemetryData
+from .battery import all_estimates
+from .fleet import fleet, summary_interval
 
 def home_redirect(request):
     if request.user.is_authenticated:
@@ -156,3 +158,18 @@ def battery_history(request):
         
     return JsonResponse(list(history), safe=False)
 
+
+@login_required(login_url='login')
+def battery_estimates(request):
+    # Live time-to-empty for every robot, served from the in-memory estimators
+    return JsonResponse(all_estimates())
+
+
+@login_required(login_url='login')
+def fleet_summary(request):
+    # The summary built by the last fleet tick, already serialized for every reader
+    if fleet.cached_json is None:
+        fleet.summary()
+    response = HttpResponse(fleet.cached_json, content_type='application/json')
+    response['Cache-Control'] = f'private, max-age={max(1, round(summary_interval()))}'
+    return response
@@ -0,0 +1,182 @@
+"""
+WebRTC Video
+Optional low-latency video path next to JPEG-over-WebSocket, which stays
+the fallback. The telemetry WebSocket carries the signaling:
+
+    viewer → server   webrtc_request {device_id}
+    server → robot    webrtc_request {peer_id}
+    robot  → server   webrtc_offer   {peer_id, sdp}    → viewer {device_id, sdp}
+    viewer → server   webrtc_answer  {device_id, sdp}  → robot  {peer_id, sdp}
+    either side       webrtc_ice / webrtc_hangup, routed the same way
+
+peer_id is the viewer's connection id. Robots without aiortc answer a
+request with webrtc_hangup and the viewer keeps the JPEG stream.
+
+With ROBOT_WEBRTC_RELAY on (needs aiortc on the server), the server is the
+robot's only peer (peer_id "relay") and offers the robot's track to each
+viewer itself, so the robot encodes once however many viewers watch.
+aiortc forwards decoded frames, so the server encodes once per viewer.
+"""
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+
+from .outbound import LANE_CONTROL
+
+try:
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+    from aiortc.contrib.media import MediaRelay
+    from aiortc.sdp import candidate_from_sdp
+    HAS_AIORTC = True
+except ImportError:
+    HAS_AIORTC = False
+
+
+logger = logging.getLogger(__name__)
+
+RELAY_PEER = "relay"
+WEBRTC_SIGNALS = {"webrtc_request", "webrtc_offer", "webrtc_answer", "webrtc_ice", "webrtc_hangup"}
+
+
+def relay_enabled():
+    return HAS_AIORTC and getattr(settings, 'ROBOT_WEBRTC_RELAY', False)
+
+
+def track_timeout():
+    """How long viewers wait for a robot's track to reach the relay (seconds)"""
+    return float(getattr(settings, 'ROBOT_WEBRTC_TRACK_TIMEOUT', 10.0))
+
+
+def parse_candidate(candidate):
+    """A browser's RTCIceCandidate JSON as an aiortc candidate (None = end of candidates)"""
+    if not candidate or not candidate.get("candidate"):
+        return None
+    parsed = candidate_from_sdp(candidate["candidate"].split(":", 1)[-1])
+    parsed.sdpMid = candidate.get("sdpMid")
+    parsed.sdpMLineIndex = candidate.get("sdpMLineIndex")
+    return parsed
+
+
+async def send_control(consumer, message):
+    await consumer.outbox.put(LANE_CONTROL, json.dumps(message))
+
+
+class RobotFeed:
+    """The relay's connection to one robot, shared by all of its viewers"""
+
+    def __init__(self, device_id, on_lost):
+        self.device_id = device_id
+        self.pc = RTCPeerConnection()
+        self.track = asyncio.get_running_loop().create_future()
+        self.viewers = {}       # {viewer connection_id: RTCPeerConnection}
+
+        @self.pc.on("track")
+        def on_track(track):
+            if track.kind == "video" and not self.track.done():
+                self.track.set_result(track)
+
+        # A dead upstream must not keep handing its track to new viewers
+        @self.pc.on("connectionstatechange")
+        async def on_connection_state():
+            if self.pc.connectionState in ("failed", "closed"):
+                await on_lost(self)
+
+
+class WebRTCRelay:
+    """Server-side forwarding of robot tracks to viewers (ROBOT_WEBRTC_RELAY)"""
+
+    def __init__(self):
+        self.feeds = {}         # {device_id: RobotFeed}
+        self.media = None
+
+    async def subscribe(self, viewer, robot):
+        """Offer robot's track to viewer, first connecting to the robot if needed"""
+        if self.media is None:
+            self.media = MediaRelay()
+        feed = self.feeds.get(robot.device_id)
+        if feed is None:
+            feed = self.feeds[robot.device_id] = RobotFeed(robot.device_id, self.drop_feed)
+            await send_control(robot, {"type": "webrtc_request", "peer_id": RELAY_PEER})
+
+        try:
+            track = await asyncio.wait_for(asyncio.shield(feed.track), timeout=track_timeout())
+        except (asyncio.TimeoutError, ConnectionError):
+            logger.warning(f"No WebRTC track from {robot.device_id}, viewer stays on JPEG")
+            # The next viewer asks the robot again instead of waiting on this feed
+            await self.drop_feed(feed)
+            await send_control(viewer, {"type": "webrtc_hangup", "device_id": robot.device_id,
+                                        "reason": "no_track"})
+            return
+
+        await self.drop_viewer(viewer.connection_id, robot.device_id)
+        pc = RTCPeerConnection()
+        feed.viewers[viewer.connection_id] = pc
+        pc.addTrack(self.media.subscribe(track, buffered=False))
+        await pc.setLocalDescription(await pc.createOffer())
+        await send_control(viewer, {
+            "type": "webrtc_offer",
+            "device_id": robot.device_id,
+            "sdp": pc.localDescription.sdp,
+            "sdp_type": pc.localDescription.type
+        })
+
+    async def robot_offer(self, robot, sdp):
+        """Answer the robot's offer for the relay's upstream connection"""
+        feed = self.feeds.get(robot.device_id)
+        if feed is None:
+            return
+        await feed.pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type="offer"))
+        await feed.pc.setLocalDescription(await feed.pc.createAnswer())
+        await send_control(robot, {
+            "type": "webrtc_answer",
+            "peer_id": RELAY_PEER,
+            "sdp": feed.pc.localDescription.sdp,
+            "sdp_type": feed.pc.localDescription.type
+        })
+
+    def _viewer_pc(self, connection_id, device_id):
+        feed = self.feeds.get(device_id)
+        return feed.viewers.get(connection_id) if feed else None
+
+    async def viewer_answer(self, viewer, device_id, sdp):
+        pc = self._viewer_pc(viewer.connection_id, device_id)
+        if pc is not None:
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type="answer"))
+
+    async def add_ice(self, viewer, device_id, candidate):
+        pc = self._viewer_pc(viewer.connection_id, device_id)
+        if pc is not None:
+            await pc.addIceCandidate(parse_candidate(candidate))
+
+    async def drop_viewer(self, connection_id, device_id=None):
+        for feed in list(self.feeds.values()):
+            if device_id not in (None, feed.device_id):
+                continue
+            pc = feed.viewers.pop(connection_id, None)
+            if pc is not None:
+                await pc.close()
+
+    async def drop_robot(self, device_id):
+        feed = self.feeds.get(device_id)
+        if feed is not None:
+            await self.drop_feed(feed)
+
+    async def drop_feed(self, feed):
+        """Close one robot connection, unless a newer one has replaced it"""
+        if self.feeds.get(feed.device_id) is not feed:
+            return
+        del self.feeds[feed.device_id]
+        if not feed.track.done():
+            # Viewers still waiting for the track give up now
+            feed.track.set_exception(ConnectionError(f"{feed.device_id} has no WebRTC track"))
+            feed.track.exception()
+        for pc in feed.viewers.values():
+            await pc.close()
+        await feed.pc.close()
+
+
+# Global relay for this server process (used when relay_enabled())
+webrtc_relay = WebRTCRelay()
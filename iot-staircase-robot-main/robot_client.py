@@ -6,15 +6,27 @@ Connects to the Django WebSocket server and:
 - Receives control commands from the server
 """
 
+import argparse
 import asyncio
 import json
 import random
 import websockets
+import os
 import sys
 import base64
+import glob
+import itertools
+import math
+import shutil
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
+from urllib.parse import urlencode
+import threading
 import time
+import zlib
 
 # OpenCV for camera capture
 try:
@@ -25,6 +37,13 @@ except ImportError:
     HAS_OPENCV = False
     print("⚠️  OpenCV not available. Install with: pip install opencv-python")
 
+# Optional: NumPy for motion-aware frame skipping
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 # Optional: PIL for fallback
 try:
     from PIL import Image, ImageDraw
@@ -32,11 +51,1180 @@ try:
 except ImportError:
     HAS_PIL = False
 
+# Optional: libjpeg-turbo bindings (pip install PyTurboJPEG), the fastest JPEG encoder
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_RGB, TJSAMP_420, TJSAMP_422, TJSAMP_444
+    HAS_TURBOJPEG = True
+except ImportError:
+    HAS_TURBOJPEG = False
+
+# Optional: aiortc for the low-latency WebRTC video path (JPEG frames stay the fallback)
+try:
+    import av
+    from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack
+    from aiortc.contrib.media import MediaRelay
+    from aiortc.sdp import candidate_from_sdp
+    HAS_AIORTC = True
+except ImportError:
+    HAS_AIORTC = False
+    VideoStreamTrack = object
+
+
+class CameraCapture:
+    """
+    Reads camera frames on a dedicated thread
+    Only the newest frame is kept (lock-protected slot), so the asyncio loop
+    never blocks on camera.read() and never sends a stale buffered frame.
+    """
+    
+    def __init__(self, camera):
+        self.camera = camera
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._captured_at = None
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while self._running:
+            ret, frame = self.camera.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._lock:
+                self._frame = frame
+                self._seq += 1
+                self._captured_at = time.time()
+    
+    def latest(self, after_seq=0):
+        """
+        Return (frame, seq, captured_at) for the newest frame
+        frame is None if nothing newer than after_seq has been captured
+        """
+        with self._lock:
+            if self._seq == after_seq:
+                return None, self._seq, self._captured_at
+            return self._frame, self._seq, self._captured_at
+    
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+
+class MotionDetector:
+    """
+    Cheap scene-change detector for camera frames
+    Compares a downscaled grayscale copy of each frame with the last frame
+    that was sent (mean absolute difference, 0-255 scale). Still frames are
+    skipped except for a keep-alive frame every keepalive_interval seconds;
+    the first frame that differs is sent immediately.
+    """
+    
+    def __init__(self, threshold=2.0, keepalive_interval=2.0, step=8):
+        self.threshold = threshold
+        self.keepalive_interval = keepalive_interval
+        self.step = step
+        self.reference = None
+        self.last_sent_at = 0.0
+        self.last_score = None
+        self.skipped = 0
+    
+    def thumbnail(self, frame):
+        """Every step-th pixel, averaged over colour channels"""
+        small = np.asarray(frame)[::self.step, ::self.step]
+        if small.ndim == 3:
+            small = small.mean(axis=2, dtype=np.float32)
+        return small.astype(np.float32, copy=False)
+    
+    def should_send(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        thumb = self.thumbnail(frame)
+        
+        if self.reference is None or self.reference.shape != thumb.shape:
+            score = float('inf')
+        else:
+            score = float(np.abs(thumb - self.reference).mean())
+        self.last_score = score
+        
+        if score >= self.threshold or now - self.last_sent_at >= self.keepalive_interval:
+            self.reference = thumb
+            self.last_sent_at = now
+            return True
+        
+        self.skipped += 1
+        return False
+
+
+SUBSAMPLING_MODES = ("444", "422", "420")
+
+
+class FrameEncoder:
+    """
+    JPEG encoder backend
+    encode() takes a camera frame (BGR numpy array) or a PIL image and
+    returns the JPEG as a bytes-like object, valid until the same thread
+    encodes its next frame (backends may hand out a reused buffer).
+    """
+    
+    name = None
+    
+    def __init__(self, quality=70, subsampling="420"):
+        if subsampling not in SUBSAMPLING_MODES:
+            raise ValueError(f"Unknown chroma subsampling {subsampling!r}, use one of {SUBSAMPLING_MODES}")
+        self.quality = int(quality)
+        self.subsampling = subsampling
+    
+    @classmethod
+    def available(cls):
+        return False
+    
+    def encode(self, frame):
+        raise NotImplementedError
+
+
+class OpenCVEncoder(FrameEncoder):
+    name = "opencv"
+    
+    def __init__(self, quality=70, subsampling="420"):
+        super().__init__(quality, subsampling)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        # Sampling factor control needs OpenCV 4.5.5+, older builds always use 4:2:0
+        if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+            factor = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{subsampling}", None)
+            if factor is not None:
+                self.params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+    
+    @classmethod
+    def available(cls):
+        return HAS_OPENCV
+    
+    def encode(self, frame):
+        if HAS_PIL and isinstance(frame, Image.Image):
+            frame = cv2.cvtColor(np.asarray(frame.convert("RGB")), cv2.COLOR_RGB2BGR)
+        ok, buffer = cv2.imencode('.jpg', frame, self.params)
+        if not ok:
+            raise RuntimeError("OpenCV failed to encode the frame")
+        return buffer
+
+
+class PillowEncoder(FrameEncoder):
+    """Pillow's libjpeg; writes into one reused BytesIO per thread"""
+    
+    name = "pillow"
+    PIL_SUBSAMPLING = {"444": 0, "422": 1, "420": 2}
+    
+    def __init__(self, quality=70, subsampling="420"):
+        super().__init__(quality, subsampling)
+        self.local = threading.local()
+    
+    @classmethod
+    def available(cls):
+        return HAS_PIL
+    
+    def encode(self, frame):
+        if not isinstance(frame, Image.Image):
+            # Camera frames are BGR
+            frame = Image.fromarray(np.ascontiguousarray(np.asarray(frame)[..., ::-1]))
+        
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            buffer = self.local.buffer = BytesIO()
+        else:
+            # The previous frame's view must go before the buffer can be rewritten
+            self.local.view.release()
+            buffer.seek(0)
+            buffer.truncate()
+        
+        frame.save(buffer, format='JPEG', quality=self.quality,
+                   subsampling=self.PIL_SUBSAMPLING[self.subsampling])
+        self.local.view = buffer.getbuffer()
+        return self.local.view
+
+
+class TurboJPEGEncoder(FrameEncoder):
+    """libjpeg-turbo via PyTurboJPEG; one library handle reused for every frame"""
+    
+    name = "turbojpeg"
+    _handle = None
+    
+    def __init__(self, quality=70, subsampling="420"):
+        super().__init__(quality, subsampling)
+        self.jpeg = self.library()
+        self.tj_subsampling = {"444": TJSAMP_444, "422": TJSAMP_422, "420": TJSAMP_420}[subsampling]
+    
+    @classmethod
+    def library(cls):
+        if cls._handle is None:
+            cls._handle = TurboJPEG()
+        return cls._handle
+    
+    @classmethod
+    def available(cls):
+        if not HAS_TURBOJPEG or not HAS_NUMPY:
+            return False
+        try:
+            cls.library()
+        except (OSError, RuntimeError):
+            # Python bindings present but libturbojpeg itself is missing
+            return False
+        return True
+    
+    def encode(self, frame):
+        pixel_format = TJPF_BGR
+        if HAS_PIL and isinstance(frame, Image.Image):
+            frame = np.asarray(frame.convert("RGB"))
+            pixel_format = TJPF_RGB
+        return self.jpeg.encode(frame, quality=self.quality, pixel_format=pixel_format,
+                                jpeg_subsample=self.tj_subsampling)
+
+
+# Fastest first, for picking a default
+FRAME_ENCODERS = {
+    "turbojpeg": TurboJPEGEncoder,
+    "opencv": OpenCVEncoder,
+    "pillow": PillowEncoder,
+}
+
+
+def available_encoders():
+    return [name for name, encoder in FRAME_ENCODERS.items() if encoder.available()]
+
+
+def make_encoder(name=None, quality=70, subsampling="420"):
+    """
+    Build the named JPEG encoder, or the fastest installed one for None/"auto".
+    Returns None if no backend is installed.
+    """
+    if name not in (None, "auto"):
+        if name not in FRAME_ENCODERS:
+            raise ValueError(f"Unknown frame encoder {name!r}, use one of {list(FRAME_ENCODERS)}")
+        if FRAME_ENCODERS[name].available():
+            return FRAME_ENCODERS[name](quality, subsampling)
+        print(f"⚠️  Frame encoder '{name}' not available, picking another")
+    
+    installed = available_encoders()
+    return FRAME_ENCODERS[installed[0]](quality, subsampling) if installed else None
+
+
+def test_pattern(width, height, seed=0, noise=6.0):
+    """
+    A camera-like BGR test frame: smooth gradients (shifted by seed) with
+    sensor noise of standard deviation `noise`, which drives the JPEG size
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    x = x + seed * 29
+    frame = np.empty((height, width, 3), dtype=np.float32)
+    frame[..., 0] = 128 + 100 * np.sin(x / 37.0)
+    frame[..., 1] = 255 * y / max(1, height - 1)
+    frame[..., 2] = 128 + 100 * np.cos((x + y) / 53.0)
+    if noise:
+        frame += rng.normal(0, noise, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def benchmark_encoders(sizes=((640, 480), (1280, 720)), frames=60, quality=70, subsampling="420"):
+    """
+    Encode the same test frame with every installed backend and report
+    frames/s, bytes per frame and CPU time per frame (ms) for each size
+    """
+    results = []
+    for width, height in sizes:
+        frame = test_pattern(width, height)
+        for name in available_encoders():
+            encoder = FRAME_ENCODERS[name](quality, subsampling)
+            encoder.encode(frame)  # warm-up
+            total_bytes = 0
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            for _ in range(frames):
+                total_bytes += len(encoder.encode(frame))
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            results.append({
+                "encoder": name,
+                "size": f"{width}x{height}",
+                "fps": round(frames / elapsed, 1),
+                "bytes_per_frame": total_bytes // frames,
+                "cpu_ms_per_frame": round(cpu / frames * 1000, 2),
+            })
+    return results
+
+
+class EncodedFrame:
+    """A frame that is already JPEG-encoded (base64 text); the pipeline only sends it"""
+    
+    __slots__ = ("data",)
+    
+    def __init__(self, data):
+        self.data = data
+
+
+class SyntheticVideoSource:
+    """
+    Cheap test-pattern video for load tests
+    A few NumPy test patterns are rendered once at the configured size;
+    entropy (0-1) sets their noise level and so the JPEG payload size.
+    precoded=True encodes them once too and cycles through the cached
+    base64 JPEGs, so a frame costs nothing. Otherwise each frame is a copy
+    of a pattern with the frame counter and timestamp stamped into a small
+    corner region as black/white blocks, then encoded as usual. The blocks
+    shrink to fit frames narrower than STAMP_BITS * STAMP_BLOCK pixels.
+    One source can be shared by any number of robots.
+    """
+    
+    STAMP_BLOCK = 8
+    STAMP_BITS = 32
+    
+    def __init__(self, size=(640, 480), patterns=8, entropy=0.2, precoded=True,
+                 encoder=None, quality=70):
+        width, height = size
+        if not precoded and (width < self.STAMP_BITS or height < 2):
+            raise ValueError(f"Stamped frames need at least {self.STAMP_BITS}x2 pixels, got {width}x{height}")
+        self.size = (width, height)
+        self.precoded = precoded
+        # Two rows of STAMP_BITS square blocks, as large as the frame allows
+        self.stamp_block = max(1, min(self.STAMP_BLOCK, width // self.STAMP_BITS, height // 2))
+        self.frames = [test_pattern(width, height, seed=i, noise=entropy * 40.0) for i in range(patterns)]
+        self.encoded = []
+        if precoded:
+            encoder = encoder or make_encoder(quality=quality)
+            if encoder is None:
+                raise RuntimeError("No JPEG encoder installed (pip install Pillow)")
+            for frame in self.frames:
+                self.encoded.append(EncodedFrame(base64.b64encode(encoder.encode(frame)).decode('utf-8')))
+            # Only the cached JPEGs are needed from now on
+            self.frames = []
+    
+    def payload_bytes(self):
+        """Average base64 payload per frame (None until encoded)"""
+        if not self.encoded:
+            return None
+        return sum(len(frame.data) for frame in self.encoded) // len(self.encoded)
+    
+    def frame(self, index):
+        if self.precoded:
+            return self.encoded[index % len(self.encoded)]
+        return self.frames[index % len(self.frames)]
+    
+    def annotate(self, frame, frame_number):
+        """Stamp frame_number and the time (ms, low 32 bits) into the top-left corner of a copy"""
+        if isinstance(frame, EncodedFrame):
+            return frame
+        frame = frame.copy()
+        block = self.stamp_block
+        millis = int(time.time() * 1000) & 0xFFFFFFFF
+        for row, value in enumerate((frame_number, millis)):
+            bits = (value >> np.arange(self.STAMP_BITS)) & 1
+            region = np.repeat(bits * 255, block).astype(np.uint8)
+            frame[row * block:(row + 1) * block, :self.STAMP_BITS * block] = region[None, :, None]
+        return frame
+
+
+class LatestFrameTrack(VideoStreamTrack):
+    """
+    WebRTC video track fed by the video pipeline
+    push() stores the newest annotated frame (camera BGR array or PIL image)
+    from any thread; recv() hands out whatever is newest at the track's own
+    30 fps pace, so a slow consumer never builds up a backlog.
+    """
+    
+    kind = "video"
+    
+    def __init__(self, frame_size=(640, 480)):
+        super().__init__()
+        self.frame_size = frame_size
+        self._lock = threading.Lock()
+        self._frame = None
+    
+    def push(self, frame):
+        with self._lock:
+            self._frame = frame
+    
+    async def recv(self):
+        pts, time_base = await self.next_timestamp()
+        with self._lock:
+            frame = self._frame
+        if frame is None:
+            width, height = self.frame_size
+            video_frame = av.VideoFrame.from_ndarray(np.zeros((height, width, 3), dtype=np.uint8), format="bgr24")
+        elif HAS_PIL and isinstance(frame, Image.Image):
+            video_frame = av.VideoFrame.from_image(frame)
+        else:
+            video_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+        video_frame.pts = pts
+        video_frame.time_base = time_base
+        return video_frame
+
+
+class WebRTCPublisher:
+    """
+    Publishes the robot's video over WebRTC (aiortc) to every peer that asks:
+    a dashboard directly, or the server relay which then serves all of them.
+    Signaling messages go out through send(message).
+    """
+    
+    def __init__(self, send, frame_size=(640, 480)):
+        self.send = send
+        self.track = LatestFrameTrack(frame_size)
+        self.relay = MediaRelay()
+        self.peers = {}         # {peer_id: RTCPeerConnection}
+    
+    async def offer(self, peer_id):
+        await self.hangup(peer_id)
+        pc = RTCPeerConnection()
+        self.peers[peer_id] = pc
+        pc.addTrack(self.relay.subscribe(self.track, buffered=False))
+        
+        @pc.on("connectionstatechange")
+        async def on_state():
+            print(f"📡 WebRTC peer {peer_id}: {pc.connectionState}")
+            if pc.connectionState in ("failed", "closed") and self.peers.get(peer_id) is pc:
+                await self.hangup(peer_id)
+        
+        await pc.setLocalDescription(await pc.createOffer())
+        await self.send({
+            "type": "webrtc_offer",
+            "peer_id": peer_id,
+            "sdp": pc.localDescription.sdp,
+            "sdp_type": pc.localDescription.type
+        })
+    
+    async def answer(self, peer_id, sdp):
+        pc = self.peers.get(peer_id)
+        if pc is not None:
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type="answer"))
+    
+    async def add_ice(self, peer_id, candidate):
+        pc = self.peers.get(peer_id)
+        if pc is None or not candidate or not candidate.get("candidate"):
+            return
+        parsed = candidate_from_sdp(candidate["candidate"].split(":", 1)[-1])
+        parsed.sdpMid = candidate.get("sdpMid")
+        parsed.sdpMLineIndex = candidate.get("sdpMLineIndex")
+        await pc.addIceCandidate(parsed)
+    
+    async def hangup(self, peer_id):
+        pc = self.peers.pop(peer_id, None)
+        if pc is not None:
+            await pc.close()
+    
+    async def close(self):
+        for peer_id in list(self.peers):
+            await self.hangup(peer_id)
+
+
+class StageStats:
+    """Timing and drop counters for one video pipeline stage"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+    
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.dropped = 0
+    
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+    
+    def snapshot(self):
+        return {
+            "frames": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max * 1000, 2) if self.count else None,
+            "dropped": self.dropped,
+        }
+
+
+class VideoPipeline:
+    """
+    Staged video pipeline: capture → annotate → encode → send
+    Stages are connected by small bounded queues; when a stage falls behind,
+    the oldest queued frame is dropped so the newest frame always wins.
+    Capture, annotation and JPEG encoding run in a thread pool (OpenCV and
+    Pillow release the GIL while they work), so the event loop stays free
+    for commands and telemetry.
+    """
+    
+    STAGES = ("capture", "annotate", "encode", "send")
+    
+    def __init__(self, robot, queue_size=2, encode_workers=2, report_interval=10.0):
+        self.robot = robot
+        self.encode_workers = encode_workers
+        self.report_interval = report_interval
+        self.annotate_queue = asyncio.Queue(maxsize=queue_size)
+        self.encode_queue = asyncio.Queue(maxsize=queue_size)
+        self.send_queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=encode_workers + 2, thread_name_prefix="video")
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.last_sent = -1
+    
+    def stats_summary(self):
+        """Per-stage timing, to see which stage is the bottleneck"""
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+    
+    def _put_latest(self, queue, item, stage):
+        """Queue an item for `stage`, dropping its oldest pending frame if full"""
+        if queue.full():
+            queue.get_nowait()
+            self.stats[stage].dropped += 1
+        queue.put_nowait(item)
+    
+    async def _timed(self, stage, func, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        result = await loop.run_in_executor(self.executor, func, *args)
+        self.stats[stage].record(time.perf_counter() - started)
+        return result
+    
+    async def capture_stage(self):
+        interval = 1.0 / self.robot.video_fps
+        next_at = time.monotonic()
+        frame_number = 0
+        while self.robot.running:
+            next_at += interval
+            frame = await self._timed("capture", self.robot.capture_frame)
+            if frame is not None:
+                self._put_latest(self.annotate_queue, (frame_number, frame, time.time()), "annotate")
+                frame_number += 1
+            delay = next_at - time.monotonic()
+            if delay < -interval:
+                # Fell more than a frame behind, don't try to catch up with a burst
+                next_at = time.monotonic()
+            await asyncio.sleep(max(0.0, delay))
+    
+    async def annotate_stage(self):
+        while True:
+            frame_number, frame, captured_at = await self.annotate_queue.get()
+            frame = await self._timed("annotate", self.robot.annotate_frame, frame, frame_number)
+            webrtc = getattr(self.robot, "webrtc", None)
+            if webrtc is not None and not isinstance(frame, EncodedFrame):
+                webrtc.track.push(frame)
+            self._put_latest(self.encode_queue, (frame_number, frame, captured_at), "encode")
+    
+    async def encode_worker(self):
+        while True:
+            frame_number, frame, captured_at = await self.encode_queue.get()
+            frame_data = await self._timed("encode", self.robot.encode_frame, frame)
+            self._put_latest(self.send_queue, (frame_number, frame_data, captured_at), "send")
+    
+    async def send_stage(self):
+        while True:
+            frame_number, frame_data, captured_at = await self.send_queue.get()
+            if frame_number <= self.last_sent:
+                # Overtaken by a newer frame from another encode worker
+                self.stats["send"].dropped += 1
+                continue
+            started = time.perf_counter()
+            await self.robot.send_encoded_frame(frame_data, frame_number, captured_at)
+            self.stats["send"].record(time.perf_counter() - started)
+            self.last_sent = frame_number
+    
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            parts = []
+            for name, stats in self.stats.items():
+                snap = stats.snapshot()
+                text = f"{name} {snap['avg_ms']}ms" if snap["frames"] else f"{name} -"
+                if snap["dropped"]:
+                    text += f" ({snap['dropped']} dropped)"
+                parts.append(text)
+            fps = self.stats["send"].count / self.report_interval
+            detector = getattr(self.robot, "motion_detector", None)
+            if detector and detector.skipped:
+                parts.append(f"{detector.skipped} still frames skipped")
+                detector.skipped = 0
+            outbound = getattr(self.robot, "outbound", None)
+            if outbound and outbound.dropped_video:
+                parts.append(f"{outbound.dropped_video} frames dropped behind priority traffic")
+                outbound.dropped_video = 0
+            print(f"⏱️  Video pipeline: {' | '.join(parts)} → {fps:.1f} fps")
+            for stats in self.stats.values():
+                stats.reset()
+    
+    async def run(self):
+        tasks = [
+            asyncio.create_task(self.capture_stage()),
+            asyncio.create_task(self.annotate_stage()),
+            *(asyncio.create_task(self.encode_worker()) for _ in range(self.encode_workers)),
+            asyncio.create_task(self.send_stage()),
+        ]
+        if self.report_interval:
+            tasks.append(asyncio.create_task(self.report_loop()))
+        try:
+            # Capture ends when the robot stops; any stage error ends the pipeline
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False)
+
+
+TELEMETRY_FIELDS = ("battery", "cpu", "temperature", "signal")
+
+
+class SystemSampler:
+    """
+    Real system metrics from /proc and /sys (Linux, no extra packages)
+    Metrics this machine doesn't have (no battery, no wireless, not Linux)
+    fall back to a simulated random walk; `sources` says which is which.
+    """
+    
+    def __init__(self, root=""):
+        # root prefixes every path, so tests can point at a fake /proc and /sys
+        self.root = root
+        self.prev_cpu = None
+        self.last_cpu = None
+        self.simulated = {"battery": 85.0, "cpu": 45.0, "temperature": 35.0, "signal": 90.0}
+        self.sources = {}
+    
+    def _read(self, path):
+        with open(self.root + path) as f:
+            return f.read()
+    
+    def read_cpu(self):
+        """CPU busy % since the previous call, from the aggregate line of /proc/stat"""
+        values = [int(v) for v in self._read("/proc/stat").split("\n", 1)[0].split()[1:9]]
+        idle = values[3] + values[4]  # idle + iowait
+        total = sum(values)
+        prev, self.prev_cpu = self.prev_cpu, (idle, total)
+        if prev is None:
+            # First call: average since boot
+            return 100.0 * (total - idle) / total
+        d_total = total - prev[1]
+        if d_total <= 0:
+            # Sampled faster than the kernel tick, nothing new to report
+            return self.last_cpu
+        self.last_cpu = 100.0 * (d_total - (idle - prev[0])) / d_total
+        return self.last_cpu
+    
+    def read_temperature(self):
+        """Hottest thermal zone in °C"""
+        temps = []
+        for path in glob.glob(self.root + "/sys/class/thermal/thermal_zone*/temp"):
+            with open(path) as f:
+                temps.append(int(f.read()) / 1000.0)
+        return max(temps) if temps else None
+    
+    def read_battery(self):
+        """Charge % of the first power supply of type Battery"""
+        base = self.root + "/sys/class/power_supply"
+        for name in sorted(os.listdir(base)):
+            with open(os.path.join(base, name, "type")) as f:
+                if f.read().strip() != "Battery":
+                    continue
+            with open(os.path.join(base, name, "capacity")) as f:
+                return float(f.read())
+        return None
+    
+    def read_signal(self):
+        """Wireless link quality as %, from /proc/net/wireless (quality out of 70)"""
+        for line in self._read("/proc/net/wireless").splitlines()[2:]:
+            quality = float(line.split()[2].rstrip("."))
+            return min(100.0, quality * 100.0 / 70.0)
+        return None
+    
+    def simulate(self, metric):
+        sim = self.simulated
+        if metric == "battery":
+            sim["battery"] = max(0.0, sim["battery"] - random.uniform(0.01, 0.05))
+        elif metric == "cpu":
+            sim["cpu"] = 30 + random.uniform(-10, 20)
+        elif metric == "temperature":
+            sim["temperature"] = 35 + random.uniform(-2, 5)
+        elif metric == "signal":
+            sim["signal"] = 80 + random.uniform(-10, 10)
+        return sim[metric]
+    
+    def sample(self):
+        """One reading of every metric: {battery, cpu, temperature, signal}"""
+        readers = {
+            "battery": self.read_battery,
+            "cpu": self.read_cpu,
+            "temperature": self.read_temperature,
+            "signal": self.read_signal,
+        }
+        values = {}
+        for metric, reader in readers.items():
+            try:
+                value = reader()
+            except (OSError, ValueError, IndexError):
+                value = None
+            self.sources[metric] = "simulated" if value is None else "system"
+            values[metric] = round(self.simulate(metric) if value is None else value, 1)
+        return values
+
+
+# Binary sensor frame, same layout as robot/sensorstream.py:
+# header (magic, version, channel count, samples, t0, rate), length-prefixed
+# source and channel names, then float32 columns, all little-endian
+SENSOR_MAGIC = b"SNS1"
+SENSOR_HEADER = struct.Struct("<4sBBHdf")
+
+
+def pack_sensor_batch(source, channels, rate, t0, columns):
+    """Encode equal-length columns (one per channel) as a binary sensor frame"""
+    n = len(columns[0]) if columns else 0
+    parts = [SENSOR_HEADER.pack(SENSOR_MAGIC, 1, len(channels), n, t0, rate)]
+    for name in (source, *channels):
+        encoded = name.encode()
+        parts.append(struct.pack("<B", len(encoded)) + encoded)
+    for column in columns:
+        parts.append(struct.pack(f"<{len(column)}f", *column))
+    return b"".join(parts)
+
+
+class SimulatedSensors:
+    """
+    Stand-in for the IMU and track motor current sensors
+    Replace read() with real driver calls; channels name the returned values.
+    """
+    
+    channels = ("imu_pitch", "imu_roll", "motor_current_left", "motor_current_right")
+    
+    def __init__(self):
+        self.started = time.monotonic()
+    
+    def read(self):
+        t = time.monotonic() - self.started
+        # A slow pitch cycle like climbing a flight, motors load up with pitch
+        pitch = 30.0 * max(0.0, math.sin(t / 4.0)) + random.gauss(0, 0.5)
+        roll = random.gauss(0, 1.0)
+        load = 1.0 + abs(pitch) / 15.0
+        return (
+            pitch,
+            roll,
+            load + random.gauss(0, 0.1),
+            load + random.gauss(0, 0.1),
+        )
+
+
+def clamp(value, low=-1.0, high=1.0):
+    return max(low, min(high, value))
+
+
+class CommandMailbox:
+    """
+    Latest-value slot per actuator
+    Commands overwrite the slot, so a burst collapses to its newest value
+    and the control loop never works through a backlog.
+    """
+    
+    def __init__(self):
+        self.slots = {}
+    
+    def put(self, actuator, value, now=None):
+        self.slots[actuator] = (value, time.monotonic() if now is None else now)
+    
+    def latest(self, actuator):
+        """(value, received_at), or (None, None) if nothing arrived yet"""
+        return self.slots.get(actuator, (None, None))
+
+
+class ActuatorBackend:
+    """Motor/servo/LED driver interface; subclass this for real hardware"""
+    
+    def set_tracks(self, left, right):
+        """Track speeds, -1 (full reverse) .. 1 (full forward)"""
+        raise NotImplementedError
+    
+    def set_camera(self, pan, tilt):
+        """Camera servo position, -1 .. 1 on each axis"""
+        raise NotImplementedError
+    
+    def set_brightness(self, value):
+        """LED brightness, 0 .. 100 %"""
+        raise NotImplementedError
+    
+    def stop(self):
+        self.set_tracks(0.0, 0.0)
+
+
+class SimulatedActuator(ActuatorBackend):
+    """Records what would be sent to the hardware"""
+    
+    def __init__(self, history=500):
+        self.tracks = (0.0, 0.0)
+        self.camera = (0.0, 0.0)
+        self.brightness = None
+        self.history = []
+        self.max_history = history
+    
+    def set_tracks(self, left, right):
+        self.tracks = (left, right)
+        self.history.append((time.monotonic(), left, right))
+        if len(self.history) > self.max_history:
+            del self.history[:len(self.history) - self.max_history]
+    
+    def set_camera(self, pan, tilt):
+        self.camera = (pan, tilt)
+    
+    def set_brightness(self, value):
+        self.brightness = value
+
+
+class ControlLoop:
+    """
+    Fixed-rate loop driving the actuators from the command mailbox
+    Every tick reads the newest drive/camera command, smooths toward it and
+    limits the change to max_rate (full scale per second). If no drive
+    command arrives for deadman_timeout seconds the tracks stop at once.
+    An emergency stop latches until release_estop().
+    """
+    
+    def __init__(self, backend, rate_hz=50.0, deadman_timeout=0.6, max_rate=4.0, smoothing=0.5):
+        self.backend = backend
+        self.rate_hz = rate_hz
+        self.deadman_timeout = deadman_timeout
+        self.max_rate = max_rate
+        self.smoothing = smoothing
+        self.mailbox = CommandMailbox()
+        self.speed_scale = 1.0
+        self.tracks = (0.0, 0.0)
+        self.camera = (0.0, 0.0)
+        self.deadman_tripped = False
+        self.estopped = False
+        self.last_tick = None
+    
+    def command(self, actuator, value, now=None):
+        if actuator == "drive" and self.estopped:
+            # Held until release would drive off the moment the stop is lifted
+            return
+        self.mailbox.put(actuator, value, now)
+    
+    def emergency_stop(self):
+        """Stop the tracks now (not on the next tick) and ignore drive commands until released"""
+        self.estopped = True
+        self.mailbox.slots.pop("drive", None)
+        self.tracks = (0.0, 0.0)
+        self.backend.stop()
+    
+    def release_estop(self):
+        """Lift the stop; the tracks stay still until a new drive command arrives"""
+        self.mailbox.slots.pop("drive", None)
+        self.estopped = False
+    
+    def approach(self, current, target, dt):
+        """One smoothed, rate-limited step from current toward target"""
+        step = (target - current) * self.smoothing
+        limit = self.max_rate * dt
+        return current + clamp(step, -limit, limit)
+    
+    def drive_target(self, now):
+        """Track speeds wanted by the newest drive command (None = deadman stop)"""
+        value, received_at = self.mailbox.latest("drive")
+        if value is None or now - received_at > self.deadman_timeout:
+            return None
+        
+        # Arcade mix: y forward/back, x turns
+        x, y = clamp(value[0]), clamp(value[1])
+        return clamp(y + x) * self.speed_scale, clamp(y - x) * self.speed_scale
+    
+    def step(self, now=None):
+        """Run one control tick"""
+        now = time.monotonic() if now is None else now
+        dt = 1.0 / self.rate_hz if self.last_tick is None else now - self.last_tick
+        self.last_tick = now
+        
+        if self.estopped:
+            return
+        
+        target = self.drive_target(now)
+        if target is None:
+            if self.tracks != (0.0, 0.0):
+                print(f"🛑 Deadman: no drive command for {self.deadman_timeout}s, stopping tracks")
+                self.deadman_tripped = True
+                self.tracks = (0.0, 0.0)
+                self.backend.stop()
+        else:
+            self.deadman_tripped = False
+            tracks = tuple(self.approach(c, t, dt) for c, t in zip(self.tracks, target))
+            if tracks != self.tracks:
+                self.tracks = tracks
+                self.backend.set_tracks(*tracks)
+        
+        value, _ = self.mailbox.latest("camera")
+        if value is not None:
+            target = (clamp(value[0]), clamp(value[1]))
+            camera = tuple(self.approach(c, t, dt) for c, t in zip(self.camera, target))
+            if camera != self.camera:
+                self.camera = camera
+                self.backend.set_camera(*camera)
+    
+    async def run(self, is_running):
+        """Tick at rate_hz until is_running() is False, then stop the tracks"""
+        period = 1.0 / self.rate_hz
+        next_tick = time.monotonic()
+        try:
+            while is_running():
+                self.step()
+                next_tick += period
+                delay = next_tick - time.monotonic()
+                if delay < -period:
+                    # Overran by more than a tick, don't try to catch up
+                    next_tick = time.monotonic()
+                await asyncio.sleep(max(0.0, delay))
+        finally:
+            self.backend.stop()
+
+
+# Outbound priority lanes, highest first
+LANE_CONTROL = 0     # pongs, acks, e-stop replies
+LANE_TELEMETRY = 1   # telemetry, status, offline batches, sensor frames
+LANE_VIDEO = 2       # video frames: newest only, droppable
+
+
+class OutboundScheduler:
+    """
+    The only writer on the robot's socket, with priority lanes
+    Control goes first, then telemetry in order, then video. Video keeps
+    just the newest frame and is only written while the socket's write
+    buffer is under video_buffer_limit, so a control message never waits
+    behind more than about one frame. Messages still queued when the
+    connection drops are handed to on_failed.
+    """
+    
+    def __init__(self, websocket, on_failed=None, video_buffer_limit=64 * 1024):
+        self.websocket = websocket
+        self.on_failed = on_failed
+        self.video_buffer_limit = video_buffer_limit
+        self.lanes = (deque(), deque())
+        self.video = None
+        self.dropped_video = 0
+        self.closed = False
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+    
+    def put(self, payload, lane, fallback=None):
+        """Queue a text or binary payload; returns False once the connection is gone"""
+        if self.closed:
+            return False
+        if lane == LANE_VIDEO:
+            if self.video is not None:
+                self.dropped_video += 1
+            self.video = payload
+        else:
+            self.lanes[lane].append((payload, fallback))
+        self.wakeup.set()
+        return True
+    
+    def write_buffer_size(self):
+        transport = getattr(self.websocket, "transport", None)
+        return transport.get_write_buffer_size() if transport else 0
+    
+    def next_item(self):
+        for lane in self.lanes:
+            if lane:
+                return lane.popleft()
+        if self.video is not None and self.write_buffer_size() < self.video_buffer_limit:
+            payload, self.video = self.video, None
+            return payload, None
+        return None
+    
+    async def run(self):
+        fallback = None
+        try:
+            while True:
+                self.wakeup.clear()
+                item = self.next_item()
+                if item is None:
+                    if self.video is not None:
+                        # A frame is waiting for the socket buffer to drain
+                        try:
+                            await asyncio.wait_for(self.wakeup.wait(), timeout=0.005)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await self.wakeup.wait()
+                    continue
+                
+                payload, fallback = item
+                await self.websocket.send(payload)
+                fallback = None
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.closed = True
+            self.video = None
+            pending = [fallback] + [fb for lane in self.lanes for _, fb in lane]
+            for lane in self.lanes:
+                lane.clear()
+            if self.on_failed:
+                for message in pending:
+                    if message is not None:
+                        self.on_failed(message)
+    
+    def close(self):
+        self.task.cancel()
+
+
+# Reconnect backoff: full jitter, sleep uniform(0, min(cap, base * 2**attempt))
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+# A connection that stayed up this long resets the backoff
+STABLE_CONNECTION_SECONDS = 30.0
+
+
+def reconnect_delay(attempt, base=RECONNECT_BASE_DELAY, cap=RECONNECT_MAX_DELAY):
+    """Seconds to wait before reconnect attempt number `attempt` (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class OfflineQueue:
+    """
+    Append-only JSON-lines queue on disk for messages taken while offline
+    Holds about max_items messages; when full the oldest are dropped. The
+    file outlives the process, so a robot restarted in a dead zone still
+    uploads its history on the next connection.
+    
+    Lines are never rewritten on discard: the byte offset of every queued
+    line is kept in memory and the acknowledged head is recorded in a
+    ".offset" file next to the queue, so peek/discard cost the batch rather
+    than the whole queue. The file is compacted once the consumed head is
+    larger than what is left. Methods block on file I/O; the robot runs
+    them through asyncio.to_thread and a lock keeps them atomic.
+    """
+    
+    def __init__(self, path, max_items=10000):
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.max_items = max_items
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.offsets = deque()      # byte offset of each queued line, oldest first
+        self.end = 0                # file size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+    
+    def __len__(self):
+        return len(self.offsets)
+    
+    def _read_head(self):
+        """Byte offset of the oldest unacknowledged line (0 if the queue file was replaced since)"""
+        try:
+            with open(self.offset_path) as f:
+                inode, head = (int(value) for value in f.read().split())
+            if inode == os.stat(self.path).st_ino:
+                return head
+        except (OSError, ValueError):
+            pass
+        return 0
+    
+    def _write_head(self, head):
+        tmp_path = self.offset_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{os.stat(self.path).st_ino} {head}")
+        os.replace(tmp_path, self.offset_path)
+    
+    def _load(self):
+        head = self._read_head()
+        try:
+            with open(self.path, "r+b") as f:
+                f.seek(head)
+                position = head
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn last line from a crash mid-write
+                        f.truncate(position)
+                        break
+                    try:
+                        json.loads(line)
+                        self.offsets.append(position)
+                    except ValueError:
+                        pass
+                    position += len(line)
+                self.end = position
+        except FileNotFoundError:
+            pass
+    
+    def _compact(self, head):
+        """Drop the first head bytes (already acknowledged or trimmed) from the file"""
+        tmp_path = self.path + ".tmp"
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(head)
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, self.path)
+        self.offsets = deque(offset - head for offset in self.offsets)
+        self.end -= head
+    
+    def _advance(self, n):
+        for _ in range(min(n, len(self.offsets))):
+            self.offsets.popleft()
+        head = self.offsets[0] if self.offsets else self.end
+        if head and head * 2 >= self.end:
+            self._compact(head)
+            head = 0
+        self._write_head(head)
+    
+    def extend(self, messages):
+        lines = [(json.dumps(message) + "\n").encode() for message in messages]
+        with self.lock:
+            with open(self.path, "ab") as f:
+                f.write(b"".join(lines))
+            for line in lines:
+                self.offsets.append(self.end)
+                self.end += len(line)
+            
+            # Trim in chunks so a full queue doesn't move the head on every append
+            if len(self.offsets) > self.max_items + self.max_items // 10:
+                excess = len(self.offsets) - self.max_items
+                self.dropped += excess
+                self._advance(excess)
+    
+    def append(self, message):
+        self.extend([message])
+    
+    def peek(self, n):
+        """Oldest n messages, left in the queue"""
+        with self.lock:
+            items = []
+            if not self.offsets:
+                return items
+            with open(self.path, "rb") as f:
+                for offset in itertools.islice(self.offsets, n):
+                    f.seek(offset)
+                    items.append(json.loads(f.readline()))
+            return items
+    
+    def discard(self, n):
+        """Remove the oldest n messages (after the server acknowledged them)"""
+        with self.lock:
+            self._advance(n)
+
 
 class SimulatedRobot:
-    def __init__(self, server_url, device_id="robot_01", use_camera=True):
+    # Offline messages uploaded per compressed offline_batch
+    REPLAY_BATCH_SIZE = 500
+    BATCH_ACK_TIMEOUT = 10.0
+    
+    def __init__(self, server_url, device_id="robot_01", use_camera=True, token=None,
+                 telemetry_interval=1.0, sample_hz=5.0, video_fps=10, frame_size=(640, 480),
+                 motion_threshold=2.0, keepalive_interval=2.0,
+                 buffer_offline=True, offline_queue_path=None,
+                 sensor_hz=100.0, sensor_batch_interval=0.1,
+                 actuator=None, control_hz=50.0,
+                 encoder=None, jpeg_quality=70, jpeg_subsampling="420", video_source=None,
+                 webrtc=True):
         self.server_url = server_url
         self.device_id = device_id
+        self.token = token
         self.websocket = None
         self.running = True
         self.battery = 85.0
@@ -45,31 +1233,219 @@ class SimulatedRobot:
         self.signal = 90.0
         self.use_camera = use_camera and HAS_OPENCV
         self.camera = None
-        self.frame_count = 0
+        self.capture = None
+        self.last_frame_seq = 0
+        self.video_pipeline = None
+        # Skip near-identical camera frames (None disables)
+        self.motion_detector = None
+        if motion_threshold is not None and HAS_NUMPY:
+            self.motion_detector = MotionDetector(motion_threshold, keepalive_interval)
+        # Sample at sample_hz, send one telemetry_batch every telemetry_interval seconds
+        self.telemetry_interval = telemetry_interval
+        self.sample_hz = sample_hz
+        self.sampler = SystemSampler()
+        # High-rate binary sensor stream (0 disables)
+        self.sensor_hz = sensor_hz
+        self.sensor_batch_interval = sensor_batch_interval
+        self.sensors = SimulatedSensors()
+        self.sensor_task = None
+        # Commands land in the control loop's mailbox, the loop drives the actuators
+        self.actuator = actuator or SimulatedActuator()
+        self.control = ControlLoop(self.actuator, rate_hz=control_hz or 50.0)
+        self.control_hz = control_hz
+        self.control_task = None
+        self.last_estop_seq = None
+        self.last_received_at = None
+        self.video_fps = video_fps
+        self.frame_size = frame_size
+        # JPEG backend for video frames (None = fastest installed)
+        self.encoder = make_encoder(encoder, jpeg_quality, jpeg_subsampling)
+        # Optional SyntheticVideoSource used instead of the camera / drawn frames
+        self.video_source = video_source
+        self.synthetic_frames = 0
+        # WebRTC video publisher (None without aiortc or numpy; JPEG frames are always sent)
+        self.webrtc = None
+        if webrtc and HAS_AIORTC and HAS_NUMPY:
+            self.webrtc = WebRTCPublisher(self.send_signaling, frame_size)
+        # Signaling work per peer, run in order off the command receive path
+        self.webrtc_tasks = {}      # {peer_id: latest task}
+        # Connection state, kept across reconnects
+        self.connected = asyncio.Event()
+        self.receiver = None
+        self.telemetry_task = None
+        self.connection_task = None
+        # Telemetry and events taken while offline wait here until replayed
+        self.offline_queue = None
+        if buffer_offline:
+            if offline_queue_path is None:
+                offline_queue_path = os.path.join(
+                    os.path.expanduser("~"), ".robot_client", f"offline_{device_id}.jsonl"
+                )
+            self.offline_queue = OfflineQueue(offline_queue_path)
+        self.replaying = False
+        self.requeued = []          # unsent messages waiting for the disk queue
+        self.requeue_task = None
+        self.outbound = None
+        self.batch_seq = 0
+        self.pending_batches = {}
         
     async def connect(self):
-        """Connect to WebSocket server"""
+        """Connect to WebSocket server once, returns True on success"""
         try:
-            # Initialize camera if requested
-            if self.use_camera:
+            # Initialize camera if requested (first connect only)
+            if self.use_camera and not self.camera:
                 self.init_camera()
             
-            # Connect with device_id parameter to identify as robot
-            url = f"{self.server_url}?device_id={self.device_id}"
-            print(f"🤖 Connecting robot to {url}...")
+            # Connect with a signed device token, or a bare device_id in development
+            if self.token:
+                url = f"{self.server_url}?{urlencode({'token': self.token})}"
+                print(f"🤖 Connecting robot {self.device_id} to {self.server_url} with device token...")
+            else:
+                url = f"{self.server_url}?device_id={self.device_id}"
+                print(f"🤖 Connecting robot to {url}...")
             
             self.websocket = await websockets.connect(url)
+            # Every outgoing message goes through the priority scheduler
+            self.outbound = OutboundScheduler(self.websocket, on_failed=self.requeue_failed)
+            self.connected.set()
             print(f"✅ Robot {self.device_id} connected!")
             
             # Start receiving messages from server
-            asyncio.create_task(self.receive_commands())
+            self.receiver = asyncio.create_task(self.receive_commands())
             
-            # Start sending telemetry
-            asyncio.create_task(self.send_telemetry_loop())
+            # Start sending telemetry (keeps running, and buffering, across reconnects)
+            if self.telemetry_task is None:
+                self.telemetry_task = asyncio.create_task(self.send_telemetry_loop())
+            if self.sensor_task is None and self.sensor_hz > 0:
+                self.sensor_task = asyncio.create_task(self.send_sensor_loop())
+            if self.control_task is None and self.control_hz > 0:
+                self.control_task = asyncio.create_task(self.control.run(lambda: self.running))
+            return True
             
         except Exception as e:
             print(f"❌ Connection failed: {e}")
-            self.running = False
+            return False
+    
+    async def maintain_connection(self):
+        """Stay connected: reconnect with exponential backoff and full jitter"""
+        attempt = 0
+        while self.running:
+            if await self.connect():
+                connected_at = time.monotonic()
+                await self.replay_offline_queue()
+                await self.receiver
+                self.connected.clear()
+                # Telemetry that never made it out goes to the offline queue
+                self.outbound.close()
+                if not self.running:
+                    break
+                
+                # Recorded offline, so it reaches the server with the rest of the gap
+                await self.send_message({
+                    "type": "status",
+                    "status": "offline",
+                    "message": "Connection to server lost",
+                    "client_ts": int(time.time() * 1000)
+                })
+                if time.monotonic() - connected_at > STABLE_CONNECTION_SECONDS:
+                    attempt = 0
+            
+            if not self.running:
+                break
+            delay = reconnect_delay(attempt)
+            attempt += 1
+            print(f"🔁 Reconnecting in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+    
+    async def send_message(self, message, buffer=True, lane=LANE_TELEMETRY):
+        """
+        Hand a message to the outbound scheduler on `lane`, or queue it on
+        disk while offline (buffer=True). Returns True if it was scheduled.
+        """
+        if self.connected.is_set() and not (buffer and self.replaying):
+            if self.outbound.put(json.dumps(message), lane, message if buffer else None):
+                return True
+        
+        if buffer:
+            # While replaying, new samples queue up behind the old ones to keep order
+            await self.buffer_offline(message)
+        return False
+    
+    async def buffer_offline(self, message):
+        if self.offline_queue is not None:
+            await asyncio.to_thread(self.offline_queue.append, message)
+    
+    def requeue_failed(self, message):
+        """OutboundScheduler callback for buffered messages left unsent when the connection dropped"""
+        if self.offline_queue is None:
+            return
+        self.requeued.append(message)
+        if self.requeue_task is None or self.requeue_task.done():
+            self.requeue_task = asyncio.create_task(self.flush_requeued())
+    
+    async def flush_requeued(self):
+        while self.requeued:
+            messages, self.requeued = self.requeued, []
+            await asyncio.to_thread(self.offline_queue.extend, messages)
+    
+    async def replay_offline_queue(self):
+        """Upload messages queued while offline as compressed batches"""
+        queue = self.offline_queue
+        if queue is None or not len(queue):
+            return
+        
+        print(f"📤 Replaying {len(queue)} offline message(s)...")
+        if queue.dropped:
+            print(f"⚠️  {queue.dropped} oldest offline message(s) were dropped (queue full)")
+        
+        self.replaying = True
+        batch_size = self.REPLAY_BATCH_SIZE
+        try:
+            while len(queue) and self.connected.is_set():
+                batch = await asyncio.to_thread(queue.peek, batch_size)
+                ack = await self.send_offline_batch(batch)
+                if ack is None:
+                    print("⚠️  Offline batch not acknowledged, keeping it for the next connection")
+                    return
+                if ack.get("status") == "rejected":
+                    if len(batch) > 1:
+                        # Most likely over the server's size limit: retry in halves
+                        batch_size = len(batch) // 2
+                        print(f"⚠️  Offline batch rejected ({ack.get('message')}), retrying {batch_size} at a time")
+                        continue
+                    # A single message the server refuses would block the queue forever
+                    queue.dropped += 1
+                    print(f"❌ Offline message rejected ({ack.get('message')}), dropping it")
+                await asyncio.to_thread(queue.discard, len(batch))
+            print("✅ Offline queue replayed")
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.replaying = False
+    
+    async def send_offline_batch(self, batch):
+        """Send one offline_batch and wait for the server's ack (None if it never came)"""
+        self.batch_seq += 1
+        batch_id = self.batch_seq
+        payload = zlib.compress(json.dumps(batch).encode())
+        
+        future = asyncio.get_running_loop().create_future()
+        self.pending_batches[batch_id] = future
+        try:
+            scheduled = self.outbound.put(json.dumps({
+                "type": "offline_batch",
+                "batch_id": batch_id,
+                "encoding": "zlib+base64",
+                "count": len(batch),
+                "data": base64.b64encode(payload).decode("ascii")
+            }), LANE_TELEMETRY)
+            if not scheduled:
+                return None
+            return await asyncio.wait_for(future, timeout=self.BATCH_ACK_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending_batches.pop(batch_id, None)
     
     def init_camera(self):
         """Initialize laptop camera"""
@@ -87,6 +1463,10 @@ class SimulatedRobot:
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             self.camera.set(cv2.CAP_PROP_FPS, 30)
             
+            # Read frames on a background thread, the event loop only picks up the latest
+            self.capture = CameraCapture(self.camera)
+            self.capture.start()
+            
             print("✅ Camera initialized successfully")
             
         except Exception as e:
@@ -96,208 +1476,390 @@ class SimulatedRobot:
     async def receive_commands(self):
         """Receive control commands from server"""
         try:
-            while self.running and self.websocket:
+            while self.running:
                 message = await self.websocket.recv()
-                data = json.loads(message)
+                # t2 of the server's clock sync sample if this is a ping
+                self.last_received_at = time.time()
+                try:
+                    data = json.loads(message)
+                    if data.get("type") == "estop":
+                        # Ahead of logging, the mailbox and anything queued for the control loop
+                        await self.handle_estop(data)
+                        continue
+                    await self.handle_message(data)
+                except websockets.ConnectionClosed:
+                    raise
+                except Exception as e:
+                    print(f"❌ Error handling message: {e}")
+        except websockets.ConnectionClosedOK:
+            # Closed cleanly, e.g. by close()
+            pass
+        except websockets.ConnectionClosed as e:
+            print(f"⚠️  Connection lost: {e}")
+    
+    async def handle_estop(self, data):
+        """Stop the tracks, then acknowledge (every retransmission gets an ack)"""
+        self.control.emergency_stop()
+        await self.send_message({
+            "type": "estop_ack",
+            "seq": data.get("seq"),
+            "attempt": data.get("attempt")
+        }, buffer=False, lane=LANE_CONTROL)
+        
+        if data.get("seq") != self.last_estop_seq:
+            self.last_estop_seq = data.get("seq")
+            print(f"🛑🛑🛑 EMERGENCY STOP #{data.get('seq')} - tracks stopped, drive commands ignored until released")
+    
+    async def send_signaling(self, message):
+        await self.send_message(message, buffer=False, lane=LANE_CONTROL)
+    
+    async def handle_webrtc(self, data, msg_type):
+        """WebRTC signaling for the video track, from a dashboard or the server relay"""
+        peer_id = data.get("peer_id")
+        print(f"📡 WebRTC {msg_type} for peer {peer_id}")
+        if self.webrtc is None:
+            if msg_type == "webrtc_request":
+                # Dashboard keeps using the JPEG frames
+                await self.send_signaling({"type": "webrtc_hangup", "peer_id": peer_id,
+                                           "reason": "unsupported"})
+            return
+        
+        # ICE gathering can take seconds, estop and drive commands must not wait for it
+        if msg_type == "webrtc_request":
+            self.run_webrtc(peer_id, lambda: self.webrtc.offer(peer_id))
+        elif msg_type == "webrtc_answer":
+            self.run_webrtc(peer_id, lambda: self.webrtc.answer(peer_id, data.get("sdp")))
+        elif msg_type == "webrtc_ice":
+            self.run_webrtc(peer_id, lambda: self.webrtc.add_ice(peer_id, data.get("candidate")))
+        elif msg_type == "webrtc_hangup":
+            self.run_webrtc(peer_id, lambda: self.webrtc.hangup(peer_id))
+    
+    def run_webrtc(self, peer_id, work):
+        """Run work() in a task after the earlier signaling for the same peer"""
+        previous = self.webrtc_tasks.get(peer_id)
+        
+        async def run():
+            if previous is not None:
+                await asyncio.wait([previous])
+            try:
+                await work()
+            except Exception as e:
+                print(f"⚠️  WebRTC signaling for peer {peer_id} failed: {e}")
+        
+        task = self.webrtc_tasks[peer_id] = asyncio.create_task(run())
+        
+        def done(finished):
+            if self.webrtc_tasks.get(peer_id) is finished:
+                del self.webrtc_tasks[peer_id]
+        
+        task.add_done_callback(done)
+        return task
+    
+    async def handle_message(self, data):
+        """Act on one message from the server"""
+        msg_type = data.get("type")
+        print(f"\n📨 [{self.device_id}] RECEIVED MESSAGE TYPE: {msg_type}")
+        
+        if msg_type == "robot_move":
+            x = data.get("x")
+            y = data.get("y")
+            print(f"🎮🎮🎮 ROBOT MOVEMENT COMMAND")
+            print(f"        X: {x}")
+            print(f"        Y: {y}")
+            if x is not None and y is not None:
+                # Only the newest command matters, the control loop picks it up
+                self.control.command("drive", (float(x), float(y)))
+                print(f"        → Queued for control loop")
+            
+        elif msg_type == "camera_move":
+            x = data.get("x")
+            y = data.get("y")
+            print(f"📷📷📷 CAMERA MOVEMENT COMMAND")
+            print(f"        X: {x}")
+            print(f"        Y: {y}")
+            if x is not None and y is not None:
+                self.control.command("camera", (float(x), float(y)))
+                print(f"        → Queued for control loop")
+            
+        elif msg_type == "set_speed":
+            value = data.get("value")
+            print(f"⚡⚡⚡ SPEED CONTROL COMMAND")
+            print(f"        Speed: {value}%")
+            if value is not None:
+                # Scales every drive command from now on
+                self.control.speed_scale = clamp(float(value) / 100.0, 0.0, 1.0)
+                print(f"        → Speed scale {self.control.speed_scale:.2f}")
+            
+        elif msg_type == "set_brightness":
+            value = data.get("value")
+            print(f"💡💡💡 BRIGHTNESS CONTROL COMMAND")
+            print(f"        Brightness: {value}%")
+            if value is not None:
+                self.actuator.set_brightness(clamp(float(value), 0.0, 100.0))
+                print(f"        → Applied to LED")
+            
+        elif msg_type in ("webrtc_request", "webrtc_answer", "webrtc_ice", "webrtc_hangup"):
+            await self.handle_webrtc(data, msg_type)
+            
+        elif msg_type == "estop_release":
+            self.control.release_estop()
+            print(f"🟢 Emergency stop released")
+            
+        elif msg_type == "ping":
+            # Heartbeat from server - answer on the control lane so RTT stays accurate.
+            # The echoed server time plus our receive/send times let the server
+            # estimate this robot's clock offset (NTP style)
+            await self.send_message({
+                "type": "pong",
+                "seq": data.get("seq"),
+                "t1": data.get("server_ts"),
+                "t2": self.last_received_at,
+                "t3": time.time()
+            }, buffer=False, lane=LANE_CONTROL)
+            
+        elif msg_type == "ack":
+            original = data.get("original_type")
+            status = data.get("status")
+            msg = data.get("message")
+            print(f"✅ ACK for {original}: {msg}")
+            future = self.pending_batches.get(data.get("batch_id"))
+            if original == "offline_batch" and future and not future.done():
+                future.set_result(data)
+            
+        else:
+            print(f"📨 Other message type: {msg_type}")
+            print(f"   Data: {data}")
+    
+    async def send_telemetry_loop(self):
+        """Sample at sample_hz and send the samples as one telemetry_batch per telemetry_interval"""
+        try:
+            period = 1.0 / self.sample_hz
+            next_sample = time.monotonic()
+            next_flush = next_sample + self.telemetry_interval
+            batch = self.new_telemetry_batch()
+            
+            self.take_sample()
+            sources = ", ".join(f"{k}={v}" for k, v in self.sampler.sources.items())
+            print(f"📊 Telemetry at {self.sample_hz:g} Hz, sources: {sources}")
+            
+            while self.running:
+                sample = self.take_sample()
+                for field, column in batch.items():
+                    column.append(sample[field])
                 
-                msg_type = data.get("type")
-                print(f"\n📨 [{self.device_id}] RECEIVED MESSAGE TYPE: {msg_type}")
+                if time.monotonic() >= next_flush:
+                    await self.send_telemetry_batch(batch)
+                    batch = self.new_telemetry_batch()
+                    next_flush += self.telemetry_interval
                 
-                if msg_type == "robot_move":
-                    x = data.get("x")
-                    y = data.get("y")
-                    print(f"🎮🎮🎮 ROBOT MOVEMENT COMMAND")
-                    print(f"        X: {x}")
-                    print(f"        Y: {y}")
-                    print(f"        → TODO: Apply to motor controller")
-                    # TODO: Apply to actual robot motor controller
-                    
-                elif msg_type == "camera_move":
-                    x = data.get("x")
-                    y = data.get("y")
-                    print(f"📷📷📷 CAMERA MOVEMENT COMMAND")
-                    print(f"        X: {x}")
-                    print(f"        Y: {y}")
-                    print(f"        → TODO: Apply to servo")
-                    # TODO: Apply to actual camera servo
-                    
-                elif msg_type == "set_speed":
-                    value = data.get("value")
-                    print(f"⚡⚡⚡ SPEED CONTROL COMMAND")
-                    print(f"        Speed: {value}%")
-                    print(f"        → TODO: Apply to motor speed")
-                    # TODO: Apply to motor speed controller
-                    
-                elif msg_type == "set_brightness":
-                    value = data.get("value")
-                    print(f"💡💡💡 BRIGHTNESS CONTROL COMMAND")
-                    print(f"        Brightness: {value}%")
-                    print(f"        → TODO: Apply to LED")
-                    # TODO: Apply to LED brightness
-                    
-                elif msg_type == "ack":
-                    original = data.get("original_type")
-                    status = data.get("status")
-                    msg = data.get("message")
-                    print(f"✅ ACK for {original}: {msg}")
-                    
-                else:
-                    print(f"📨 Other message type: {msg_type}")
-                    print(f"   Data: {data}")
-                    
+                # Fixed rate: sleep to the next slot rather than a fixed delay
+                next_sample += period
+                await asyncio.sleep(max(0.0, next_sample - time.monotonic()))
         except Exception as e:
-            print(f"❌ Error receiving commands: {e}")
+            print(f"❌ Error in telemetry loop: {e}")
             self.running = False
     
-    async def send_telemetry_loop(self):
-        """Send telemetry data periodically"""
+    async def send_sensor_loop(self):
+        """
+        Sample the sensors at sensor_hz and send one binary batch per
+        sensor_batch_interval. Live only: batches taken while offline are dropped.
+        """
         try:
-            while self.running and self.websocket:
-                await self.send_telemetry()
-                # Send every 3 seconds
-                await asyncio.sleep(3)
+            channels = self.sensors.channels
+            per_batch = max(1, round(self.sensor_batch_interval * self.sensor_hz))
+            period = 1.0 / self.sensor_hz
+            columns = [[] for _ in channels]
+            t0 = None
+            next_sample = time.monotonic()
+            print(f"📈 Sensor stream: {', '.join(channels)} at {self.sensor_hz:g} Hz")
+            
+            while self.running:
+                if t0 is None:
+                    t0 = time.time()
+                for column, value in zip(columns, self.sensors.read()):
+                    column.append(value)
+                
+                if len(columns[0]) >= per_batch:
+                    if self.connected.is_set():
+                        payload = pack_sensor_batch(self.device_id, channels, self.sensor_hz, t0, columns)
+                        self.outbound.put(payload, LANE_TELEMETRY)
+                    columns = [[] for _ in channels]
+                    t0 = None
+                
+                next_sample += period
+                delay = next_sample - time.monotonic()
+                if delay < -self.sensor_batch_interval:
+                    # Fell far behind (machine suspended?), restart the schedule
+                    next_sample = time.monotonic()
+                await asyncio.sleep(max(0.0, delay))
         except Exception as e:
-            print(f"❌ Error in telemetry loop: {e}")
-            self.running = False
+            print(f"❌ Error in sensor loop: {e}")
+    
+    def take_sample(self):
+        """Read the system sampler once: {battery, cpu, temperature, signal, client_ts}"""
+        sample = self.sampler.sample()
+        self.battery = sample["battery"]
+        self.cpu = sample["cpu"]
+        self.temperature = sample["temperature"]
+        self.signal = sample["signal"]
+        sample["client_ts"] = int(time.time() * 1000)
+        return sample
+    
+    @staticmethod
+    def new_telemetry_batch():
+        """Empty columns: one list per metric plus client_ts"""
+        return {field: [] for field in TELEMETRY_FIELDS + ("client_ts",)}
+    
+    def build_telemetry(self):
+        """Take a telemetry sample and return it as a single-sample message"""
+        sample = self.take_sample()
+        return {
+            "type": "telemetry",
+            "device_id": self.device_id,
+            "device_name": f"Robot {self.device_id}",
+            **sample,
+            "timestamp": datetime.now().isoformat()
+        }
     
     async def send_telemetry(self):
-        """Send current telemetry to server"""
+        """Send one telemetry sample to server"""
+        await self.send_telemetry_message(self.build_telemetry())
+    
+    async def send_telemetry_batch(self, batch):
+        """Send a batch of samples as one columnar telemetry_batch message"""
+        await self.send_telemetry_message({
+            "type": "telemetry_batch",
+            "device_id": self.device_id,
+            "device_name": f"Robot {self.device_id}",
+            "count": len(batch["client_ts"]),
+            **batch,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    async def send_telemetry_message(self, message):
         try:
-            # Simulate realistic telemetry changes
-            self.battery = max(0, self.battery - random.uniform(0.1, 0.5))
-            self.cpu = 30 + random.uniform(-10, 20)
-            self.temperature = 35 + random.uniform(-2, 5)
-            self.signal = 80 + random.uniform(-10, 10)
-            
-            message = {
-                "type": "telemetry",
-                "device_id": self.device_id,
-                "device_name": f"Robot {self.device_id}",
-                "battery": round(self.battery, 1),
-                "cpu": round(self.cpu, 1),
-                "temperature": round(self.temperature, 1),
-                "signal": round(self.signal, 1),
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            await self.websocket.send(json.dumps(message))
-            print(f"📡 Telemetry sent: Battery={self.battery:.1f}%, CPU={self.cpu:.1f}%, Temp={self.temperature:.1f}°C, Signal={self.signal:.1f}%")
+            if await self.send_message(message):
+                print(f"📡 Telemetry sent: Battery={self.battery:.1f}%, CPU={self.cpu:.1f}%, Temp={self.temperature:.1f}°C, Signal={self.signal:.1f}%")
+            elif self.offline_queue is not None:
+                print(f"📦 Telemetry queued offline ({len(self.offline_queue)} pending)")
             
         except Exception as e:
             print(f"❌ Error sending telemetry: {e}")
-            self.running = False
     
     async def send_video_frame_loop(self):
-        """Send video frames from camera periodically"""
+        """Run the capture → annotate → encode → send video pipeline"""
         try:
-            while self.running and self.websocket:
-                await self.send_video_frame()
-                # Send at ~10 FPS (adjust as needed)
-                await asyncio.sleep(0.1)
+            self.video_pipeline = VideoPipeline(self)
+            await self.video_pipeline.run()
         except Exception as e:
             print(f"❌ Error in video loop: {e}")
             self.running = False
     
-    async def send_video_frame(self):
-        """Capture and send a real video frame from camera"""
-        try:
-            if self.use_camera and self.camera and self.camera.isOpened():
-                # Capture frame from camera
-                ret, frame = self.camera.read()
-                
-                if not ret:
-                    print("❌ Failed to capture frame")
-                    return
-                
-                # Add timestamp overlay
-                timestamp_text = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                cv2.putText(frame, timestamp_text, (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Add frame counter
-                cv2.putText(frame, f"Frame: {self.frame_count}", (10, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                
-                # Add device ID
-                cv2.putText(frame, f"Device: {self.device_id}", (10, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                
-                # Encode frame as JPEG
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                frame_data = base64.b64encode(buffer).decode('utf-8')
-                
-                message = {
-                    "type": "video_frame",
-                    "device_id": self.device_id,
-                    "frame_data": frame_data,
-                    "frame_number": self.frame_count,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                await self.websocket.send(json.dumps(message))
-                
-                if self.frame_count % 30 == 0:  # Log every 30 frames
-                    print(f"🎥 Frame #{self.frame_count} sent ({len(frame_data)} bytes)")
-                
-                self.frame_count += 1
-                
-            elif HAS_PIL:
-                # Fallback to simulated frame if camera not available
-                await self.send_simulated_frame()
-            
-        except Exception as e:
-            print(f"❌ Error sending video frame: {e}")
+    def capture_frame(self):
+        """
+        Grab the next raw frame: newest camera frame (numpy BGR) or a freshly
+        drawn simulated frame (PIL image). Returns None if there is nothing new.
+        """
+        if self.use_camera and self.capture:
+            # Newest frame from the capture thread (never blocks)
+            frame, seq, _ = self.capture.latest(self.last_frame_seq)
+            if frame is None:
+                # No new frame since the last send, don't resend a stale one
+                return None
+            self.last_frame_seq = seq
+            if self.motion_detector and not self.motion_detector.should_send(frame):
+                # Scene hasn't changed, save the encode and the uplink
+                return None
+            return frame
+        
+        if self.video_source:
+            self.synthetic_frames += 1
+            return self.video_source.frame(self.synthetic_frames)
+        
+        if HAS_PIL:
+            return self.render_simulated_frame()
+        return None
     
-    async def send_simulated_frame(self):
-        """Send a simulated video frame (fallback)"""
-        try:
-            if not HAS_PIL:
-                return
-            
-            # Create a simulated camera frame
-            img = Image.new('RGB', (640, 480), color='black')
-            draw = ImageDraw.Draw(img)
-            
-            # Add visual elements
-            draw.rectangle([50, 50, 590, 430], outline='green', width=3)
-            draw.text((270, 10), f"SIMULATED - Frame #{self.frame_count}", fill='cyan')
-            draw.text((180, 450), f"Robot Camera - {datetime.now().strftime('%H:%M:%S')}", fill='cyan')
-            
-            # Add crosshair
-            draw.line([(320, 200), (320, 280)], fill='green', width=2)
-            draw.line([(240, 240), (400, 240)], fill='green', width=2)
-            
-            # Convert image to base64 JPEG
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=70)
-            frame_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            message = {
-                "type": "video_frame",
-                "device_id": self.device_id,
-                "frame_data": frame_data,
-                "frame_number": self.frame_count,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            await self.websocket.send(json.dumps(message))
-            
-            if self.frame_count % 30 == 0:
-                print(f"🎥 Simulated frame #{self.frame_count} sent")
-            
-            self.frame_count += 1
-            
-        except Exception as e:
-            print(f"❌ Error sending simulated frame: {e}")
+    def annotate_frame(self, frame, frame_number):
+        """Draw the timestamp / frame counter / device overlay onto a raw frame"""
+        if self.video_source:
+            return self.video_source.annotate(frame, frame_number)
+        
+        timestamp_text = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        if HAS_PIL and isinstance(frame, Image.Image):
+            width, height = frame.size
+            draw = ImageDraw.Draw(frame)
+            draw.text((width // 2 - 50, 10), f"SIMULATED - Frame #{frame_number}", fill='cyan')
+            draw.text((width // 2 - 140, height - 30), f"Robot Camera - {timestamp_text}", fill='cyan')
+            return frame
+        
+        # Add timestamp overlay
+        cv2.putText(frame, timestamp_text, (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        
+        # Add frame counter
+        cv2.putText(frame, f"Frame: {frame_number}", (10, 60), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        
+        # Add device ID
+        cv2.putText(frame, f"Device: {self.device_id}", (10, 90), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        return frame
+    
+    def encode_frame(self, frame):
+        """JPEG-encode a frame and return it as base64 text"""
+        if isinstance(frame, EncodedFrame):
+            return frame.data
+        return base64.b64encode(self.encoder.encode(frame)).decode('utf-8')
+    
+    def render_simulated_frame(self):
+        """Draw the static part of a simulated camera frame (fallback when no camera)"""
+        width, height = self.frame_size
+        cx, cy = width // 2, height // 2
+        
+        # Create a simulated camera frame
+        img = Image.new('RGB', (width, height), color='black')
+        draw = ImageDraw.Draw(img)
+        
+        # Add visual elements
+        draw.rectangle([50, 50, width - 50, height - 50], outline='green', width=3)
+        
+        # Add crosshair
+        draw.line([(cx, cy - 40), (cx, cy + 40)], fill='green', width=2)
+        draw.line([(cx - 80, cy), (cx + 80, cy)], fill='green', width=2)
+        return img
+    
+    async def send_encoded_frame(self, frame_data, frame_number, captured_at):
+        """Send one encoded frame to the server"""
+        message = {
+            "type": "video_frame",
+            "device_id": self.device_id,
+            "frame_data": frame_data,
+            "frame_number": frame_number,
+            "client_ts": int(captured_at * 1000),
+            # Capture → send is the annotate + encode time
+            "sent_ts": int(time.time() * 1000),
+            "timestamp": datetime.fromtimestamp(captured_at).isoformat()
+        }
+        
+        # Video is live-only: frames taken while offline are dropped, not queued
+        if not await self.send_message(message, buffer=False, lane=LANE_VIDEO):
+            return
+        
+        if frame_number % 30 == 0:  # Log every 30 frames
+            print(f"🎥 Frame #{frame_number} sent ({len(frame_data)} bytes)")
     
     async def run(self):
         """Main run loop"""
-        await self.connect()
+        # Connects, and reconnects whenever the server goes away
+        self.connection_task = asyncio.create_task(self.maintain_connection())
         
         # Start video frame sending if camera or PIL is available
-        if self.use_camera or HAS_PIL:
+        if self.use_camera or self.video_source or HAS_PIL:
             asyncio.create_task(self.send_video_frame_loop())
-            print(f"📹 Video streaming started ({'Camera' if self.use_camera else 'Simulated'})")
+            source = 'Camera' if self.use_camera else 'Synthetic' if self.video_source else 'Simulated'
+            print(f"📹 Video streaming started ({source})")
         
         # Keep running until interrupted
         while self.running:
@@ -307,6 +1869,15 @@ class SimulatedRobot:
         """Close connection"""
         self.running = False
         
+        if self.webrtc:
+            for task in list(self.webrtc_tasks.values()):
+                task.cancel()
+            await self.webrtc.close()
+        
+        # Stop the capture thread before releasing the camera
+        if self.capture:
+            self.capture.stop()
+        
         # Release camera
         if self.camera:
             self.camera.release()
@@ -316,25 +1887,61 @@ class SimulatedRobot:
         if self.websocket:
             await self.websocket.close()
         
+        # Unsent messages handed back by the scheduler still go to disk
+        if self.requeue_task:
+            await self.requeue_task
+        
         print("🔌 Robot disconnected")
 
 
-async def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Robot client with camera support")
+    parser.add_argument("device_id", nargs="?", default="robot_01", help="Robot device id")
+    parser.add_argument("camera", nargs="?", default="camera", type=str.lower,
+                        help="'nocamera' to stream simulated video instead of the camera")
+    parser.add_argument("--server", default="ws://localhost:8000/ws/telemetry/", help="Server WebSocket URL")
+    parser.add_argument("--encoder", choices=["auto", *FRAME_ENCODERS], default="auto",
+                        help="JPEG encoder backend (auto = fastest installed)")
+    parser.add_argument("--quality", type=int, default=70, help="JPEG quality (1-100)")
+    parser.add_argument("--subsampling", choices=SUBSAMPLING_MODES, default="420",
+                        help="JPEG chroma subsampling")
+    parser.add_argument("--no-webrtc", action="store_true",
+                        help="Only stream JPEG frames, never answer WebRTC requests")
+    parser.add_argument("--benchmark-encoders", action="store_true",
+                        help="Compare the installed JPEG encoders on this machine and exit")
+    parser.add_argument("--benchmark-frames", type=int, default=100,
+                        help="Frames encoded per backend and resolution by --benchmark-encoders")
+    return parser.parse_args(argv)
+
+
+def print_encoder_benchmark(args):
+    if not HAS_NUMPY:
+        print("❌ The encoder benchmark needs NumPy: pip install numpy")
+        return
+    installed = available_encoders()
+    print(f"🧪 Benchmarking JPEG encoders: {', '.join(installed) or 'none installed'}")
+    print(f"   quality {args.quality}, subsampling {args.subsampling}, {args.benchmark_frames} frames each\n")
+    print(f"{'encoder':<12}{'size':>10}{'fps':>10}{'bytes/frame':>14}{'cpu ms/frame':>15}")
+    for row in benchmark_encoders(frames=args.benchmark_frames, quality=args.quality,
+                                  subsampling=args.subsampling):
+        print(f"{row['encoder']:<12}{row['size']:>10}{row['fps']:>10}"
+              f"{row['bytes_per_frame']:>14}{row['cpu_ms_per_frame']:>15}")
+
+
+async def main(args):
     """Run robot client with camera"""
-    # Configuration
-    server_url = "ws://localhost:8000/ws/telemetry/"
-    device_id = "robot_01"
-    use_camera = True
-    
-    # Parse command line arguments
-    if len(sys.argv) > 1:
-        device_id = sys.argv[1]
-    
-    if len(sys.argv) > 2 and sys.argv[2].lower() == "nocamera":
-        use_camera = False
+    use_camera = args.camera != "nocamera"
+    if not use_camera:
         print("📷 Camera disabled by command line argument")
     
-    robot = SimulatedRobot(server_url, device_id, use_camera=use_camera)
+    # Signed token from: python manage.py device_token issue <device_id>
+    token = os.environ.get("ROBOT_DEVICE_TOKEN")
+    
+    robot = SimulatedRobot(args.server, args.device_id, use_camera=use_camera, token=token,
+                           encoder=args.encoder, jpeg_quality=args.quality,
+                           jpeg_subsampling=args.subsampling, webrtc=not args.no_webrtc)
+    if robot.encoder:
+        print(f"🖼️  JPEG encoder: {robot.encoder.name} (quality {args.quality}, {args.subsampling})")
     
     try:
         await robot.run()
@@ -344,21 +1951,32 @@ async def main():
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark_encoders:
+        print_encoder_benchmark(args)
+        sys.exit(0)
+    
     print("""
     ╔════════════════════════════════════════╗
     ║   Robot Client with Camera Support     ║
     ║   Connects to Django WebSocket Server  ║
     ╚════════════════════════════════════════╝
     
-    Usage: python robot_client.py [device_id] [nocamera]
+    Usage: python robot_client.py [device_id] [nocamera] [--encoder NAME]
+                                  [--quality Q] [--subsampling 420]
     
     Examples:
       python robot_client.py robot_01          # Use laptop camera
       python robot_client.py robot_01 nocamera # Use simulated video
+      python robot_client.py --benchmark-encoders  # Pick the fastest JPEG encoder
+    
+    Set ROBOT_DEVICE_TOKEN to a token from `manage.py device_token issue`
+    to authenticate instead of sending a bare device_id.
     
     Requirements:
       pip install opencv-python websockets
+      pip install aiortc      # optional, low-latency WebRTC video
     
     """)
     
-    asyncio.run(main())
+    asyncio.run(main(args))
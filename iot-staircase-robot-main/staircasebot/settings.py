@@ -181,3 +181,49 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SECURE = False  # Set to True in production with HTTPS
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SAMESITE = 'Lax'
+
+# WebSocket presence: heartbeat ping interval and the idle time after which
+# a connection is considered half-open and reaped (seconds)
+ROBOT_HEARTBEAT_INTERVAL = float(os.environ.get('ROBOT_HEARTBEAT_INTERVAL', '5'))
+ROBOT_PRESENCE_TTL = float(os.environ.get('ROBOT_PRESENCE_TTL', '15'))
+
+# Robot authentication: signed device tokens (manage.py device_token issue ...)
+# Set ROBOT_REQUIRE_DEVICE_TOKEN=true to refuse bare ?device_id= connections
+ROBOT_REQUIRE_DEVICE_TOKEN = os.environ.get('ROBOT_REQUIRE_DEVICE_TOKEN', 'false').lower() == 'true'
+ROBOT_DEVICE_TOKEN_TTL = int(os.environ.get('ROBOT_DEVICE_TOKEN_TTL', str(30 * 24 * 3600)))
+ROBOT_TOKEN_REVOCATION_REFRESH = float(os.environ.get('ROBOT_TOKEN_REVOCATION_REFRESH', '30'))
+
+# Largest inflated size of an offline_batch replayed by a reconnecting robot (bytes)
+ROBOT_OFFLINE_BATCH_MAX_BYTES = int(os.environ.get('ROBOT_OFFLINE_BATCH_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Binary sensor streams (IMU, motor currents) are appended here per device and
+# channel; set ROBOT_SENSOR_STORE_DIR to an empty string to only relay them
+ROBOT_SENSOR_STORE_DIR = os.environ.get('ROBOT_SENSOR_STORE_DIR', str(BASE_DIR / 'sensor_data'))
+
+# Emergency stop: retransmit interval until the robot acks, give-up time (seconds)
+# and the ack latency above which a stop is reported as over budget (ms)
+ROBOT_ESTOP_RETRY_INTERVAL = float(os.environ.get('ROBOT_ESTOP_RETRY_INTERVAL', '0.1'))
+ROBOT_ESTOP_TIMEOUT = float(os.environ.get('ROBOT_ESTOP_TIMEOUT', '3'))
+ROBOT_ESTOP_LATENCY_BUDGET_MS = float(os.environ.get('ROBOT_ESTOP_LATENCY_BUDGET_MS', '100'))
+
+# Session recording: log every relayed message to a binary file per server
+# process for `manage.py replay_session`
+ROBOT_RECORD_SESSIONS = os.environ.get('ROBOT_RECORD_SESSIONS', 'false').lower() == 'true'
+ROBOT_RECORDING_DIR = os.environ.get('ROBOT_RECORDING_DIR', str(BASE_DIR / 'recordings'))
+
+# WebRTC video (optional, needs aiortc): with the relay on, the server is each
+# robot's only WebRTC peer and forwards its track to every dashboard
+ROBOT_WEBRTC_RELAY = os.environ.get('ROBOT_WEBRTC_RELAY', 'false').lower() == 'true'
+ROBOT_WEBRTC_TRACK_TIMEOUT = float(os.environ.get('ROBOT_WEBRTC_TRACK_TIMEOUT', '10'))
+
+# Range of telemetry delivery intervals dashboards may request with
+# telemetry_rate (seconds), updates in between are coalesced per robot
+ROBOT_TELEMETRY_MIN_INTERVAL = float(os.environ.get('ROBOT_TELEMETRY_MIN_INTERVAL', '0.1'))
+ROBOT_TELEMETRY_MAX_INTERVAL = float(os.environ.get('ROBOT_TELEMETRY_MAX_INTERVAL', '60'))
+
+# Telemetry, status and sensor messages queued per connection for a slow
+# client; past this the oldest are dropped
+ROBOT_OUTBOX_TELEMETRY_LIMIT = int(os.environ.get('ROBOT_OUTBOX_TELEMETRY_LIMIT', '1000'))
+
+# Seconds between fleet_summary messages (and refreshes of /api/fleet-summary/)
+ROBOT_FLEET_SUMMARY_INTERVAL = float(os.environ.get('ROBOT_FLEET_SUMMARY_INTERVAL', '1'))
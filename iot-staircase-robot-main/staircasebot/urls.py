@@ -55,6 +55,8 @@ urlpatterns = [
     path('robot/controller/', views.robot_controller, name='robot_controller'),
     path('robot/dashboard/', views.robot_dashboard, name='robot_dashboard'),
     path('api/battery-history/', views.battery_history, name='battery_history'),
+    path('api/battery-estimates/', views.battery_estimates, name='battery_estimates'),
+    path('api/fleet-summary/', views.fleet_summary, name='fleet_summary'),
     # Backward-compatible route
     path('robot/', views.robot_controller, name='robot'),
 ]